@@ -8,51 +8,34 @@ import random
 
 from config import Config
 from db import db_engine as db
-from models import User, RegistrationCode, Matchup, Pick, Player, Goalie, LineupPick, Prediction, Vote, MatchupResult, Team, UserPoints, ResetCode, Headline, Setting
-from score_module import calculate_bracket_points
-from stats_module import get_current_standings
+from models import User, RegistrationCode, Matchup, Pick, BracketPickItem, Player, Goalie, LineupPick, Prediction, PredictionSummary, Vote, MatchupResult, Team, UserPoints, ResetCode, Headline
+from score_module import calculate_bracket_points, ensure_user_points_columns, rescore_matchups, result_tuple, sync_pick_items, get_user_pick_items, record_lineup_history, ROUND1_CODES, ROUND2_CODES, ROUND3_CODES, FINAL_CODES
+from stats_module import get_user_predictions_summary
+from leaderboard_module import get_leaderboard_snapshot, DEFAULT_AROUND_RADIUS
+from version_module import POINTS_VERSION_KEY, STATS_VERSION_KEY, TEAMS_VERSION_KEY, HEADLINES_VERSION_KEY, MATCHUPS_VERSION_KEY, VOTES_VERSION_KEY, bump_data_version
+from cache_module import response_cache
+from profiler_module import query_profiler
+from log_module import get_logger, setup_logging
+from listing_module import PLAYER_FIELDS, GOALIE_FIELDS, parse_listing_args, list_entities
+from lineup_module import price_lineup, validate_lineup_save
+from settings_module import PLAYOFF_DEADLINE_KEY, GRACE_PERIOD_END_KEY, get_deadline, get_grace_period_end, set_setting
 
 import os
 import requests
 from dotenv import load_dotenv
 
-# Default deadline (will be used only if not in database)
-DEFAULT_DEADLINE = datetime(2025, 4, 20, 0, 0, 0, tzinfo=timezone.utc)
-
-# --- Grace period logic ---
-GRACE_PERIOD_END = datetime(2025, 4, 24, 4, 0, 0, tzinfo=timezone.utc)  # 24.4.2025 07:00 UTC+3 == 04:00 UTC
-
+setup_logging()
+logger = get_logger(__name__)
 
 def is_grace_period_active():
     """Return True if now is after the deadline but before the grace period end."""
     now = datetime.now(timezone.utc)
     deadline = get_deadline_from_db()
-    return deadline <= now < GRACE_PERIOD_END
+    return deadline <= now < get_grace_period_end()
 
 def get_deadline_from_db():
-    """Get the playoff deadline from the database settings table"""
-    setting = Setting.query.filter_by(key='playoff_deadline').first()
-    
-    if setting:
-        try:
-            return datetime.fromisoformat(setting.value)
-        except ValueError:
-            print(f"Invalid deadline format in database: {setting.value}")
-    
-    # Default to April 20, 2025 00:00:00 UTC if not found or invalid
-    default_deadline = datetime(2025, 4, 20, 0, 0, 0, tzinfo=timezone.utc)
-    
-    # Create the setting if it doesn't exist
-    if not setting:
-        setting = Setting(
-            key='playoff_deadline',
-            value=default_deadline.isoformat(),
-            description='Deadline for playoff bracket, lineup, and predictions submissions'
-        )
-        db.session.add(setting)
-        db.session.commit()
-    
-    return default_deadline
+    """Get the playoff deadline from the cached settings table"""
+    return get_deadline()
 
 def is_deadline_passed():
     """Check if the playoff submission deadline has passed"""
@@ -87,11 +70,18 @@ app = Flask(__name__)
 migrate = Migrate(app, db)
 
 # Configure CORS - allow all origins for portfolio demo
-CORS(app, resources={r"/api/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"]}})
+CORS(app, resources={r"/api/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"], "expose_headers": ["X-Total-Count", "X-Next-Cursor"]}})
 
 app.config.from_object(Config)
 
 db.init_app(app)
+response_cache.init_app(app)
+query_profiler.init_app(app)
+
+with app.app_context():
+    # Before the first request, every UserPoints query selects the columns added since the table was created
+    ensure_user_points_columns()
+    db.session.commit()
 
 @app.route('/api')
 def home():
@@ -139,6 +129,7 @@ def register():
     # Only mark as used if not reusable
     if not code.is_reusable:
         code.is_used = True
+    bump_data_version(POINTS_VERSION_KEY)  # New leaderboard row
     db.session.commit()
 
     return jsonify({"message": "User registered successfully"}), 201
@@ -271,6 +262,7 @@ def save_picks():
             created_at=datetime.now(timezone.utc)
         )
         db.session.add(new_pick)
+        sync_pick_items(user_id, picks)
         db.session.commit()
         return jsonify({"message": "Picks saved successfully"}), 200
 
@@ -299,70 +291,62 @@ def get_picks():
         picks_data = json.loads(pick.picks_json)
         return jsonify({"picks": picks_data}), 200
     except Exception as e:
-        print("Error parsing picks JSON:", e)
+        logger.exception("Error parsing picks JSON")
         return jsonify({"error": "Failed to parse picks", "details": str(e)}), 500
 
+@app.route("/api/bracket/pick-distribution", methods=["GET"])
+def get_pick_distribution():
+    """
+    Returns how many users picked each winner and series length for one matchup.
+    """
+    matchup_code = request.args.get("matchupCode")
+    if not matchup_code:
+        return jsonify({"error": "Missing matchupCode parameter"}), 400
+
+    rows = (
+        db.session.query(BracketPickItem.winner, BracketPickItem.games, db.func.count(BracketPickItem.id))
+        .filter(BracketPickItem.matchup_code == matchup_code)
+        .group_by(BracketPickItem.winner, BracketPickItem.games)
+        .order_by(BracketPickItem.winner, BracketPickItem.games)
+        .all()
+    )
+    distribution = [{"winner": winner, "games": games, "count": count} for winner, games, count in rows]
+    return jsonify({
+        "matchupCode": matchup_code,
+        "totalPicks": sum(entry["count"] for entry in distribution),
+        "picks": distribution
+    }), 200
+
 @app.route("/api/players", methods=["GET"])
+@response_cache.cached(STATS_VERSION_KEY, etag="players")
 def get_players():
-    try:
-        players = Player.query.all()
-        return jsonify([{
-            'id': p.id,
-            'api_id': p.api_id,
-            'first_name': p.first_name,
-            'last_name': p.last_name,
-            'team_abbr': p.team_abbr,
-            'position': p.position,
-            'jersey_number': p.jersey_number,
-            'birth_country': p.birth_country,
-            'birth_year': p.birth_year,
-            'headshot': p.headshot,
-            'is_U23': p.is_U23,
-            'price': p.price,
-            'reg_gp': p.reg_gp,
-            'reg_goals': p.reg_goals,
-            'reg_assists': p.reg_assists,
-            'reg_points': p.reg_points,
-            'reg_plus_minus': p.reg_plus_minus,
-            'playoff_goals': p.playoff_goals,
-            'playoff_assists': p.playoff_assists,
-            'playoff_points': p.playoff_points,
-            'playoff_plus_minus': p.playoff_plus_minus
-        } for p in players]), 200
-    except Exception as e:
-        print(f"Error in get_players: {str(e)}")  # Add logging
-        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+    """
+    List players. Optional query parameters, all executed in SQL:
+    fields (comma separated), team, position (comma separated), u23, max_price,
+    sort (field, "-" prefix for descending), limit and cursor. With a limit, the
+    cursor of the next page is returned in the X-Next-Cursor header.
+    """
+    return list_response(Player, PLAYER_FIELDS, "get_players")
 
 @app.route("/api/goalies", methods=["GET"])
+@response_cache.cached(STATS_VERSION_KEY, etag="goalies")
 def get_goalies():
+    """List goalies, takes the same query parameters as /api/players"""
+    return list_response(Goalie, GOALIE_FIELDS, "get_goalies")
+
+def list_response(model, fields, name):
+    try:
+        params = parse_listing_args(request.args, fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
-        goalies = Goalie.query.all()
-        return jsonify([{
-            'id': g.id,
-            'api_id': g.api_id,
-            'first_name': g.first_name,
-            'last_name': g.last_name,
-            'team_abbr': g.team_abbr,
-            'position': g.position,
-            'jersey_number': g.jersey_number,
-            'birth_country': g.birth_country,
-            'birth_year': g.birth_year,
-            'headshot': g.headshot,
-            'is_U23': g.is_U23,
-            'price': g.price,
-            'reg_gp': g.reg_gp,
-            'reg_gaa': g.reg_gaa,
-            'reg_save_pct': g.reg_save_pct,
-            'reg_shutouts': g.reg_shutouts,
-            'reg_wins': g.reg_wins,
-            'playoff_gp': g.playoff_gp,
-            'playoff_gaa': g.playoff_gaa,
-            'playoff_save_pct': g.playoff_save_pct,
-            'playoff_shutouts': g.playoff_shutouts,
-            'playoff_wins': g.playoff_wins
-        } for g in goalies]), 200
+        rows, next_cursor = list_entities(model, fields, params)
+        response = jsonify(rows)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
     except Exception as e:
-        print(f"Error in get_goalies: {str(e)}")
+        logger.exception("Error in %s", name)
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 @app.route("/api/lineup/save", methods=["POST"])
@@ -373,33 +357,28 @@ def save_lineup():
     if not user_id or not lineup:
         return jsonify({"error": "Missing user_id or lineup"}), 400
     if is_grace_period_active():
-        return jsonify({"error": "Lineup changes are disabled during the grace period (until 24.4.2025 07:00 UTC+3)."}), 403
+        end = get_grace_period_end().astimezone(timezone(timedelta(hours=3)))
+        return jsonify({"error": f"Lineup changes are disabled during the grace period (until {end.day}.{end.month}.{end.year} {end:%H:%M} UTC+3)."}), 403
     try:
         existing = LineupPick.query.filter_by(user_id=user_id).first()
         deadline_passed = is_deadline_passed()
         if not existing and deadline_passed:
             return jsonify({"error": "Lineup submission deadline has passed. New lineups cannot be created."}), 403
-        total_value = 0
-        for slot, player_id in lineup.items():
-            if player_id:
-                if slot == 'G':
-                    goalie = Goalie.query.get(player_id)
-                    if goalie:
-                        total_value += goalie.price
-                else:
-                    player = Player.query.get(player_id)
-                    if player:
-                        total_value += player.price
+        try:
+            total_value, unused_budget = validate_lineup_save(lineup, existing)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        record_lineup_history(int(user_id), lineup)
         if existing:
             existing.lineup_json = json.dumps(lineup)
-            existing.unused_budget = data.get("unusedBudget", 0)
+            existing.unused_budget = unused_budget
             existing.total_value = total_value
             existing.updated_at = datetime.now(timezone.utc)
         else:
             new_lineup = LineupPick(
                 user_id=user_id,
                 lineup_json=json.dumps(lineup),
-                unused_budget=data.get("unusedBudget", 0),
+                unused_budget=unused_budget,
                 total_value=total_value,
                 created_at=datetime.now(timezone.utc)
             )
@@ -424,17 +403,7 @@ def get_lineup():
         if not lineup_pick:
             return jsonify({"error": "No lineup found for this user"}), 404
         lineup_data = json.loads(lineup_pick.lineup_json)
-        total_value = 0
-        for slot, player_id in lineup_data.items():
-            if player_id:
-                if slot == 'G':
-                    goalie = Goalie.query.get(player_id)
-                    if goalie:
-                        total_value += goalie.price
-                else:
-                    player = Player.query.get(player_id)
-                    if player:
-                        total_value += player.price
+        total_value = price_lineup(lineup_data)
         return jsonify({
             "lineup": lineup_data,
             "unusedBudget": lineup_pick.unused_budget,
@@ -442,7 +411,7 @@ def get_lineup():
             "effectiveBudget": total_value + lineup_pick.unused_budget
         }), 200
     except Exception as e:
-        print("Error getting lineup:", e)
+        logger.exception("Error getting lineup")
         return jsonify({"error": "Failed to parse lineup", "details": str(e)}), 500
 
 @app.route('/api/predictions/save', methods=['POST'])
@@ -476,7 +445,9 @@ def save_predictions():
             created_at=datetime.now(timezone.utc)
         )
         db.session.add(new_prediction)
-    
+
+    # The precomputed summary is rebuilt from the new picks on the next summary request
+    PredictionSummary.query.filter_by(user_id=user_id).delete()
     db.session.commit()
     return jsonify({"message": "Predictions saved successfully"}), 200
 
@@ -505,11 +476,17 @@ def get_predictions():
 
 @app.route('/api/predictions/summary', methods=['GET'])
 def get_predictions_summary():
-    """Get a summary of the user's predictions compared to current standings"""
-    from stats_module import get_current_standings
+    """
+    Get a summary of the user's predictions compared to current standings.
 
+    Every category has currentTop3, the top 3 by the category's stat, and tiedAtThird,
+    the players outside the top 3 with the same value as the 3rd (scoring counts the top 3
+    only). Both are ordered by value descending with ties broken by the lower id, and
+    players without a value come last on every database. Each entry carries the ranked
+    stat as "value".
+    """
     user_id = request.args.get('userId')
-    print(f"\nProcessing predictions summary for user {user_id}")
+    logger.debug("Processing predictions summary for user %s", user_id)
 
     if not user_id:
         return jsonify({"error": "Missing userId parameter"}), 400
@@ -520,109 +497,13 @@ def get_predictions_summary():
         return jsonify({"error": "Invalid userId"}), 400
 
     try:
-        # Get the user's predictions
-        prediction = Prediction.query.filter_by(user_id=user_id).first()
-        if not prediction:
+        summary = get_user_predictions_summary(user_id)
+        if summary is None:
             return jsonify({"error": "No predictions found for this user"}), 404
-
-        predictions_data = json.loads(prediction.predictions_json)
-
-        # Get current standings from stats module
-        print("\nFetching current standings...")
-        current_standings = get_current_standings()
-        print(f"\nGot current standings for categories: {list(current_standings.keys())}")
-
-        # Initialize summary structure
-        summary = {
-            "completed": 0,
-            "totalToComplete": len(current_standings) * 3,  # 3 picks per category
-            "categories": [],
-            "totalCorrect": 0
-        }
-
-        # Process each category from the current standings
-        for category, curr_top3 in current_standings.items():
-            print(f"\nProcessing category: {category}")
-            if category in predictions_data:
-                # Get user's picks for this category
-                user_picks = predictions_data[category]
-                if isinstance(user_picks, list):
-                    user_picks = user_picks[:3]  # Get top 3 picks
-
-                # Count correct picks by comparing IDs
-                correct_picks = 0
-                for pick in user_picks:
-                    if isinstance(pick, str):
-                        # Legacy format: compare by name
-                        pick_name = pick
-                        correct_picks += sum(1 for p in curr_top3 if f"{p.first_name} {p.last_name}" == pick_name)
-                    else:
-                        # New format: compare by ID
-                        pick_id = pick.get('id')
-                        correct_picks += sum(1 for p in curr_top3 if p.id == pick_id)
-
-                # Convert current top 3 players/goalies to dictionaries
-                current_top3_dicts = []
-                for player in curr_top3:
-                    if hasattr(player, 'reg_gaa'):  # It's a goalie
-                        player_dict = {
-                            'id': player.id,
-                            'firstName': player.first_name,
-                            'lastName': player.last_name,
-                            'team': player.team_abbr,
-                            'position': player.position,
-                            'isU23': player.is_U23,
-                            'price': player.price,
-                            'reg_gp': player.reg_gp,
-                            'reg_gaa': player.reg_gaa,
-                            'reg_save_pct': player.reg_save_pct,
-                            'reg_shutouts': player.reg_shutouts,
-                            'reg_wins': player.reg_wins
-                        }
-                    else:  # It's a player
-                        player_dict = {
-                            'id': player.id,
-                            'firstName': player.first_name,
-                            'lastName': player.last_name,
-                            'team': player.team_abbr,
-                            'position': player.position,
-                            'isU23': player.is_U23,
-                            'price': player.price,
-                            'reg_gp': player.reg_gp,
-                            'reg_goals': player.reg_goals,
-                            'reg_assists': player.reg_assists,
-                            'reg_points': player.reg_points,
-                            'reg_plus_minus': player.reg_plus_minus,
-                            'playoff_goals': 0,
-                            'playoff_assists': 0,
-                            'playoff_points': 0,
-                            'playoff_plus_minus': 0
-                        }
-                        if hasattr(player, 'reg_penalty_minutes'):
-                            player_dict['reg_penalty_minutes'] = player.reg_penalty_minutes
-
-                    current_top3_dicts.append(player_dict)
-
-                category_summary = {
-                    "name": category,
-                    "userPicks": user_picks,
-                    "currentTop3": current_top3_dicts,
-                    "correctPicks": correct_picks
-                }
-
-                summary["categories"].append(category_summary)
-                summary["totalCorrect"] += correct_picks
-
-                # Update completed count if we have actual standings
-                if curr_top3:
-                    summary["completed"] += 1
-
-        return jsonify(summary), 200
+        return app.response_class(summary, mimetype="application/json"), 200
 
     except Exception as e:
-        print(f"Error getting predictions summary: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error getting predictions summary")
         return jsonify({"error": f"Failed to get predictions summary: {str(e)}"}), 500
 
 @app.route("/api/bracket/summary", methods=["GET"])
@@ -639,10 +520,9 @@ def get_bracket_summary():
         return jsonify({"error": "Invalid userId"}), 400
     try:
         # Get the user's picks
-        pick = Pick.query.filter_by(user_id=user_id).first()
-        if not pick:
+        user_predictions = get_user_pick_items(user_id)
+        if user_predictions is None:
             return jsonify({"error": "No picks found for this user"}), 404
-        picks_data = json.loads(pick.picks_json)
 
         # Get all actual results
         all_results = MatchupResult.query.all()
@@ -666,126 +546,57 @@ def get_bracket_summary():
 
         # Build roundMatchups for dashboard
         round_matchups = []
-        # Round 1
-        r1 = []
-        for code in ["W1", "W2", "W3", "W4", "E1", "E2", "E3", "E4"]:
-            user_pick = picks_data.get("round1", {}).get(code)
-            user_games = picks_data.get("round1Games", {}).get(code)
-            if user_pick:
-                r1.append(build_matchup_comparison(code, user_pick, user_games, "Ensimmäinen kierros"))
-        round_matchups.append({"name": "Ensimmäinen kierros", "matchups": r1})
-        # Round 2
-        r2 = []
-        for code in ["w-semi", "w-semi2", "e-semi", "e-semi2"]:
-            user_pick = picks_data.get("round2", {}).get(f"{code}-winner")
-            user_games = picks_data.get("round2Games", {}).get(code)
-            if user_pick:
-                r2.append(build_matchup_comparison(code, user_pick, user_games, "Toinen kierros"))
-        round_matchups.append({"name": "Toinen kierros", "matchups": r2})
-        # Round 3
-        r3 = []
-        for code in ["west-final", "east-final"]:
-            user_pick = picks_data.get("round3", {}).get(f"{code}-winner")
-            user_games = picks_data.get("round3Games", {}).get(code)
-            if user_pick:
-                r3.append(build_matchup_comparison(code, user_pick, user_games, "Konferenssifinaalit"))
-        round_matchups.append({"name": "Konferenssifinaalit", "matchups": r3})
-        # Final
-        rf = []
-        user_pick = picks_data.get("final", {}).get("cup-winner")
-        user_games = picks_data.get("finalGames", {}).get("cup")
-        if user_pick:
-            rf.append(build_matchup_comparison("cup", user_pick, user_games, "Finaali"))
-        round_matchups.append({"name": "Finaali", "matchups": rf})
-
-        # Calculate points/corrects using score_module
-        calculate_bracket_points(int(user_id))  # updates UserPoints
-        user_points = UserPoints.query.filter_by(user_id=int(user_id)).first()
-
-        # Get statistics across all users
-        all_user_points = UserPoints.query.all()
-
-        # Calculate statistics for each round
-        round1_correct_values = [up.bracket_round1_correct for up in all_user_points if up.bracket_round1_correct is not None]
-        round1_points_values = [up.bracket_round1_points for up in all_user_points if up.bracket_round1_points is not None]
-
-        round2_correct_values = [up.bracket_round2_correct for up in all_user_points if up.bracket_round2_correct is not None]
-        round2_points_values = [up.bracket_round2_points for up in all_user_points if up.bracket_round2_points is not None]
-
-        round3_correct_values = [up.bracket_round3_correct for up in all_user_points if up.bracket_round3_correct is not None]
-        round3_points_values = [up.bracket_round3_points for up in all_user_points if up.bracket_round3_points is not None]
-
-        final_correct_values = [up.bracket_final_correct for up in all_user_points if up.bracket_final_correct is not None]
-        final_points_values = [up.bracket_final_points for up in all_user_points if up.bracket_final_points is not None]
-
-        # Calculate totals across all rounds
-        total_correct_values = [(up.bracket_round1_correct or 0) + 
-                               (up.bracket_round2_correct or 0) + 
-                               (up.bracket_round3_correct or 0) + 
-                               (up.bracket_final_correct or 0) for up in all_user_points]
-
-        total_points_values = [(up.bracket_round1_points or 0) + 
-                              (up.bracket_round2_points or 0) + 
-                              (up.bracket_round3_points or 0) + 
-                              (up.bracket_final_points or 0) for up in all_user_points]
-
-        # Helper function to safely calculate average
-        def safe_avg(values):
-            return sum(values) / len(values) if values else 0
+        for round_name, codes in (
+            ("Ensimmäinen kierros", ROUND1_CODES),
+            ("Toinen kierros", ROUND2_CODES),
+            ("Konferenssifinaalit", ROUND3_CODES),
+            ("Finaali", FINAL_CODES),
+        ):
+            matchups = []
+            for code in codes:
+                prediction = user_predictions.get(code)
+                if prediction:
+                    matchups.append(build_matchup_comparison(code, prediction["winner"], prediction["games"], round_name))
+            round_matchups.append({"name": round_name, "matchups": matchups})
+
+        # Points are kept up to date by the scorers, only score users whose bracket has never been scored
+        user_points = UserPoints.query.filter_by(user_id=user_id).first()
+        if not user_points or not user_points.bracket_scored:
+            calculate_bracket_points(user_id)
+            user_points = UserPoints.query.filter_by(user_id=user_id).first()
+
+        # Statistics across all users come from the leaderboard snapshot
+        _, snapshot = get_leaderboard_snapshot()
+        stats = snapshot.bracket_stats
 
         # Build rounds summary for dashboard
-        rounds = [
-            {
-                "name": "1. kierros",
-                "correct": user_points.bracket_round1_correct,
-                "avgCorrect": round(safe_avg(round1_correct_values), 1),
-                "bestCorrect": max(round1_correct_values, default=0),
-                "points": user_points.bracket_round1_points,
-                "avgPoints": round(safe_avg(round1_points_values), 1),
-                "bestPoints": max(round1_points_values, default=0)
-            },
-            {
-                "name": "2. kierros",
-                "correct": user_points.bracket_round2_correct,
-                "avgCorrect": round(safe_avg(round2_correct_values), 1),
-                "bestCorrect": max(round2_correct_values, default=0),
-                "points": user_points.bracket_round2_points,
-                "avgPoints": round(safe_avg(round2_points_values), 1),
-                "bestPoints": max(round2_points_values, default=0)
-            },
-            {
-                "name": "3. Kierros",
-                "correct": user_points.bracket_round3_correct,
-                "avgCorrect": round(safe_avg(round3_correct_values), 1),
-                "bestCorrect": max(round3_correct_values, default=0),
-                "points": user_points.bracket_round3_points,
-                "avgPoints": round(safe_avg(round3_points_values), 1),
-                "bestPoints": max(round3_points_values, default=0)
-            },
-            {
-                "name": "Finaali",
-                "correct": user_points.bracket_final_correct,
-                "avgCorrect": round(safe_avg(final_correct_values), 1),
-                "bestCorrect": max(final_correct_values, default=0),
-                "points": user_points.bracket_final_points,
-                "avgPoints": round(safe_avg(final_points_values), 1),
-                "bestPoints": max(final_points_values, default=0)
-            }
-        ]
+        rounds = []
+        for name, round_key in (("1. kierros", "round1"), ("2. kierros", "round2"), ("3. Kierros", "round3"), ("Finaali", "final")):
+            correct_stats = stats[f"bracket_{round_key}_correct"]
+            points_stats = stats[f"bracket_{round_key}_points"]
+            rounds.append({
+                "name": name,
+                "correct": getattr(user_points, f"bracket_{round_key}_correct") or 0,
+                "avgCorrect": round(correct_stats["avg"], 1),
+                "bestCorrect": correct_stats["best"],
+                "points": getattr(user_points, f"bracket_{round_key}_points") or 0,
+                "avgPoints": round(points_stats["avg"], 1),
+                "bestPoints": points_stats["best"]
+            })
         summary = {
             "rounds": rounds,
             "totalCorrect": sum(r["correct"] for r in rounds),
-            "avgTotalCorrect": round(safe_avg(total_correct_values), 1),
-            "bestTotalCorrect": max(total_correct_values, default=0),
-            "avgTotalPoints": round(safe_avg(total_points_values), 1),
-            "bestTotalPoints": max(total_points_values, default=0),
+            "avgTotalCorrect": round(stats["total_correct"]["avg"], 1),
+            "bestTotalCorrect": stats["total_correct"]["best"],
+            "avgTotalPoints": round(stats["total_points"]["avg"], 1),
+            "bestTotalPoints": stats["total_points"]["best"],
             "completed": sum(r["correct"] for r in rounds),
             "total": 15,  # 8+4+2+1
             "roundMatchups": round_matchups
         }
         return jsonify(summary), 200
     except Exception as e:
-        print("Error in get_bracket_summary:", str(e))
+        logger.exception("Error in get_bracket_summary")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/user/by-team-name", methods=["GET"])
@@ -822,6 +633,7 @@ def update_user_logo():
     
     # Update the selected logo URL
     user.selected_logo_url = logo_url
+    bump_data_version(POINTS_VERSION_KEY)  # Logos are shown on the leaderboard
     
     try:
         db.session.commit()
@@ -899,17 +711,9 @@ def get_user_stats():
                 }
             }), 200
         
-        # Get all user points
-        all_points = UserPoints.query.all()
-        
-        # Get all unique point values in descending order
-        unique_points = sorted(set(p.total_points for p in all_points), reverse=True)
-        
-        # Create a mapping from points to rank
-        points_to_rank = {points: rank+1 for rank, points in enumerate(unique_points)}
-        
-        # Get user's rank
-        user_rank = points_to_rank.get(user_points.total_points)
+        # Dense rank by total points, looked up in the leaderboard snapshot
+        _, snapshot = get_leaderboard_snapshot()
+        user_rank = snapshot.points_rank(user_points.total_points)
         
         return jsonify({
             "rank": user_rank,
@@ -926,7 +730,7 @@ def get_user_stats():
         }), 200
     
     except Exception as e:
-        print(f"Error getting user stats: {str(e)}")
+        logger.exception("Error getting user stats")
         return jsonify({"error": f"Failed to retrieve user stats: {str(e)}"}), 500
 
 @app.route("/api/leaderboard", methods=["GET"])
@@ -934,61 +738,36 @@ def get_leaderboard():
     """
     Return leaderboard with real user points and correct ranking.
     Rank by total points (desc), then by number of playoff series correctly predicted (desc).
-    """
-    users = User.query.all()
-    if not users:
-        return jsonify({"error": "No users found"}), 404
 
-    leaderboard = []
-    # Gather all user points and corrects
-    for user in users:
-        points = UserPoints.query.filter_by(user_id=user.id).first()
-        if points:
-
-            bracket_points = points.bracket_total_points or 0
-            lineup_points = points.lineup_total_points or 0
-            predictions_points = points.predictions_total_points or 0
-            total_points = bracket_points + lineup_points + predictions_points
-            # Sum of all correct series predictions
-            correct_series = (
-                (points.bracket_round1_correct or 0)
-                + (points.bracket_round2_correct or 0)
-                + (points.bracket_round3_correct or 0)
-                + (points.bracket_final_correct or 0)
-            )
-        else:
-            total_points = 0
-            bracket_points = 0
-            lineup_points = 0
-            predictions_points = 0
-            correct_series = 0
-        leaderboard.append({
-            "id": user.id,
-            "username": user.username,
-            "teamName": user.team_name,
-            "logoUrl": user.selected_logo_url,
-            "totalPoints": total_points,
-            "bracketPoints": bracket_points,
-            "lineupPoints": lineup_points,
-            "predictionsPoints": predictions_points,
-            "correctSeries": correct_series
-        })
+    Optional query params:
+        limit, offset: page through the ranked list
+        around, radius: only the entries within `radius` positions of user `around`
+    The total number of ranked users is returned in the X-Total-Count header.
 
-    # Sort: totalPoints desc, then correctSeries desc
-    leaderboard.sort(key=lambda x: (-x["totalPoints"], -x["correctSeries"]))
+    Served from an in-memory snapshot that is rebuilt when the points version
+    changes. The version is the ETag, so polling clients get a 304 until then.
+    """
+    limit = request.args.get("limit", type=int)
+    offset = request.args.get("offset", 0, type=int)
+    around = request.args.get("around", type=int)
+    radius = request.args.get("radius", DEFAULT_AROUND_RADIUS, type=int)
+    if (limit is not None and limit < 0) or offset < 0 or radius < 0:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+
+    version, snapshot = get_leaderboard_snapshot()
+    if not snapshot.rows:
+        return jsonify({"error": "No users found"}), 404
 
-    # Assign ranks (1-based, ties get same rank, next rank is skipped)
-    last_points = last_correct = None
-    last_rank = 0
-    for idx, entry in enumerate(leaderboard):
-        if (entry["totalPoints"], entry["correctSeries"]) != (last_points, last_correct):
-            last_rank = idx + 1
-            last_points = entry["totalPoints"]
-            last_correct = entry["correctSeries"]
-        entry["rank"] = last_rank
-        entry.pop("correctSeries", None)
+    if around is not None:
+        leaderboard = snapshot.around(around, radius)
+    else:
+        leaderboard = snapshot.page(limit=limit, offset=offset)
 
-    return jsonify(leaderboard), 200
+    response = jsonify(leaderboard)
+    response.headers["X-Total-Count"] = str(len(snapshot.rows))
+    response.headers["Cache-Control"] = "no-cache"
+    response.set_etag(f"points-{version}")
+    return response.make_conditional(request)
 
 @app.route('/api/votes', methods=['POST'])
 def submit_vote():
@@ -996,25 +775,25 @@ def submit_vote():
     user_id = data.get('userId')
     
     if not user_id:
-        print("User ID is missing.")
+        logger.info("Vote rejected: user ID is missing")
         return jsonify({'error': 'Missing user_id'}), 400
     
     user = User.query.get(user_id)
     if not user:
-        print(f"User with ID {user_id} not found.")
+        logger.info("Vote rejected: user %s not found", user_id)
         return jsonify({'error': 'User not found'}), 404
     
     if user.has_voted:
-        print(f"User {user_id} has already voted.")
+        logger.info("Vote rejected: user %s has already voted", user_id)
         return jsonify({'error': 'User has already voted'}), 400
         
     if not all(key in data for key in ['entryFee', 'distribution']):
-        print("Missing required data in the request.")
+        logger.info("Vote rejected: missing required data")
         return jsonify({'error': 'Missing required data'}), 400
         
     distribution = data['distribution']
     if sum([distribution['first'], distribution['second'], distribution['third']]) != 100:
-        print("Distribution does not total 100%.")
+        logger.info("Vote rejected: distribution does not total 100%")
         return jsonify({'error': 'Distribution must total 100%'}), 400
 
     vote = Vote(
@@ -1033,6 +812,7 @@ def submit_vote():
     return jsonify({'message': 'Vote submitted successfully'}), 201
 
 @app.route('/api/votes/stats', methods=['GET'])
+@response_cache.cached(VOTES_VERSION_KEY)
 def get_vote_stats():
     # Get entry fee votes
     entry_fee_votes = db.session.query(
@@ -1115,10 +895,11 @@ def save_matchups():
         
     except Exception as e:
         db.session.rollback()
-        print("Error saving matchups:", e)
+        logger.exception("Error saving matchups")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/bracket/round-matchups', methods=['GET'])
+@response_cache.cached(MATCHUPS_VERSION_KEY)
 def get_round_matchups():
     round_num = request.args.get('round', 1, type=int)
     
@@ -1185,7 +966,7 @@ def get_round_matchups():
         return jsonify(result), 200
         
     except Exception as e:
-        print("Error getting round matchups:", e)
+        logger.exception("Error getting round matchups")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/bracket/delete-result/<string:matchup_code>', methods=['DELETE'])
@@ -1200,14 +981,16 @@ def delete_matchup_result(matchup_code):
         if not result:
             return jsonify({"error": "Result not found"}), 404
         
-        # Delete the result
+        # Delete the result and take its points back from the users who got them
+        old_result = result_tuple(result.winner, result.games)
         db.session.delete(result)
+        rescore_matchups({matchup_code: (old_result, None)})
         db.session.commit()
         
         return jsonify({"message": f"Result for matchup {matchup_code} deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error deleting matchup result: {e}")
+        logger.exception("Error deleting matchup result")
         return jsonify({"error": f"Failed to delete result: {str(e)}"}), 500
 
 @app.route('/api/bracket/save-results', methods=['POST'])
@@ -1222,6 +1005,14 @@ def save_round_results():
     formatted_results = data.get('formattedResults', {})
     
     try:
+        # Remember the previous results so that only the changed points get rescored
+        result_codes = [result.get('matchupCode') for result in results]
+        old_results = {
+            r.matchup_code: result_tuple(r.winner, r.games)
+            for r in MatchupResult.query.filter(MatchupResult.matchup_code.in_(result_codes)).all()
+        }
+        result_changes = {}
+
         # Save the current round results
         for result in results:
             matchup_id = result.get('matchupId')
@@ -1229,11 +1020,10 @@ def save_round_results():
             winner = result.get('winner')
             games = result.get('games')
             
-            # Add debug output
-            print(f"Processing result: id={matchup_id}, code={matchup_code}, winner={winner}, games={games}")
+            logger.debug("Processing result: id=%s, code=%s, winner=%s, games=%s", matchup_id, matchup_code, winner, games)
             
             if not matchup_id or not winner:
-                print("Invalid result data:", result)
+                logger.info("Invalid result data: %s", result)
                 return jsonify({"error": "Invalid result data"}), 400
                 
             # Ensure matchup_id is an integer
@@ -1257,6 +1047,10 @@ def save_round_results():
                     games=games
                 )
                 db.session.add(matchup_result)
+            result_changes[matchup_code] = (old_results.get(matchup_code), result_tuple(winner, games))
+
+        # Apply the point deltas in the same transaction as the results
+        rescore_matchups(result_changes)
 
         # Create matchups for the next round
         next_round = round_num + 1
@@ -1273,7 +1067,7 @@ def save_round_results():
                 matchup_code = str(result.get('matchupCode'))
                 winners[matchup_code] = result.get('winner')
             
-            print("Winner mapping:", winners)
+            logger.debug("Winner mapping: %s", winners)
             
             # Create matchups for different rounds
             if round_num == 1:
@@ -1362,12 +1156,11 @@ def save_round_results():
         
     except Exception as e:
         db.session.rollback()
-        import traceback
-        print("Error saving results:", str(e))
-        print(traceback.format_exc())
+        logger.exception("Error saving results")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/teams", methods=["GET"])
+@response_cache.cached(TEAMS_VERSION_KEY)
 def get_teams():
     """
     Endpoint to fetch all NHL teams from the database
@@ -1385,8 +1178,8 @@ def get_teams():
         ]
         
         return jsonify(teams_data), 200
-    except Exception as e:
-        print(f"Error fetching teams: {e}")
+    except Exception:
+        logger.exception("Error fetching teams")
         return jsonify({"error": "Failed to fetch teams"}), 500
 
 @app.route('/api/registration-codes', methods=['GET'])
@@ -1407,8 +1200,8 @@ def get_registration_codes():
         ]
         
         return jsonify(codes_data), 200
-    except Exception as e:
-        print(f"Error fetching registration codes: {e}")
+    except Exception:
+        logger.exception("Error fetching registration codes")
         return jsonify({"error": "Failed to fetch registration codes"}), 500
 
 @app.route('/api/registration-codes', methods=['POST'])
@@ -1445,7 +1238,7 @@ def create_new_registration_codes():
         }), 201
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating registration codes: {e}")
+        logger.exception("Error creating registration codes")
         return jsonify({"error": f"Failed to create registration codes: {str(e)}"}), 500
 
 @app.route('/api/users', methods=['GET'])
@@ -1471,8 +1264,8 @@ def get_all_users():
         ]
         
         return jsonify(users_data), 200
-    except Exception as e:
-        print(f"Error fetching users: {e}")
+    except Exception:
+        logger.exception("Error fetching users")
         return jsonify({"error": "Failed to fetch users"}), 500
 
 @app.route('/api/users/<int:user_id>/logos', methods=['PUT'])
@@ -1498,6 +1291,7 @@ def update_user_logos(user_id):
             user.logo4_url = data['logo4_url']
         if 'selected_logo_url' in data:
             user.selected_logo_url = data['selected_logo_url']
+            bump_data_version(POINTS_VERSION_KEY)  # Logos are shown on the leaderboard
 
         db.session.commit()
 
@@ -1516,10 +1310,11 @@ def update_user_logos(user_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error updating user logos: {e}")
+        logger.exception("Error updating user logos")
         return jsonify({"error": f"Failed to update user logos: {str(e)}"}), 500
 
 @app.route('/api/headlines', methods=['GET'])
+@response_cache.cached(HEADLINES_VERSION_KEY)
 def get_headlines():
     """
     Get active headlines, optionally filtered by team name
@@ -1549,7 +1344,7 @@ def get_headlines():
         return jsonify(headline_data), 200
     
     except Exception as e:
-        print(f"Error fetching headlines: {e}")
+        logger.exception("Error fetching headlines")
         return jsonify({"error": f"Failed to fetch headlines: {str(e)}"}), 500
 
 @app.route('/api/headlines', methods=['POST'])
@@ -1583,9 +1378,39 @@ def create_headline():
     
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating headline: {e}")
+        logger.exception("Error creating headline")
         return jsonify({"error": f"Failed to create headline: {str(e)}"}), 500
 
+@app.route('/api/admin/cache', methods=['GET'])
+def get_cache_stats():
+    """
+    Admin endpoint for the response cache hit/miss counters of this worker
+    """
+    return jsonify(response_cache.get_stats()), 200
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+def clear_cache():
+    """
+    Admin endpoint to drop every cached response
+    """
+    response_cache.clear()
+    return jsonify({"message": "Response cache cleared"}), 200
+
+@app.route('/api/admin/profiler', methods=['GET'])
+def get_profiler_stats():
+    """
+    Admin endpoint for per route request times and query counts of this worker, needs PROFILER_ENABLED
+    """
+    return jsonify(query_profiler.get_stats()), 200
+
+@app.route('/api/admin/profiler', methods=['DELETE'])
+def reset_profiler_stats():
+    """
+    Admin endpoint to reset the profiler totals
+    """
+    query_profiler.reset()
+    return jsonify({"message": "Profiler stats reset"}), 200
+
 @app.route('/api/admin/headlines', methods=['GET'])
 def get_all_headlines():
     """
@@ -1608,7 +1433,7 @@ def get_all_headlines():
         return jsonify(headline_data), 200
     
     except Exception as e:
-        print(f"Error fetching all headlines: {e}")
+        logger.exception("Error fetching all headlines")
         return jsonify({"error": f"Failed to fetch headlines: {str(e)}"}), 500
 
 @app.route('/api/admin/headlines/<int:headline_id>', methods=['PUT'])
@@ -1631,7 +1456,7 @@ def update_headline(headline_id):
             headline.is_active = data['is_active']
         
         db.session.commit()
-        print(f"Updated headline: {headline.headline} (ID: {headline.id})")
+        logger.info("Updated headline: %s (ID: %s)", headline.headline, headline.id)
         return jsonify({
             "message": "Headline updated successfully",
             "headline": {
@@ -1645,7 +1470,7 @@ def update_headline(headline_id):
     
     except Exception as e:
         db.session.rollback()
-        print(f"Error updating headline: {e}")
+        logger.exception("Error updating headline")
         return jsonify({"error": f"Failed to update headline: {str(e)}"}), 500
 
 @app.route('/api/admin/headlines/<int:headline_id>', methods=['DELETE'])
@@ -1665,7 +1490,7 @@ def delete_headline(headline_id):
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error deleting headline: {e}")
+        logger.exception("Error deleting headline")
         return jsonify({"error": f"Failed to delete headline: {str(e)}"}), 500
 
 @app.route('/api/deadline/status', methods=['GET'])
@@ -1676,7 +1501,7 @@ def get_deadline_status():
     deadline_passed = is_deadline_passed()
     time_remaining = get_time_until_deadline()
     grace_period_active = is_grace_period_active()
-    grace_period_end = GRACE_PERIOD_END.isoformat()
+    grace_period_end = get_grace_period_end().isoformat()
     return jsonify({
         "deadline_passed": deadline_passed,
         "time_remaining": time_remaining,
@@ -1704,23 +1529,23 @@ def update_deadline():
         if new_deadline.tzinfo is None:
             new_deadline = new_deadline.replace(tzinfo=timezone.utc)
             
-        # Update the setting in database
-        setting = Setting.query.filter_by(key='playoff_deadline').first()
-        if not setting:
-            setting = Setting(
-                key='playoff_deadline',
-                value=new_deadline.isoformat(),
-                description='Deadline for playoff bracket, lineup, and predictions submissions'
-            )
-            db.session.add(setting)
-        else:
-            setting.value = new_deadline.isoformat()
-            
+        # Optional new end for the grace period, in the same format
+        grace_period_end = None
+        if data.get('grace_period_end'):
+            grace_period_end = datetime.fromisoformat(data['grace_period_end'])
+            if grace_period_end.tzinfo is None:
+                grace_period_end = grace_period_end.replace(tzinfo=timezone.utc)
+
+        # Update the settings in database, every worker reloads them on the next version check
+        set_setting(PLAYOFF_DEADLINE_KEY, new_deadline.isoformat())
+        if grace_period_end:
+            set_setting(GRACE_PERIOD_END_KEY, grace_period_end.isoformat())
         db.session.commit()
         
         return jsonify({
             "message": "Deadline updated successfully",
             "deadline": new_deadline.isoformat(),
+            "grace_period_end": get_grace_period_end().isoformat(),
             "deadline_passed": datetime.now(timezone.utc) >= new_deadline,
             "time_remaining": get_time_until_deadline()
         }), 200
@@ -1741,7 +1566,8 @@ def get_admin_deadline():
     return jsonify({
         "deadline": deadline.isoformat(),
         "deadline_passed": datetime.now(timezone.utc) >= deadline,
-        "time_remaining": get_time_until_deadline()
+        "time_remaining": get_time_until_deadline(),
+        "grace_period_end": get_grace_period_end().isoformat()
     }), 200
 
 @app.route('/api/admin/trigger-prediction-check', methods=['POST'])
@@ -1750,72 +1576,27 @@ def trigger_prediction_check():
     Admin endpoint to check and score top 3 predictions for a given round.
     Expects JSON: {"round": 1|2|3|4}
     """
-    import json
+    from score_module import score_all_predictions
     data = request.get_json()
     round_num = int(data.get('round', 1))
     if round_num not in [1, 2, 3, 4]:
         return jsonify({"error": "Invalid round number"}), 400
 
-    # Get current top 3 for each category (with stat value)
-    standings = get_current_standings()
-    # standings: {category: [player_obj, ...]}
-
-    # For each user, check predictions and award points
-    users = User.query.all()
-    for user in users:
-        prediction = Prediction.query.filter_by(user_id=user.id).first()
-        if not prediction:
-            continue
-        predictions_data = json.loads(prediction.predictions_json)
-        user_points = UserPoints.query.filter_by(user_id=user.id).first()
-        if not user_points:
-            user_points = UserPoints(user_id=user.id)
-            db.session.add(user_points)
-        round_points = 0
-        for category, curr_top3 in standings.items():
-            # Get user's picks for this category
-            user_picks = predictions_data.get(category, [])
-            # Only compare by player id
-            curr_top3_ids = set([p.id for p in curr_top3])
-            for pick in user_picks:
-                pick_id = pick.get('id') if isinstance(pick, dict) else None
-                if pick_id and pick_id in curr_top3_ids:
-                    round_points += 1
-        # Write to correct column
-        if round_num == 1:
-            user_points.predictions_r1_points = round_points
-        elif round_num == 2:
-            user_points.predictions_r2_points = round_points
-        elif round_num == 3:
-            user_points.predictions_r3_points = round_points
-        elif round_num == 4:
-            user_points.predictions_final_points = round_points
-        # Update total
-        user_points.predictions_total_points = (
-            (user_points.predictions_r1_points or 0) +
-            (user_points.predictions_r2_points or 0) +
-            (user_points.predictions_r3_points or 0) +
-            (user_points.predictions_final_points or 0)
-        )
-        user_points.update_total_points()
-    db.session.commit()
-    return jsonify({"status": "Prediction check complete for round", "round": round_num}), 200
+    result = score_all_predictions(round_num)
+    return jsonify({"status": "Prediction check complete for round", "round": round_num, **result}), 200
 
 @app.route('/api/admin/trigger-bracket-recount', methods=['POST'])
 def trigger_bracket_recount():
     """
     Admin endpoint to recalculate bracket points for all users.
     """
-    from score_module import calculate_bracket_points
-    users = User.query.all()
-    for user in users:
-        calculate_bracket_points(user.id)
-    db.session.commit()
-    return jsonify({"message": "Bracket points recounted for all users."}), 200
+    from score_module import score_all_brackets
+    counts = score_all_brackets()
+    return jsonify({"message": "Bracket points recounted for all users.", **counts}), 200
 
 if __name__ == '__main__':
-    app.run(debug=True)
     with app.app_context():
         db.create_all()
 
-    print(f"Server running on http://localhost:5000")
+    logger.info("Server running on http://localhost:5000")
+    app.run(debug=True)
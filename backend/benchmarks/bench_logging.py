@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import logging
+import random
+import tempfile
+import time
+
+from log_module import setup_logging
+from score_module import ROUND1_CODES, ROUND2_CODES, ROUND3_CODES, FINAL_CODES, score_bracket, score_pick, log_bracket_scoring, logger as score_logger
+
+MATCHUP_CODES = ROUND1_CODES + ROUND2_CODES + ROUND3_CODES + FINAL_CODES
+TEAMS = ["EDM", "LAK", "VGK", "DAL", "COL", "WPG", "MIN", "STL", "TOR", "OTT", "TBL", "FLA", "WSH", "MTL", "CAR", "NJD"]
+
+
+def synthetic_brackets(users, rng):
+    results = {code: (rng.choice(TEAMS), rng.randint(4, 7)) for code in MATCHUP_CODES}
+    brackets = [
+        {code: {"winner": rng.choice(TEAMS), "games": rng.randint(4, 7)} for code in MATCHUP_CODES}
+        for _ in range(users)
+    ]
+    return brackets, results
+
+
+def print_trace(user_id, user_predictions, results_by_code, values):
+    """The per-user table calculate_bracket_points used to print, the reference for the logging layer"""
+    print(f"Bracket scoring for user_id {user_id}:")
+    print("-" * 80)
+    print(f"{'Matchup':<10} {'Actual Winner':<15} {'Actual Games':<12} {'User Pick':<15} {'User Games':<10} {'Points'}")
+    print("-" * 80)
+    for matchup_code, prediction in user_predictions.items():
+        actual_winner, actual_games = results_by_code.get(matchup_code, ("N/A", "N/A"))
+        _, points = score_pick(matchup_code, prediction["winner"], prediction["games"], results_by_code.get(matchup_code))
+        print(f"{matchup_code:<10} {actual_winner:<15} {actual_games:<12} {prediction['winner']:<15} {prediction['games']:<10} {points}")
+    print("-" * 80)
+    print(f"Total bracket points: {values['bracket_total_points']}")
+    print(f"Updated UserPoints record for user_id {user_id}")
+    for column in ("bracket_round1_points", "bracket_round2_points", "bracket_round3_points", "bracket_final_points", "bracket_total_points"):
+        print(f"{column}: {values[column]}")
+
+
+def logged_trace(user_id, user_predictions, results_by_code, values):
+    """What calculate_bracket_points traces now"""
+    log_bracket_scoring(user_id, user_predictions, results_by_code)
+    score_logger.debug(
+        "Updated UserPoints of user_id %s: bracket points by round %s/%s/%s/%s, bracket total %s, total %s",
+        user_id, values["bracket_round1_points"], values["bracket_round2_points"], values["bracket_round3_points"],
+        values["bracket_final_points"], values["bracket_total_points"], values["bracket_total_points"]
+    )
+
+
+def run(brackets, results, trace):
+    start = time.perf_counter()
+    for user_id, bracket in enumerate(brackets, start=1):
+        values = score_bracket(bracket, results)
+        if trace:
+            trace(user_id, bracket, results, values)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per request tracing cost: old prints against leveled logging")
+    parser.add_argument("--users", type=int, default=20000, help="Brackets scored, one per simulated request")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    brackets, results = synthetic_brackets(args.users, random.Random(args.seed))
+    print(f"📊 Scoring {args.users} synthetic brackets with their per user trace written to a file")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {"no trace": run(brackets, results, None)}
+        with open(os.path.join(tmp, "print.log"), "w") as out, contextlib.redirect_stdout(out):
+            timings["print (old)"] = run(brackets, results, print_trace)
+        for name, level, sample_rate in [
+            ("logging DEBUG", "DEBUG", 1.0),
+            ("logging DEBUG 1% sampled", "DEBUG", 0.01),
+            ("logging INFO (production)", "INFO", 1.0),
+        ]:
+            with open(os.path.join(tmp, "log.json"), "w") as out:
+                setup_logging(level=level, fmt="json", module_levels={}, debug_sample_rate=sample_rate, stream=out)
+                timings[name] = run(brackets, results, logged_trace)
+                logging.getLogger().handlers[0].flush()
+
+    baseline = timings["no trace"]
+    for name, elapsed in timings.items():
+        overhead = (elapsed - baseline) / args.users * 1e6
+        print(f"{name:<27} {elapsed:.3f}s, {elapsed / args.users * 1e6:.1f} µs per request, tracing {overhead:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+from nhl_api import pricing_kernel
+from nhl_api.populate_table import MIN_PRICE, MAX_PRICE
+from nhl_api.update_prices import SKATER_PRICE_MIN, SKATER_PRICE_MAX
+
+
+def synthetic_skaters(count, rng):
+    return {
+        "gp": rng.integers(0, 83, count),
+        "goals": rng.integers(0, 60, count),
+        "assists": rng.integers(0, 80, count),
+        "plus_minus": rng.integers(-40, 41, count),
+        "position": rng.choice(list("LCRD"), count),
+        "price": rng.integers(MIN_PRICE, MAX_PRICE, count),
+    }
+
+
+def loop_initial_prices(data):
+    """calculate_prices as a per-player Python loop, the reference for the kernel"""
+    scores = []
+    for gp, goals, assists, plus_minus, position in zip(
+        data["gp"].tolist(), data["goals"].tolist(), data["assists"].tolist(), data["plus_minus"].tolist(), data["position"].tolist()
+    ):
+        if gp < 5:
+            scores.append(0)
+        elif position == "D":
+            scores.append((3 * goals + assists + plus_minus) / gp)
+        else:
+            scores.append((2 * goals + assists + plus_minus) / gp)
+    non_zero = [score for score in scores if score > 0]
+    min_score, score_range = min(non_zero), max(non_zero) - min(non_zero)
+    prices = []
+    for gp, score in zip(data["gp"].tolist(), scores):
+        price = round(int(MIN_PRICE + (score - min_score) / score_range * (MAX_PRICE - MIN_PRICE)), -3)
+        if gp < 5:
+            price = 250000
+        elif gp < 10:
+            price = int(price * 0.8)
+        elif gp < 20:
+            price = int(price * 0.85)
+        prices.append(max(MIN_PRICE, min(MAX_PRICE, price)))
+    return prices
+
+
+def kernel_initial_prices(data):
+    scores = pricing_kernel.skater_scores(
+        data["gp"], data["goals"], data["assists"], data["plus_minus"],
+        data["position"] == "D", data["position"] != "D",
+    )
+    prices, _ = pricing_kernel.scale_prices(scores, MIN_PRICE, MAX_PRICE)
+    return np.clip(pricing_kernel.apply_games_played_penalty(prices, data["gp"]), MIN_PRICE, MAX_PRICE)
+
+
+def synthetic_games(data, games, rng):
+    """`games` games for every skater, as flat per-game arrays ordered by step"""
+    count = len(data["gp"])
+    return {
+        "entity_index": np.tile(np.arange(count), games),
+        "step": np.repeat(np.arange(games), count),
+        "goals": rng.integers(0, 3, count * games),
+        "assists": rng.integers(0, 3, count * games),
+        "plus_minus": rng.integers(-3, 4, count * games),
+    }
+
+
+def loop_replay(data, games):
+    pct_by_perf = {-3: -0.05, -2: -0.03, -1: -0.01, 0: 0.0, 1: 0.012, 2: 0.027, 3: 0.035}
+    prices = data["price"].tolist()
+    is_defense = (data["position"] == "D").tolist()
+    for entity, goals, assists, plus_minus in zip(
+        games["entity_index"].tolist(), games["goals"].tolist(), games["assists"].tolist(), games["plus_minus"].tolist()
+    ):
+        perf = (3 if is_defense[entity] else 2) * goals + assists + plus_minus
+        pct = -0.05 if perf <= -3 else pct_by_perf.get(perf, 0.06)
+        prices[entity] = max(SKATER_PRICE_MIN, min(SKATER_PRICE_MAX, int(prices[entity] * (1 + pct))))
+    return prices
+
+
+def kernel_replay(data, games):
+    perf = pricing_kernel.skater_game_perf(
+        games["goals"], games["assists"], games["plus_minus"], (data["position"] == "D")[games["entity_index"]]
+    )
+    prices, _, _ = pricing_kernel.replay_price_changes(
+        data["price"], games["entity_index"], games["step"], pricing_kernel.skater_price_pct(perf),
+        np.zeros(len(perf), dtype=bool), SKATER_PRICE_MIN, SKATER_PRICE_MAX,
+    )
+    return prices
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized pricing kernel against per-player loops")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--games", type=int, default=10, help="Games per player for the price replay")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = synthetic_skaters(args.players, rng)
+    games = synthetic_games(data, args.games, rng)
+
+    print(f"📊 Pricing {args.players} synthetic players, replaying {args.games} games each")
+    loop_prices, loop_time = timed(loop_initial_prices, data)
+    kernel_prices, kernel_time = timed(kernel_initial_prices, data)
+    same = loop_prices == kernel_prices.tolist()
+    print(f"calculate_prices: loop {loop_time:.3f}s, kernel {kernel_time:.3f}s ({loop_time / kernel_time:.1f}x), identical: {same}")
+
+    loop_final, loop_time = timed(loop_replay, data, games)
+    kernel_final, kernel_time = timed(kernel_replay, data, games)
+    same_replay = loop_final == kernel_final.tolist()
+    print(f"price replay:     loop {loop_time:.3f}s, kernel {kernel_time:.3f}s ({loop_time / kernel_time:.1f}x), identical: {same_replay}")
+
+    if not (same and same_replay):
+        print("❌ Kernel results differ from the reference loops")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
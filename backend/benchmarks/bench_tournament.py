@@ -0,0 +1,145 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time the scoring routines and read endpoints on a synthetic tournament database")
+    parser.add_argument("--database-url", help="Database to fill, e.g. postgresql://localhost/bench (default: a temporary SQLite file)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables of --database-url first")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--game-logs", type=int, default=20000)
+    parser.add_argument("--players-per-team", type=int, default=40, help="Skaters per team, 16 teams")
+    parser.add_argument("--goalies-per-team", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--requests", type=int, default=50, help="Users sampled per run of the per-user endpoints")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    return parser.parse_args()
+
+
+def measure(fn, repeat):
+    """Run fn `repeat` times, the first run is reported separately because it fills the caches"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    warm = durations[1:] or durations
+    return {
+        "runs": len(durations),
+        "first_s": round(durations[0], 6),
+        "min_s": round(min(warm), 6),
+        "median_s": round(statistics.median(warm), 6),
+        "max_s": round(max(warm), 6),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(app, args):
+    from db import db_engine as db
+    from benchmarks.synthetic_data import generate_database
+    from score_module import score_all_brackets, score_all_lineups, score_all_predictions
+    from nhl_api.update_prices import update_prices_after_games
+    from models import User
+
+    results = {}
+    with app.app_context():
+        start = time.perf_counter()
+        counts = generate_database(
+            users=args.users, game_logs=args.game_logs, players_per_team=args.players_per_team,
+            goalies_per_team=args.goalies_per_team, seed=args.seed, reset=args.reset,
+        )
+        generate_s = time.perf_counter() - start
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+        sample = user_ids[::max(1, len(user_ids) // args.requests)][:args.requests]
+
+        # Write paths first, they create the UserPoints rows the read endpoints rank
+        results["daily_update"] = measure(lambda: (update_prices_after_games(), score_all_lineups()), 1)
+        results["bracket_recount"] = measure(score_all_brackets, args.repeat)
+        results["lineup_recount"] = measure(score_all_lineups, args.repeat)
+        results["prediction_check"] = measure(lambda: score_all_predictions(1), args.repeat)
+        db.session.remove()
+
+    client = app.test_client()
+
+    def get_all(path):
+        def run():
+            for user_id in sample:
+                response = client.get(path.format(user_id=user_id))
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path.format(user_id=user_id)} returned {response.status_code}")
+        return run
+
+    def get(path):
+        def run():
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        return run
+
+    results["leaderboard"] = measure(get("/api/leaderboard"), args.repeat)
+    results["leaderboard_page"] = measure(get("/api/leaderboard?limit=50"), args.repeat)
+    results["bracket_summary"] = measure(get_all("/api/bracket/summary?userId={user_id}"), args.repeat)
+    results["predictions_summary"] = measure(get_all("/api/predictions/summary?userId={user_id}"), args.repeat)
+    results["lineup_get"] = measure(get_all("/api/lineup/get?user_id={user_id}"), args.repeat)
+    for name in ("bracket_summary", "predictions_summary", "lineup_get"):
+        results[name]["requests_per_run"] = len(sample)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "generate_s": round(generate_s, 3),
+            **counts,
+        },
+        "results": results,
+    }
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Config reads these on import, so they are set before the app is imported
+        os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tmp, "bench.db")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        from app import app
+
+        report = run_benchmarks(app, args)
+        from db import db_engine as db
+        with app.app_context():
+            db.engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"📊 Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from db import db_engine as db
+from models import (
+    User, RegistrationCode, Team, Matchup, MatchupResult, Pick, LineupPick, Prediction, Player, Goalie, GameLog,
+)
+from score_module import ROUND1_CODES, ROUND2_CODES, ROUND3_CODES
+from stats_module import STANDINGS_CATEGORIES
+from lineup_module import SLOT_POSITIONS
+
+WEST_TEAMS = ["WPG", "STL", "DAL", "COL", "VGK", "MIN", "LAK", "EDM"]
+EAST_TEAMS = ["TOR", "OTT", "TBL", "FLA", "WSH", "MTL", "CAR", "NJD"]
+PLAYOFF_START = datetime(2025, 4, 19, 23, 0)
+REGISTRATION_CODE = "BENCHMARK"
+
+# Later rounds: matchup code -> the two codes whose winners meet there
+BRACKET_TREE = {
+    "w-semi": ("W1", "W2"), "w-semi2": ("W3", "W4"), "e-semi": ("E1", "E2"), "e-semi2": ("E3", "E4"),
+    "west-final": ("w-semi", "w-semi2"), "east-final": ("e-semi", "e-semi2"), "cup": ("west-final", "east-final"),
+}
+
+
+def play_bracket(rng):
+    """A full random bracket: matchup_code -> (winner, games) for every series"""
+    teams = WEST_TEAMS + EAST_TEAMS
+    results = {}
+    for idx, code in enumerate(ROUND1_CODES):
+        results[code] = (rng.choice(teams[idx * 2:idx * 2 + 2]), rng.randint(4, 7))
+    for code, (left, right) in BRACKET_TREE.items():
+        results[code] = (rng.choice([results[left][0], results[right][0]]), rng.randint(4, 7))
+    return results
+
+
+def picks_json(bracket):
+    """A bracket in the format the bracket page saves to Pick.picks_json"""
+    return json.dumps({
+        "round1": {code: bracket[code][0] for code in ROUND1_CODES},
+        "round1Games": {code: bracket[code][1] for code in ROUND1_CODES},
+        "round2": {f"{code}-winner": bracket[code][0] for code in ROUND2_CODES},
+        "round2Games": {code: bracket[code][1] for code in ROUND2_CODES},
+        "round3": {f"{code}-winner": bracket[code][0] for code in ROUND3_CODES},
+        "round3Games": {code: bracket[code][1] for code in ROUND3_CODES},
+        "final": {"cup-winner": bracket["cup"][0]},
+        "finalGames": {"cup": bracket["cup"][1]},
+    })
+
+
+def entity_rows(rng, players_per_team, goalies_per_team):
+    players, goalies = [], []
+    api_id = 8470000
+    for team in WEST_TEAMS + EAST_TEAMS:
+        for idx in range(players_per_team):
+            api_id += 1
+            goals, assists = rng.randint(0, 50), rng.randint(0, 70)
+            players.append({
+                "api_id": api_id, "first_name": f"Skater{api_id}", "last_name": team, "team_abbr": team,
+                "position": "LCRDD"[idx % 5], "birth_country": rng.choice(["CAN", "USA", "SWE", "FIN", "CZE"]),
+                "birth_year": rng.randint(1988, 2006), "is_U23": rng.random() < 0.2,
+                "price": rng.randint(100, 500) * 1000, "initial_price": rng.randint(100, 500) * 1000,
+                "reg_gp": rng.randint(0, 82), "reg_goals": goals, "reg_assists": assists, "reg_points": goals + assists,
+                "reg_plus_minus": rng.randint(-30, 30), "reg_penalty_minutes": rng.randint(0, 120),
+                "playoff_goals": rng.randint(0, 12), "playoff_assists": rng.randint(0, 15), "playoff_points": rng.randint(0, 25),
+                "playoff_plus_minus": rng.randint(-8, 8), "playoff_penalty_minutes": rng.randint(0, 40),
+            })
+        for idx in range(goalies_per_team):
+            api_id += 1
+            goalies.append({
+                "api_id": api_id, "first_name": f"Goalie{api_id}", "last_name": team, "team_abbr": team, "position": "G",
+                "birth_country": rng.choice(["CAN", "USA", "FIN", "RUS"]), "birth_year": rng.randint(1988, 2004),
+                "is_U23": False, "price": rng.randint(150, 450) * 1000, "initial_price": rng.randint(150, 450) * 1000,
+                "reg_gp": rng.randint(0, 65), "reg_gaa": round(rng.uniform(2, 3.5), 2), "reg_save_pct": round(rng.uniform(0.88, 0.93), 3),
+                "reg_shutouts": rng.randint(0, 8), "reg_wins": rng.randint(0, 45), "playoff_gp": rng.randint(0, 20),
+                "playoff_wins": rng.randint(0, 16), "playoff_shutouts": rng.randint(0, 3),
+            })
+    return players, goalies
+
+
+def game_log_rows(rng, players, goalies, count):
+    """About `count` game log rows: games between random teams, every player of both teams in each game"""
+    by_team = {}
+    for row in players:
+        by_team.setdefault(row["team_abbr"], []).append((row, False))
+    for row in goalies:
+        by_team.setdefault(row["team_abbr"], []).append((row, True))
+    teams = list(by_team)
+    rows = []
+    game = 0
+    while len(rows) < count:
+        game += 1
+        home, away = rng.sample(teams, 2)
+        start = PLAYOFF_START + timedelta(hours=8 * game)
+        for team, opponent in ((home, away), (away, home)):
+            team_goalies = [row for row, is_goalie in by_team[team] if is_goalie]
+            starter = rng.choice(team_goalies)["id"] if team_goalies else None
+            for row, is_goalie in by_team[team]:
+                if is_goalie and row["id"] != starter:
+                    continue
+                goals, assists = (0, 0) if is_goalie else (rng.choice([0, 0, 0, 1, 1, 2]), rng.choice([0, 0, 1, 1, 2]))
+                shots = rng.randint(20, 40)
+                goals_against = rng.randint(0, 5)
+                rows.append({
+                    "player_id": row["id"], "api_id": row["api_id"], "is_goalie": is_goalie, "game_id": f"2024030{game:03d}",
+                    "game_date": start.replace(hour=0), "team": team, "opponent": opponent, "home": team == home,
+                    "player_name": f"{row['first_name']} {row['last_name']}", "goals": goals, "assists": assists,
+                    "points": goals + assists, "plus_minus": 0 if is_goalie else rng.randint(-2, 2),
+                    "wins": int(is_goalie and rng.random() < 0.5), "shutouts": int(is_goalie and goals_against == 0),
+                    "saves": shots - goals_against if is_goalie else 0, "shots": shots if is_goalie else 0,
+                    "goals_against": goals_against if is_goalie else 0, "start_time_utc": start,
+                })
+    return rows[:count]
+
+
+def lineup_json(rng, players_by_position, goalies):
+    lineup = {}
+    for slot, position in SLOT_POSITIONS.items():
+        pool = goalies if slot == "G" else players_by_position[position]
+        choice = rng.choice(pool)
+        while slot == "RD" and choice == lineup.get("LD"):
+            choice = rng.choice(pool)
+        lineup[slot] = choice
+    return json.dumps(lineup)
+
+
+def predictions_json(rng, players, goalies):
+    picks = {}
+    for category, model, _, _ in STANDINGS_CATEGORIES:
+        pool = goalies if model is Goalie else players
+        picks[category] = [{"id": row["id"], "firstName": row["first_name"], "lastName": row["last_name"]} for row in rng.sample(pool, 3)]
+    return json.dumps(picks)
+
+
+def generate_database(users=2000, game_logs=20000, players_per_team=40, goalies_per_team=4, seed=1, reset=False):
+    """
+    Fill the configured database with a synthetic tournament: 16 teams, their skaters and
+    goalies, round 1 matchups, a full set of results, game logs and `users` users who each
+    have a bracket, a lineup and predictions. Call inside an app context.
+
+    Args:
+        reset (bool): Drop and recreate all tables first. Without it the database must not have users yet.
+
+    Returns:
+        dict: Row counts per table
+    """
+    rng = random.Random(seed)
+    if reset:
+        db.drop_all()
+    db.create_all()
+    if db.session.execute(select(func.count(User.id))).scalar():
+        raise RuntimeError("The benchmark database already has users, pass reset=True (--reset) to recreate it")
+
+    db.session.add(RegistrationCode(code=REGISTRATION_CODE, is_reusable=True))
+    db.session.execute(insert(Team), [{"name": abbr, "abbr": abbr} for abbr in WEST_TEAMS + EAST_TEAMS])
+
+    teams = WEST_TEAMS + EAST_TEAMS
+    db.session.execute(insert(Matchup), [
+        {"round": 1, "conference": "west" if code.startswith("W") else "east", "matchup_code": code,
+         "team1": teams[idx * 2], "team2": teams[idx * 2 + 1]}
+        for idx, code in enumerate(ROUND1_CODES)
+    ])
+    db.session.execute(insert(MatchupResult), [
+        {"matchup_code": code, "winner": winner, "games": games} for code, (winner, games) in play_bracket(rng).items()
+    ])
+
+    players, goalies = entity_rows(rng, players_per_team, goalies_per_team)
+    db.session.execute(insert(Player), players)
+    db.session.execute(insert(Goalie), goalies)
+    for model, rows in ((Player, players), (Goalie, goalies)):
+        ids = dict(db.session.execute(select(model.api_id, model.id)).all())
+        for row in rows:
+            row["id"] = ids[row["api_id"]]
+
+    logs = game_log_rows(rng, players, goalies, game_logs)
+    for start in range(0, len(logs), 5000):
+        db.session.execute(insert(GameLog), logs[start:start + 5000])
+
+    db.session.execute(insert(User), [
+        {"username": f"bench{idx}", "team_name": f"Bench Team {idx}", "password_hash": "x", "registration_code": REGISTRATION_CODE}
+        for idx in range(users)
+    ])
+    user_ids = [user_id for (user_id,) in db.session.execute(select(User.id).order_by(User.id))]
+    players_by_position = {}
+    for row in players:
+        players_by_position.setdefault(row["position"], []).append(row["id"])
+    goalie_ids = [row["id"] for row in goalies]
+    created = PLAYOFF_START - timedelta(days=2)
+    db.session.execute(insert(Pick), [{"user_id": user_id, "picks_json": picks_json(play_bracket(rng)), "created_at": created} for user_id in user_ids])
+    db.session.execute(insert(LineupPick), [
+        {"user_id": user_id, "lineup_json": lineup_json(rng, players_by_position, goalie_ids), "unused_budget": 0, "total_value": 0, "created_at": created}
+        for user_id in user_ids
+    ])
+    db.session.execute(insert(Prediction), [
+        {"user_id": user_id, "predictions_json": predictions_json(rng, players, goalies), "created_at": created} for user_id in user_ids
+    ])
+    db.session.commit()
+    return {
+        "users": len(user_ids), "players": len(players), "goalies": len(goalies),
+        "game_logs": len(logs), "matchup_results": len(BRACKET_TREE) + len(ROUND1_CODES),
+    }
@@ -0,0 +1,204 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+
+from version_module import VersionedCache
+from log_module import get_logger
+
+try:
+    import redis
+except ImportError:  # Redis is optional, the in-process backend needs nothing
+    redis = None
+
+logger = get_logger(__name__)
+
+
+class MemoryBackend:
+    """In-process LRU cache with a TTL per entry, shared by the threads of one worker"""
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def size(self):
+        return len(self.entries)
+
+
+class RedisBackend:
+    """Redis (or any Redis-compatible server) shared by all workers, entries expire through SETEX"""
+
+    name = "redis"
+
+    def __init__(self, url, prefix="response-cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, ttl, pickle.dumps(value))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + "*"))
+
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ("X-Total-Count", "X-Next-Cursor")
+
+
+class ResponseCache:
+    """
+    Caches successful responses of read endpoints by route and query arguments.
+
+    Every cached route names the data version keys (see version_module) its data
+    depends on. The current versions are part of the cache key, so a write to any
+    of the models behind a key makes the old entries unreachable right away, the
+    TTL only bounds how long they take up space.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.default_ttl = 300
+        self.versions = {}
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", 300)
+        if app.config.get("CACHE_BACKEND", "memory") == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"])
+        else:
+            self.backend = MemoryBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        app.extensions["response_cache"] = self
+
+    def version_of(self, key):
+        if key not in self.versions:
+            self.versions[key] = VersionedCache(key, lambda: True)
+        return self.versions[key].get()[0]
+
+    def count(self, endpoint, outcome):
+        with self.stats_lock:
+            counters = self.stats.setdefault(endpoint, {"hits": 0, "misses": 0, "not_modified": 0, "errors": 0})
+            counters[outcome] += 1
+
+    def cache_key(self, versions):
+        args = "&".join(f"{name}={value}" for name, value in sorted(request.args.items(multi=True)))
+        return f"{request.path}?{args}|" + ",".join(f"{key}={version}" for key, version in versions.items())
+
+    def cached(self, *version_keys, ttl=None, etag=None):
+        """
+        Decorator for GET views, placed below @app.route.
+
+        Args:
+            version_keys (str): Data version keys the response depends on
+            ttl (int): Seconds to keep a response, CACHE_DEFAULT_TTL by default
+            etag (str): If given, responses get an ETag built from this prefix and the
+                        data versions, and a matching If-None-Match is answered with
+                        304 before the cache or the view is touched
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or request.method != "GET":
+                    return view(*args, **kwargs)
+                endpoint = request.endpoint
+                versions = {key: self.version_of(key) for key in version_keys}
+                tag = f"{etag}-" + "-".join(str(version) for version in versions.values()) if etag else None
+                if tag and tag in request.if_none_match:
+                    self.count(endpoint, "not_modified")
+                    return self.tagged(current_app.response_class(status=304), tag)
+
+                key = self.cache_key(versions)
+                try:
+                    entry = self.backend.get(key)
+                except Exception as e:
+                    logger.warning("Response cache read failed: %s", e)
+                    self.count(endpoint, "errors")
+                    entry = None
+                if entry is not None:
+                    self.count(endpoint, "hits")
+                    body, status, mimetype, headers = entry
+                    return self.tagged(current_app.response_class(body, status=status, mimetype=mimetype, headers=headers), tag)
+
+                self.count(endpoint, "misses")
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    try:
+                        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                        entry = (response.get_data(), response.status_code, response.mimetype, headers)
+                        self.backend.set(key, entry, ttl or self.default_ttl)
+                    except Exception as e:
+                        logger.warning("Response cache write failed: %s", e)
+                        self.count(endpoint, "errors")
+                    return self.tagged(response, tag)
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def tagged(response, tag):
+        """Clients keep the body but revalidate every time, a matching ETag costs them a 304"""
+        if tag:
+            response.set_etag(tag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self):
+        with self.stats_lock:
+            endpoints = {endpoint: dict(counters) for endpoint, counters in self.stats.items()}
+        hits = sum(counters["hits"] for counters in endpoints.values())
+        misses = sum(counters["misses"] for counters in endpoints.values())
+        not_modified = sum(counters["not_modified"] for counters in endpoints.values())
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "entries": self.backend.size() if self.backend else 0,
+            "hits": hits,
+            "misses": misses,
+            "notModified": not_modified,
+            "hitRate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "endpoints": endpoints,
+        }
+
+
+response_cache = ResponseCache()
@@ -17,3 +17,14 @@ class Config:
     
     SQLALCHEMY_DATABASE_URI = database_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Response cache for read endpoints: "memory" (per worker LRU) or "redis"
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+
+    # Opt-in SQL profiler: query counts and DB time per request, Server-Timing headers, slow request log
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILER_SLOW_MS = float(os.environ.get("PROFILER_SLOW_MS", 500))
+    PROFILER_TOP_STATEMENTS = int(os.environ.get("PROFILER_TOP_STATEMENTS", 5))
@@ -0,0 +1,198 @@
+import sqlite3
+from bisect import bisect_right
+
+from sqlalchemy import func, select
+from models import User, UserPoints
+from db import db_engine as db
+from score_module import BRACKET_COLUMNS
+from version_module import POINTS_VERSION_KEY, VersionedCache
+
+DEFAULT_AROUND_RADIUS = 5
+
+
+def leaderboard_columns():
+    """Per-user leaderboard values, computed from the users LEFT JOIN user_points row"""
+    bracket_points = func.coalesce(UserPoints.bracket_total_points, 0)
+    lineup_points = func.coalesce(UserPoints.lineup_total_points, 0)
+    predictions_points = func.coalesce(UserPoints.predictions_total_points, 0)
+    correct_series = (
+        func.coalesce(UserPoints.bracket_round1_correct, 0)
+        + func.coalesce(UserPoints.bracket_round2_correct, 0)
+        + func.coalesce(UserPoints.bracket_round3_correct, 0)
+        + func.coalesce(UserPoints.bracket_final_correct, 0)
+    )
+    return [
+        User.id.label("id"),
+        User.username.label("username"),
+        User.team_name.label("team_name"),
+        User.selected_logo_url.label("logo_url"),
+        (bracket_points + lineup_points + predictions_points).label("total_points"),
+        bracket_points.label("bracket_points"),
+        lineup_points.label("lineup_points"),
+        predictions_points.label("predictions_points"),
+        correct_series.label("correct_series"),
+    ]
+
+
+def supports_window_functions():
+    """SQLite only has RANK() OVER from 3.25, every other supported database has it"""
+    if db.session.get_bind().dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 25, 0)
+    return True
+
+
+def serialize_row(row, rank):
+    return {
+        "id": row.id,
+        "username": row.username,
+        "teamName": row.team_name,
+        "logoUrl": row.logo_url,
+        "totalPoints": row.total_points,
+        "bracketPoints": row.bracket_points,
+        "lineupPoints": row.lineup_points,
+        "predictionsPoints": row.predictions_points,
+        "rank": rank,
+    }
+
+
+def leaderboard_base():
+    """users LEFT JOIN user_points as a subquery, users without points score zero"""
+    return select(*leaderboard_columns()).select_from(User).outerjoin(UserPoints, UserPoints.user_id == User.id).subquery()
+
+
+def ranked_cte():
+    """
+    Every user with their competition rank (ties share a rank, the next rank is skipped)
+    and a unique position that breaks ties by user id.
+    """
+    base = leaderboard_base()
+    order = (base.c.total_points.desc(), base.c.correct_series.desc())
+    return select(
+        base,
+        func.rank().over(order_by=order).label("rank"),
+        func.row_number().over(order_by=order + (base.c.id.asc(),)).label("position"),
+    ).cte("ranked")
+
+
+def python_ranked_rows():
+    """Fallback for databases without window functions: the same ordering, ranked in Python"""
+    base = leaderboard_base()
+    rows = db.session.execute(
+        select(base).order_by(base.c.total_points.desc(), base.c.correct_series.desc(), base.c.id.asc())
+    ).all()
+    ranked = []
+    last_key = None
+    last_rank = 0
+    for idx, row in enumerate(rows):
+        key = (row.total_points, row.correct_series)
+        if key != last_key:
+            last_rank = idx + 1
+            last_key = key
+        ranked.append(serialize_row(row, last_rank))
+    return ranked
+
+
+def ranked_rows():
+    """
+    Every user ranked by total points, then correct series, in leaderboard order.
+
+    Returns:
+        list: Leaderboard entry dicts in API format
+    """
+    if not supports_window_functions():
+        return python_ranked_rows()
+    ranked = ranked_cte()
+    return [serialize_row(row, row.rank) for row in db.session.execute(select(ranked).order_by(ranked.c.position))]
+
+
+def load_bracket_stats():
+    """
+    Average and best value of every bracket column over all UserPoints rows, in one aggregate query.
+
+    Returns:
+        dict: column -> {"avg": float, "best": int}, plus "total_correct" and "total_points"
+    """
+    table = UserPoints.__table__
+    correct_columns = [table.c[column] for column in BRACKET_COLUMNS if column.endswith("_correct")]
+    points_columns = [table.c[column] for column in BRACKET_COLUMNS if column.endswith("_points")]
+    totals = {
+        "total_correct": sum(func.coalesce(column, 0) for column in correct_columns),
+        "total_points": sum(func.coalesce(column, 0) for column in points_columns),
+    }
+    # NULL columns are skipped by AVG/MAX, matching the per-round values of users never scored for a round
+    expressions = {column: table.c[column] for column in BRACKET_COLUMNS}
+    expressions.update(totals)
+    aggregates = []
+    for expression in expressions.values():
+        aggregates += [func.avg(expression), func.max(expression)]
+    row = db.session.execute(select(*aggregates)).one()
+    return {
+        name: {"avg": float(row[2 * idx] or 0), "best": row[2 * idx + 1] or 0}
+        for idx, name in enumerate(expressions)
+    }
+
+
+def load_distinct_totals():
+    """Distinct UserPoints.total_points values in ascending order"""
+    column = UserPoints.__table__.c.total_points
+    return [total for (total,) in db.session.execute(
+        select(column).where(column.is_not(None)).distinct().order_by(column)
+    )]
+
+
+def count_points_rank(total_points):
+    """Dense rank of a total straight from the database: 1 + number of distinct higher totals"""
+    column = UserPoints.__table__.c.total_points
+    higher = db.session.execute(select(func.count(func.distinct(column))).where(column > total_points)).scalar()
+    return (higher or 0) + 1
+
+
+class LeaderboardSnapshot:
+    """The full ranked leaderboard, bracket averages and distinct point totals for one points version"""
+
+    def __init__(self, rows, bracket_stats, distinct_totals):
+        self.rows = rows
+        self.position_by_user = {row["id"]: idx for idx, row in enumerate(rows)}
+        self.bracket_stats = bracket_stats
+        self.distinct_totals = distinct_totals
+        self.known_totals = set(distinct_totals)
+
+    def points_rank(self, total_points):
+        """
+        Dense rank of a total (users with equal totals share a rank) in O(log n).
+
+        Returns None for a missing total. Totals the snapshot has not seen yet,
+        e.g. points written by another worker since the last version check,
+        are ranked by the database instead.
+        """
+        if total_points is None:
+            return None
+        if total_points not in self.known_totals:
+            return count_points_rank(total_points)
+        return len(self.distinct_totals) - bisect_right(self.distinct_totals, total_points) + 1
+
+    def page(self, limit=None, offset=0):
+        return self.rows[offset:offset + limit if limit is not None else None]
+
+    def around(self, user_id, radius=DEFAULT_AROUND_RADIUS):
+        position = self.position_by_user.get(user_id)
+        if position is None:
+            return []
+        return self.rows[max(0, position - radius):position + radius + 1]
+
+
+def build_snapshot():
+    return LeaderboardSnapshot(ranked_rows(), load_bracket_stats(), load_distinct_totals())
+
+
+leaderboard_cache = VersionedCache(POINTS_VERSION_KEY, build_snapshot)
+
+
+def get_leaderboard_snapshot():
+    """
+    Return the in-memory leaderboard snapshot, rebuilt only when the points version changed.
+
+    Returns:
+        tuple: (points version, LeaderboardSnapshot)
+    """
+    return leaderboard_cache.get()
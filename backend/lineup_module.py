@@ -0,0 +1,125 @@
+import json
+
+from sqlalchemy import select
+from models import Player, Goalie
+from db import db_engine as db
+from log_module import get_logger
+
+logger = get_logger(__name__)
+
+LINEUP_BUDGET = 2000000
+
+# Lineup slot -> position its player must have, G is filled from the goalies table
+SLOT_POSITIONS = {"L": "L", "C": "C", "R": "R", "LD": "D", "RD": "D", "G": "G"}
+
+
+def parse_slots(lineup, strict=True):
+    """
+    Return {slot: id} for the filled slots of a lineup dict.
+
+    Raises:
+        ValueError: In strict mode, for unknown slots, ids that are not integers
+                    or the same player in two slots
+    """
+    if not isinstance(lineup, dict):
+        if strict:
+            raise ValueError("Lineup must be an object of slot: player id")
+        return {}
+    slots = {}
+    for slot, entity_id in lineup.items():
+        if not entity_id:
+            continue
+        if slot not in SLOT_POSITIONS:
+            if strict:
+                raise ValueError(f"Unknown lineup slot {slot}")
+            continue
+        try:
+            slots[slot] = int(entity_id)
+        except (TypeError, ValueError):
+            if strict:
+                raise ValueError(f"Invalid player id for slot {slot}")
+    skater_ids = [entity_id for slot, entity_id in slots.items() if slot != "G"]
+    if strict and len(skater_ids) != len(set(skater_ids)):
+        raise ValueError("The same player is in more than one slot")
+    return slots
+
+
+def load_lineup_entities(*slot_maps):
+    """
+    Price and position of every player and goalie in the given slot maps, one IN query per table.
+
+    Returns:
+        tuple: ({player id: row}, {goalie id: row}) with id, position and price
+    """
+    player_ids = {entity_id for slots in slot_maps for slot, entity_id in slots.items() if slot != "G"}
+    goalie_ids = {entity_id for slots in slot_maps for slot, entity_id in slots.items() if slot == "G"}
+    players, goalies = {}, {}
+    if player_ids:
+        players = {row.id: row for row in db.session.execute(
+            select(Player.id, Player.position, Player.price).where(Player.id.in_(player_ids))
+        )}
+    if goalie_ids:
+        goalies = {row.id: row for row in db.session.execute(
+            select(Goalie.id, Goalie.position, Goalie.price).where(Goalie.id.in_(goalie_ids))
+        )}
+    return players, goalies
+
+
+def lineup_total(slots, players, goalies):
+    """Sum of current prices, players no longer in the database count as 0"""
+    total = 0
+    for slot, entity_id in slots.items():
+        entity = (goalies if slot == "G" else players).get(entity_id)
+        if entity:
+            total += entity.price or 0
+    return total
+
+
+def price_lineup(lineup):
+    """Current value of a stored lineup"""
+    slots = parse_slots(lineup, strict=False)
+    return lineup_total(slots, *load_lineup_entities(slots))
+
+
+def validate_lineup_save(lineup, existing=None):
+    """
+    Check a lineup about to be saved and return its value, resolving the new and the
+    currently saved players with one IN query per table.
+
+    Every player must exist and match the position of its slot. The lineup has to fit in
+    LINEUP_BUDGET, or in the effective budget of the saved lineup (its value at current
+    prices plus the unused budget) when prices have grown since it was saved.
+
+    Args:
+        lineup (dict): {slot: player id} from the request
+        existing (LineupPick): The user's saved lineup, if any
+
+    Returns:
+        tuple: (total value at current prices, budget left unused)
+
+    Raises:
+        ValueError: With a message for the 400 response
+    """
+    slots = parse_slots(lineup)
+    saved_slots = {}
+    if existing:
+        try:
+            saved_slots = parse_slots(json.loads(existing.lineup_json), strict=False)
+        except json.JSONDecodeError:
+            logger.warning("Invalid lineup JSON for user_id %s", existing.user_id)
+    players, goalies = load_lineup_entities(slots, saved_slots)
+
+    for slot, entity_id in slots.items():
+        entity = (goalies if slot == "G" else players).get(entity_id)
+        if not entity:
+            raise ValueError(f"Unknown player {entity_id} in slot {slot}")
+        if slot != "G" and entity.position != SLOT_POSITIONS[slot]:
+            raise ValueError(f"Slot {slot} needs a player with position {SLOT_POSITIONS[slot]}, not {entity.position}")
+
+    budget = LINEUP_BUDGET
+    if existing:
+        budget = max(budget, lineup_total(saved_slots, players, goalies) + (existing.unused_budget or 0))
+    total_value = lineup_total(slots, players, goalies)
+    if total_value > budget:
+        raise ValueError(f"Lineup costs {total_value}, which is over the budget of {budget}")
+    return total_value, budget - total_value
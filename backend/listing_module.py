@@ -0,0 +1,205 @@
+import base64
+import json
+
+from sqlalchemy import and_, literal, or_, select
+from models import Player, Goalie
+from db import db_engine as db
+
+MAX_LIMIT = 1000
+
+# API field name -> column, in the order the full listing has always returned them
+PLAYER_FIELDS = {
+    'id': Player.id,
+    'api_id': Player.api_id,
+    'first_name': Player.first_name,
+    'last_name': Player.last_name,
+    'team_abbr': Player.team_abbr,
+    'position': Player.position,
+    'jersey_number': Player.jersey_number,
+    'birth_country': Player.birth_country,
+    'birth_year': Player.birth_year,
+    'headshot': Player.headshot,
+    'is_U23': Player.is_U23,
+    'price': Player.price,
+    'reg_gp': Player.reg_gp,
+    'reg_goals': Player.reg_goals,
+    'reg_assists': Player.reg_assists,
+    'reg_points': Player.reg_points,
+    'reg_plus_minus': Player.reg_plus_minus,
+    'playoff_goals': Player.playoff_goals,
+    'playoff_assists': Player.playoff_assists,
+    'playoff_points': Player.playoff_points,
+    'playoff_plus_minus': Player.playoff_plus_minus,
+}
+
+GOALIE_FIELDS = {
+    'id': Goalie.id,
+    'api_id': Goalie.api_id,
+    'first_name': Goalie.first_name,
+    'last_name': Goalie.last_name,
+    'team_abbr': Goalie.team_abbr,
+    'position': Goalie.position,
+    'jersey_number': Goalie.jersey_number,
+    'birth_country': Goalie.birth_country,
+    'birth_year': Goalie.birth_year,
+    'headshot': Goalie.headshot,
+    'is_U23': Goalie.is_U23,
+    'price': Goalie.price,
+    'reg_gp': Goalie.reg_gp,
+    'reg_gaa': Goalie.reg_gaa,
+    'reg_save_pct': Goalie.reg_save_pct,
+    'reg_shutouts': Goalie.reg_shutouts,
+    'reg_wins': Goalie.reg_wins,
+    'playoff_gp': Goalie.playoff_gp,
+    'playoff_gaa': Goalie.playoff_gaa,
+    'playoff_save_pct': Goalie.playoff_save_pct,
+    'playoff_shutouts': Goalie.playoff_shutouts,
+    'playoff_wins': Goalie.playoff_wins,
+}
+
+
+def ensure_listing_indexes():
+    """Create the team/position/price listing indexes on databases created before they were added to the models"""
+    for model in (Player, Goalie):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
+def encode_cursor(value, entity_id):
+    return base64.urlsafe_b64encode(json.dumps([value, entity_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, entity_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(entity_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_non_negative_int(args, name):
+    """An optional integer query parameter, ValueError unless it is a whole number >= 0"""
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+    return number
+
+
+def parse_listing_args(args, fields):
+    """
+    Validate the listing query parameters.
+
+    Args:
+        args: request.args
+        fields (dict): PLAYER_FIELDS or GOALIE_FIELDS
+
+    Returns:
+        dict: fields, teams, positions, u23, max_price, sort, descending, limit, cursor
+
+    Raises:
+        ValueError: With a message for the 400 response
+    """
+    selected = split_list(args.get("fields")) or list(fields)
+    unknown = [name for name in selected if name not in fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The id is always returned, cursors and clients need it
+    selected = ["id"] + [name for name in selected if name != "id"]
+
+    u23 = args.get("u23")
+    if u23 is not None:
+        if u23.lower() not in ("true", "false", "1", "0"):
+            raise ValueError("u23 must be true or false")
+        u23 = u23.lower() in ("true", "1")
+
+    sort = args.get("sort", "id")
+    descending = sort.startswith("-")
+    sort = sort[1:] if descending else sort
+    if sort not in fields:
+        raise ValueError(f"Cannot sort by {sort}")
+
+    max_price = parse_non_negative_int(args, "max_price")
+    limit = parse_non_negative_int(args, "limit")
+    if limit is not None and not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    cursor = args.get("cursor")
+
+    return {
+        "fields": selected,
+        "teams": split_list(args.get("team")),
+        "positions": split_list(args.get("position")),
+        "u23": u23,
+        "max_price": max_price,
+        "sort": sort,
+        "descending": descending,
+        "limit": limit,
+        "cursor": decode_cursor(cursor) if cursor else None,
+    }
+
+
+def keyset_condition(column, id_column, cursor, descending):
+    """
+    Rows after the cursor in ORDER BY column IS NULL, column [DESC], id.
+    NULLs sort last in both directions so no row is skipped.
+    """
+    value, last_id = cursor
+    if value is None:
+        return and_(column.is_(None), id_column > last_id)
+    value = literal(value, column.type)
+    beyond = column < value if descending else column > value
+    return or_(beyond, and_(column == value, id_column > last_id), column.is_(None))
+
+
+def list_entities(model, fields, params):
+    """
+    Run a listing query in SQL: filters, projection, sorting and keyset pagination.
+
+    Returns:
+        tuple: (list of row dicts with the selected fields, cursor of the next page or None)
+    """
+    sort_column = fields[params["sort"]]
+    columns = [fields[name] for name in params["fields"]]
+    if params["sort"] in params["fields"]:
+        sort_index = params["fields"].index(params["sort"])
+    else:
+        sort_index = len(columns)
+        columns.append(sort_column)
+    query = select(*columns)
+
+    if params["teams"]:
+        query = query.where(model.team_abbr.in_(params["teams"]))
+    if params["positions"]:
+        query = query.where(model.position.in_(params["positions"]))
+    if params["u23"]:
+        query = query.where(model.is_U23 == True)  # noqa: E712
+    elif params["u23"] is False:
+        query = query.where(or_(model.is_U23 == False, model.is_U23.is_(None)))  # noqa: E712
+    if params["max_price"] is not None:
+        query = query.where(model.price <= params["max_price"])
+    if params["cursor"]:
+        query = query.where(keyset_condition(sort_column, model.id, params["cursor"], params["descending"]))
+
+    query = query.order_by(
+        sort_column.is_(None),
+        sort_column.desc() if params["descending"] else sort_column.asc(),
+        model.id.asc(),
+    )
+    if params["limit"]:
+        query = query.limit(params["limit"] + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if params["limit"] and len(rows) > params["limit"]:
+        rows = rows[:params["limit"]]
+        next_cursor = encode_cursor(rows[-1][sort_index], rows[-1][0])
+    return [{name: row[idx] for idx, name in enumerate(params["fields"])} for row in rows], next_cursor
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has, anything else on a record came in through `extra=`
+RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+# Pass as `extra` for records already sampled by debug_sampled, the handler lets them through
+SAMPLED = {"_sampled": True}
+
+_configured = False
+_debug_sample_rate = 1.0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, the `extra` fields and the exception if any"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Let through only `rate` of the DEBUG records, INFO and above always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1 or getattr(record, "_sampled", False):
+            return True
+        return random.random() < self.rate
+
+
+def parse_module_levels(value):
+    """'score_module=DEBUG,nhl_api=WARNING' -> {'score_module': 'DEBUG', 'nhl_api': 'WARNING'}"""
+    levels = {}
+    for item in (value or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level=None, fmt=None, module_levels=None, debug_sample_rate=None, stream=None):
+    """
+    Configure the root logger once per process. Arguments default to the environment:
+
+    LOG_LEVEL (INFO), LOG_FORMAT (json or text), LOG_LEVELS (per logger levels,
+    e.g. "score_module=DEBUG,nhl_api=WARNING") and LOG_DEBUG_SAMPLE_RATE (0-1, the
+    share of DEBUG records written).
+
+    Debug tracing in the modules is written with lazy %-arguments or behind
+    logger.isEnabledFor, so below the configured level it costs one level check.
+    """
+    global _configured, _debug_sample_rate
+    if _configured and stream is None:
+        return
+    level = level or os.environ.get("LOG_LEVEL", "INFO")
+    fmt = fmt or os.environ.get("LOG_FORMAT", "json")
+    module_levels = module_levels if module_levels is not None else parse_module_levels(os.environ.get("LOG_LEVELS"))
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 1))
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    _debug_sample_rate = debug_sample_rate
+    _configured = True
+
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+
+def debug_sampled(logger):
+    """
+    For debug traces that are expensive to build: True when DEBUG is enabled for logger
+    and the call falls in the LOG_DEBUG_SAMPLE_RATE sample. Log the trace with extra=SAMPLED.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    return _debug_sample_rate >= 1 or random.random() < _debug_sample_rate
@@ -0,0 +1,42 @@
+"""add bracket_scored to user_points
+
+Revision ID: 19e5b7ac8d5e
+Revises:
+Create Date: 2026-10-17 03:10:06.743180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '19e5b7ac8d5e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def user_points_columns():
+    """Column names of user_points, None when the table does not exist yet"""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('user_points'):
+        return None
+    return {column['name'] for column in inspector.get_columns('user_points')}
+
+
+def upgrade():
+    # The schema was built with db.create_all before migrations were added: a fresh database
+    # gets the table with the column from create_all, an existing one only misses the column.
+    # Existing rows start unmarked, rescore_matchups recounts them in full the first time.
+    columns = user_points_columns()
+    if columns is None or 'bracket_scored' in columns:
+        return
+    op.add_column('user_points', sa.Column('bracket_scored', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    columns = user_points_columns()
+    if columns is None or 'bracket_scored' not in columns:
+        return
+    with op.batch_alter_table('user_points') as batch_op:
+        batch_op.drop_column('bracket_scored')
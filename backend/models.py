@@ -121,6 +121,27 @@ class Pick(db.Model):
     user = db.relationship('User', back_populates="picks")
 
 
+class BracketPickItem(db.Model):
+    """
+    One row per matchup pick, derived from Pick.picks_json whenever picks are saved.
+    Lets scoring and pick statistics run as indexed SQL aggregates.
+    """
+    __tablename__ = 'bracket_pick_items'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'matchup_code', name='uq_bracket_pick_items_user_code'),
+        db.Index('ix_bracket_pick_items_code_winner_games', 'matchup_code', 'winner', 'games'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    matchup_code = db.Column(db.String(80), nullable=False)
+    winner = db.Column(db.String(10), nullable=False)
+    games = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f'<BracketPickItem user {self.user_id} {self.matchup_code}: {self.winner} in {self.games}>'
+
+
 class LineupPick(db.Model):
     __tablename__ = 'lineup_picks'
 
@@ -134,6 +155,28 @@ class LineupPick(db.Model):
     
     user = db.relationship("User", backref="lineup_pick", uselist=False)
 
+class LineupSlotHistory(db.Model):
+    """
+    Ownership interval of one lineup slot: the player in `slot` from valid_from until valid_to.
+    The current player of a slot has valid_to NULL. Written on every lineup save.
+    """
+    __tablename__ = 'lineup_slot_history'
+    __table_args__ = (
+        db.Index('ix_lineup_slot_history_user_open', 'user_id', 'valid_to'),
+        db.Index('ix_lineup_slot_history_player', 'player_id', 'is_goalie'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    slot = db.Column(db.String(4), nullable=False)  # L, C, R, LD, RD, G
+    player_id = db.Column(db.Integer, nullable=False)  # Player or Goalie DB id
+    is_goalie = db.Column(db.Boolean, default=False, nullable=False)
+    valid_from = db.Column(db.DateTime, nullable=False)  # UTC
+    valid_to = db.Column(db.DateTime, nullable=True)  # UTC, NULL while the player is still in the slot
+
+    def __repr__(self):
+        return f'<LineupSlotHistory user {self.user_id} {self.slot}: {self.player_id} {self.valid_from} - {self.valid_to}>'
+
 class Prediction(db.Model):
     __tablename__ = 'predictions'
     
@@ -147,6 +190,25 @@ class Prediction(db.Model):
     def __repr__(self):
         return f'<Prediction {self.id} by User {self.user_id}>'
 
+class PredictionSummary(db.Model):
+    """
+    A user's predictions compared with the standings of one stats version, precomputed for
+    /api/predictions/summary. Stale when stats_version differs from the current one,
+    deleted when the user saves new predictions.
+    """
+    __tablename__ = 'prediction_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
+    stats_version = db.Column(db.Integer, nullable=False)
+    categories_json = db.Column(db.Text, nullable=False)  # [{"name", "userPicks", "correctPicks"}, ...]
+    total_correct = db.Column(db.Integer, default=0, nullable=False)
+    completed = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<PredictionSummary User {self.user_id} v{self.stats_version}>'
+
 class Team(db.Model):
     __tablename__ = 'teams'
     id = db.Column(db.Integer, primary_key=True)
@@ -160,6 +222,11 @@ class Team(db.Model):
 
 class Player(db.Model):
     __tablename__ = 'players'
+    __table_args__ = (
+        db.Index('ix_players_team_abbr', 'team_abbr'),
+        db.Index('ix_players_position_price', 'position', 'price'),
+        db.Index('ix_players_price', 'price'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     api_id = db.Column(db.Integer, unique=True, nullable=False)  # NHL API playerId
     first_name = db.Column(db.String(80), nullable=False)
@@ -197,6 +264,10 @@ class Player(db.Model):
 
 class Goalie(db.Model):
     __tablename__ = 'goalies'
+    __table_args__ = (
+        db.Index('ix_goalies_team_abbr', 'team_abbr'),
+        db.Index('ix_goalies_price', 'price'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     api_id = db.Column(db.Integer, unique=True, nullable=False)  # NHL API playerId
@@ -271,6 +342,8 @@ class UserPoints(db.Model):
     bracket_final_points = db.Column(db.Integer, default=0)    # Points earned in Finals
     
     bracket_total_points = db.Column(db.Integer, default=0)    # Total points from bracket game
+    # Set by the bracket scorers, rows created by lineup or prediction scoring have never been bracket scored
+    bracket_scored = db.Column(db.Boolean, default=False, nullable=False, server_default=db.false())
     
     # Game 2: All-Stars Line
     lineup_total_points = db.Column(db.Integer, default=0)     # Total points from lineup game
@@ -328,6 +401,10 @@ class Headline(db.Model):
 
 class GameLog(db.Model):
     __tablename__ = 'game_logs'
+    __table_args__ = (
+        db.Index('uq_game_logs_api_game', 'api_id', 'game_id', unique=True),
+        db.Index('ix_game_logs_player_start', 'player_id', 'is_goalie', 'start_time_utc'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, nullable=False)  # Player or Goalie DB id
     api_id = db.Column(db.Integer, nullable=False)     # NHL API playerId
@@ -355,4 +432,42 @@ class GameLog(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     def __repr__(self):
-        return f'<GameLog {self.api_id} {self.game_id}>'
\ No newline at end of file
+        return f'<GameLog {self.api_id} {self.game_id}>'
+
+class PriceHistory(db.Model):
+    """
+    Ledger of price changes, one row per player per game applied by update_prices_after_games.
+    A game with a row here has been applied and is never applied again.
+    """
+    __tablename__ = 'price_history'
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'is_goalie', 'game_id', name='uq_price_history_player_game'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, nullable=False)  # Player or Goalie DB id
+    is_goalie = db.Column(db.Boolean, default=False, nullable=False)
+    game_id = db.Column(db.String(32), nullable=False)
+    old_price = db.Column(db.Integer, nullable=False)
+    new_price = db.Column(db.Integer, nullable=False)
+    perf = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<PriceHistory {self.player_id} {self.game_id}: {self.old_price} -> {self.new_price}>'
+
+class Game(db.Model):
+    """
+    Game metadata resolved once from the gamecenter endpoints and shared by all game logs.
+    """
+    __tablename__ = 'games'
+
+    game_id = db.Column(db.String(32), primary_key=True)  # NHL API gameId
+    start_time_utc = db.Column(db.DateTime, nullable=True)
+    home_team = db.Column(db.String(10), nullable=True)
+    away_team = db.Column(db.String(10), nullable=True)
+    game_state = db.Column(db.String(10), nullable=True)  # e.g. FUT, LIVE, OFF, FINAL
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<Game {self.game_id} {self.away_team}@{self.home_team} ({self.game_state})>'
\ No newline at end of file
@@ -2,34 +2,44 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
 from flask import Flask
 from config import Config
 from db import db_engine as db
 from nhl_api.populate_game_logs import fetch_and_store_game_logs
+from nhl_api.populate_boxscore_logs import fetch_and_store_boxscore_logs
 from nhl_api.update_prices import update_prices_after_games
-from score_module import calculate_lineup_points_from_gamelogs
-from models import User
+from score_module import score_all_lineups
+from log_module import get_logger, setup_logging
+
+logger = get_logger(__name__)
 
 if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Daily game log, price and lineup points update")
+    parser.add_argument(
+        "--mode",
+        choices=["players", "schedule"],
+        default=os.environ.get("GAME_LOG_MODE", "players"),
+        help="players: poll every player's game log, schedule: read boxscores of games completed since the last checkpoint"
+    )
+    args = parser.parse_args()
+
     app = Flask(__name__)
     app.config.from_object(Config)
     db.init_app(app)
     
     with app.app_context():
-        print("--- Updating game logs ---")
-        fetch_and_store_game_logs()
+        logger.info("Updating game logs (%s mode)", args.mode)
+        if args.mode == "schedule":
+            fetch_and_store_boxscore_logs()
+        else:
+            fetch_and_store_game_logs()
         
-        print("--- Updating player and goalie prices ---")
+        logger.info("Updating player and goalie prices")
         update_prices_after_games()
         
-        print("--- Recalculating lineup points for all users ---")
-        users = User.query.all()
-        user_count = len(users)
-        print(f"Found {user_count} users to update")
-        
-        for i, user in enumerate(users, 1):
-            print(f"[{i}/{user_count}] Updating points for user {user.id}: {user.username}")
-            points = calculate_lineup_points_from_gamelogs(user.id)
-            print(f"   → {points} lineup points calculated")
-            
-        print("--- Daily update complete! ---")
\ No newline at end of file
+        logger.info("Recalculating lineup points for all users")
+        score_all_lineups()
+
+        logger.info("Daily update complete")
\ No newline at end of file
@@ -0,0 +1,160 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0  # Requests per second across all workers, 0 disables the limit
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2  # Extra attempts after a connection error, 429 or 5xx
+DEFAULT_BACKOFF = 0.5  # Seconds before the first retry, doubled for each further one
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    Refills `rate` tokens per second up to `capacity`, each request takes one token.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchStats:
+    """Throughput counters for all requests made through one engine."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def record(self, ok):
+        with self.lock:
+            self.requests += 1
+            if not ok:
+                self.failures += 1
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.requests} requests ({self.failures} failed, {self.retries} retried) in {self.elapsed:.2f}s "
+                f"-> {self.requests_per_second:.1f} req/s")
+
+
+class FetchEngine:
+    """
+    Fan out GET requests over a bounded thread pool with a global rate limit.
+
+    Only the HTTP calls run in the worker threads. Results are yielded back to
+    the calling thread, which stays the single database writer.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, burst=None, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.workers = max(1, int(workers))
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.stats = FetchStats()
+        self._local = threading.local()
+
+    def _session(self):
+        # requests.Session is not thread-safe, keep one per worker thread
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def get_json(self, url):
+        """
+        Fetch a single URL through the rate limiter. Connection errors, 429 and 5xx
+        responses are retried up to `retries` times with exponential backoff, every
+        attempt takes its own token.
+
+        Returns:
+            tuple: (data, error) where exactly one of them is None
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats.record_retry()
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            data, error, retry = self._get_once(url)
+            if not retry:
+                break
+        return data, error
+
+    def _get_once(self, url):
+        """One attempt, returns (data, error, retry)"""
+        self.bucket.acquire()
+        try:
+            resp = self._session().get(url, timeout=self.timeout)
+        except Exception as e:
+            self.stats.record(False)
+            return None, str(e), True
+        if resp.status_code != 200:
+            self.stats.record(False)
+            return None, f"HTTP {resp.status_code}", resp.status_code in RETRY_STATUSES
+        try:
+            data = resp.json()
+        except ValueError as e:
+            self.stats.record(False)
+            return None, f"Invalid JSON: {e}", False
+        self.stats.record(True)
+        return data, None, False
+
+    def fetch_all(self, items, url_for):
+        """
+        Fetch url_for(item) for every item concurrently.
+
+        Args:
+            items (iterable): Work items, url_for is called for them on the calling thread
+            url_for (callable): Maps an item to the URL to fetch
+
+        Yields:
+            tuple: (item, data, error) in completion order
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.get_json, url_for(item)): item for item in items}
+            for future in as_completed(futures):
+                data, error = future.result()
+                yield futures[future], data, error
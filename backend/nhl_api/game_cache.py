@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from models import db, Game
+from log_module import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_start_time(value):
+    """Parse an NHL API startTimeUTC string, returns None if missing"""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+class GameCache:
+    """
+    Game metadata cache backed by the `games` table.
+
+    All known games are loaded once when the cache is created. A game missing
+    from the table (or stored without a start time) is resolved from the
+    gamecenter landing endpoint once and persisted, so every game is fetched
+    at most once across all runs.
+    """
+
+    def __init__(self, engine, base_url):
+        self.engine = engine
+        self.base_url = base_url
+        self.games = {game.game_id: game for game in Game.query.all()}
+        self.failed = set()  # Games that could not be resolved during this run
+        self.resolved = 0
+
+    def get(self, game_id):
+        """Return the Game row for game_id, fetching it on first use"""
+        game_id = str(game_id)
+        game = self.games.get(game_id)
+        if (game is None or game.start_time_utc is None) and game_id not in self.failed:
+            game = self._resolve(game_id, game)
+        return game
+
+    def start_time(self, game_id):
+        game = self.get(game_id)
+        return game.start_time_utc if game else None
+
+    def remember(self, game_id, start_time_utc=None, home_team=None, away_team=None, game_state=None):
+        """Store metadata obtained from another endpoint (e.g. a boxscore) without an extra request"""
+        game_id = str(game_id)
+        game = self.games.get(game_id)
+        if game is None:
+            game = Game(game_id=game_id)
+            db.session.add(game)
+            self.games[game_id] = game
+        game.start_time_utc = start_time_utc or game.start_time_utc
+        game.home_team = home_team or game.home_team
+        game.away_team = away_team or game.away_team
+        game.game_state = game_state or game.game_state
+        return game
+
+    def _resolve(self, game_id, game):
+        data, error = self.engine.get_json(f"{self.base_url}/gamecenter/{game_id}/landing")
+        if error:
+            logger.warning("Error fetching start time for game %s: %s", game_id, error)
+            self.failed.add(game_id)
+            return game
+        self.resolved += 1
+        return self.remember(
+            game_id,
+            start_time_utc=parse_start_time(data.get("startTimeUTC")),
+            home_team=data.get("homeTeam", {}).get("abbrev"),
+            away_team=data.get("awayTeam", {}).get("abbrev"),
+            game_state=data.get("gameState"),
+        )
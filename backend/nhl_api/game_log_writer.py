@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, GameLog
+
+UNIQUE_INDEX_NAME = 'uq_game_logs_api_game'
+PLAYER_START_INDEX_NAME = 'ix_game_logs_player_start'
+STAT_COLUMNS = ("goals", "assists", "points", "plus_minus", "wins", "shutouts", "saves", "shots", "goals_against")
+UPSERT_CHUNK_SIZE = 500
+
+
+def ensure_game_log_unique_index():
+    """
+    Create the (api_id, game_id) unique index on databases created before it was added to the model.
+    ON CONFLICT needs it to exist.
+    """
+    db.session.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX_NAME} ON game_logs (api_id, game_id)"))
+
+
+def ensure_game_log_player_start_index():
+    """Create the (player_id, is_goalie, start_time_utc) index used by lineup scoring on older databases"""
+    db.session.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {PLAYER_START_INDEX_NAME} ON game_logs (player_id, is_goalie, start_time_utc)"
+    ))
+
+
+class GameLogWriter:
+    """
+    Collects parsed game log rows and writes them in bulk.
+
+    The existing (api_id, game_id) keys, their stats and whether their start time
+    is known are preloaded with one query. flush() then inserts new rows and
+    updates rows whose stats were corrected upstream or whose missing start time
+    was resolved with INSERT ... ON CONFLICT DO UPDATE, skipping rows that did
+    not change.
+    """
+
+    def __init__(self):
+        ensure_game_log_unique_index()
+        ensure_game_log_player_start_index()
+        columns = [getattr(GameLog, c) for c in STAT_COLUMNS]
+        self.existing = {}
+        self.start_known = set()
+        for row in db.session.query(GameLog.api_id, GameLog.game_id, GameLog.start_time_utc, *columns).all():
+            self.existing[(row[0], row[1])] = tuple(row[3:])
+            if row[2] is not None:
+                self.start_known.add((row[0], row[1]))
+        self.rows = {}
+
+    def has_start_time(self, api_id, game_id):
+        """True if the stored log already has a start time, new logs and logs stored without one need it resolved"""
+        return (api_id, str(game_id)) in self.start_known
+
+    def add(self, row):
+        """Queue a row dict with GameLog column names, later rows for the same game replace earlier ones"""
+        row["game_id"] = str(row["game_id"])
+        row.setdefault("start_time_utc", None)
+        for column in STAT_COLUMNS:
+            row[column] = row.get(column) or 0
+        self.rows[(row["api_id"], row["game_id"])] = row
+
+    def flush(self):
+        """
+        Write queued rows and clear the queue. Does not commit.
+
+        Returns:
+            tuple: (inserted, updated) row counts
+        """
+        new_rows, changed_rows = [], []
+        for key, row in self.rows.items():
+            current = self.existing.get(key)
+            if current is None:
+                new_rows.append(row)
+            elif current != tuple(row[c] for c in STAT_COLUMNS) or (
+                row["start_time_utc"] is not None and key not in self.start_known
+            ):
+                changed_rows.append(row)
+        self.rows = {}
+
+        rows = new_rows + changed_rows
+        if rows:
+            dialect = db.session.get_bind().dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                self._upsert(rows, postgresql.insert if dialect == "postgresql" else sqlite.insert)
+            else:
+                self._insert_then_update(new_rows, changed_rows)
+
+        for row in rows:
+            self.existing[(row["api_id"], row["game_id"])] = tuple(row[c] for c in STAT_COLUMNS)
+            if row["start_time_utc"] is not None:
+                self.start_known.add((row["api_id"], row["game_id"]))
+        return len(new_rows), len(changed_rows)
+
+    def _upsert(self, rows, dialect_insert):
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = dialect_insert(GameLog).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            set_ = {column: stmt.excluded[column] for column in STAT_COLUMNS}
+            # Keep a known start time if the new row could not resolve one
+            set_["start_time_utc"] = func.coalesce(stmt.excluded.start_time_utc, GameLog.start_time_utc)
+            stmt = stmt.on_conflict_do_update(index_elements=["api_id", "game_id"], set_=set_)
+            db.session.execute(stmt)
+
+    def _insert_then_update(self, new_rows, changed_rows):
+        # Generic fallback for databases without ON CONFLICT support
+        if new_rows:
+            db.session.execute(insert(GameLog), new_rows)
+        for row in changed_rows:
+            values = {column: row[column] for column in STAT_COLUMNS}
+            if row["start_time_utc"] is not None:
+                values["start_time_utc"] = row["start_time_utc"]
+            db.session.execute(
+                update(GameLog)
+                .where(GameLog.api_id == row["api_id"], GameLog.game_id == row["game_id"])
+                .values(values)
+            )
@@ -0,0 +1,229 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import date, datetime, timedelta
+from models import db, Player, Goalie, Setting
+from flask import Flask
+from config import Config
+from nhl_api.fetch_engine import FetchEngine
+from nhl_api.game_cache import GameCache, parse_start_time
+from nhl_api.game_log_writer import GameLogWriter
+from nhl_api.populate_game_logs import NHL_API_BASE, PLAYOFF_GAME_TYPE, GAME_LOG_WORKERS, NHL_API_RATE
+from log_module import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+CHECKPOINT_KEY = 'game_log_checkpoint'
+PLAYOFF_START_DATE = date(2025, 4, 19)  # Used when no checkpoint has been stored yet
+COMPLETED_STATES = ("OFF", "FINAL")
+
+
+def get_checkpoint():
+    """Return the last date whose games have all been ingested, or None"""
+    setting = Setting.query.filter_by(key=CHECKPOINT_KEY).first()
+    if setting:
+        try:
+            return date.fromisoformat(setting.value)
+        except ValueError:
+            logger.warning("Invalid checkpoint in database: %s", setting.value)
+    return None
+
+
+def set_checkpoint(checkpoint):
+    setting = Setting.query.filter_by(key=CHECKPOINT_KEY).first()
+    if not setting:
+        setting = Setting(
+            key=CHECKPOINT_KEY,
+            value=checkpoint.isoformat(),
+            description='Last date whose boxscores have been ingested into game_logs'
+        )
+        db.session.add(setting)
+    else:
+        setting.value = checkpoint.isoformat()
+
+
+def fetch_schedule(engine, since, until, base_url=NHL_API_BASE):
+    """
+    Collect playoff games scheduled between since and until (inclusive) from the weekly schedule.
+
+    Returns:
+        dict: date -> list of schedule game dicts
+    """
+    games_by_date = {}
+    week_start = since
+    while week_start <= until:
+        data, error = engine.get_json(f"{base_url}/schedule/{week_start.isoformat()}")
+        if error:
+            raise RuntimeError(f"Failed to fetch schedule for {week_start}: {error}")
+        for day in data.get("gameWeek", []):
+            day_date = date.fromisoformat(day["date"])
+            if since <= day_date <= until:
+                games_by_date[day_date] = [g for g in day.get("games", []) if g.get("gameType") == PLAYOFF_GAME_TYPE]
+        week_start += timedelta(days=7)
+    return games_by_date
+
+
+def parse_goalie_saves(goalie):
+    """Return (saves, shots) from a boxscore goalie entry"""
+    if "saves" in goalie and "shotsAgainst" in goalie:
+        return goalie.get("saves") or 0, goalie.get("shotsAgainst") or 0
+    saves, _, shots = (goalie.get("saveShotsAgainst") or "0/0").partition("/")
+    return int(saves or 0), int(shots or 0)
+
+
+def store_boxscore(writer, boxscore, players_by_api_id, goalies_by_api_id):
+    """
+    Queue GameLog rows for every known player and goalie in a boxscore.
+
+    Returns:
+        int: Number of rows queued
+    """
+    game_id = str(boxscore.get("id"))
+    game_date = datetime.strptime(boxscore.get("gameDate"), "%Y-%m-%d")
+    start_time_utc = parse_start_time(boxscore.get("startTimeUTC"))
+    teams = {
+        "homeTeam": boxscore.get("homeTeam", {}).get("abbrev", ""),
+        "awayTeam": boxscore.get("awayTeam", {}).get("abbrev", ""),
+    }
+    queued = 0
+    for side, team in teams.items():
+        opponent = teams["awayTeam" if side == "homeTeam" else "homeTeam"]
+        home = side == "homeTeam"
+        stats = boxscore.get("playerByGameStats", {}).get(side, {})
+
+        for skater in stats.get("forwards", []) + stats.get("defense", []):
+            player = players_by_api_id.get(skater.get("playerId"))
+            if not player:
+                continue
+            writer.add({
+                "player_id": player.id,
+                "api_id": player.api_id,
+                "is_goalie": False,
+                "game_id": game_id,
+                "game_date": game_date,
+                "team": team,
+                "opponent": opponent,
+                "home": home,
+                "player_name": f"{player.first_name} {player.last_name}",
+                "goals": skater.get("goals", 0),
+                "assists": skater.get("assists", 0),
+                "points": skater.get("points", 0),
+                "plus_minus": skater.get("plusMinus", 0),
+                "start_time_utc": start_time_utc,
+            })
+            queued += 1
+
+        for entry in stats.get("goalies", []):
+            goalie = goalies_by_api_id.get(entry.get("playerId"))
+            # Dressed backups are listed with 00:00 TOI, the game log endpoint skips them too
+            if not goalie or entry.get("toi", "00:00") == "00:00":
+                continue
+            saves, shots = parse_goalie_saves(entry)
+            goals_against = entry.get("goalsAgainst", 0)
+            won = entry.get("decision") == "W"
+            writer.add({
+                "player_id": goalie.id,
+                "api_id": goalie.api_id,
+                "is_goalie": True,
+                "game_id": game_id,
+                "game_date": game_date,
+                "team": team,
+                "opponent": opponent,
+                "home": home,
+                "player_name": f"{goalie.first_name} {goalie.last_name}",
+                "wins": 1 if won else 0,
+                # Boxscores carry no shutout flag, credit the winning goalie of a zero-goal game
+                "shutouts": 1 if won and goals_against == 0 else 0,
+                "saves": saves,
+                "shots": shots,
+                "goals_against": goals_against,
+                "start_time_utc": start_time_utc,
+            })
+            queued += 1
+    return queued
+
+
+def fetch_and_store_boxscore_logs(since=None, until=None, workers=GAME_LOG_WORKERS, rate=NHL_API_RATE, base_url=NHL_API_BASE):
+    """
+    Ingest game logs from the boxscores of games completed since the last checkpoint.
+
+    Costs one schedule request per week plus one boxscore request per completed
+    game, instead of one game-log request per rostered player.
+
+    Returns:
+        FetchStats: Request counts and throughput of the run
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    with app.app_context():
+        until = until or datetime.utcnow().date()
+        if since is None:
+            checkpoint = get_checkpoint()
+            since = checkpoint + timedelta(days=1) if checkpoint else PLAYOFF_START_DATE
+        if since > until:
+            logger.info("Checkpoint is up to date (%s), nothing to ingest.", since - timedelta(days=1))
+            return None
+        logger.info("Ingesting boxscores for games between %s and %s", since, until)
+
+        engine = FetchEngine(workers=workers, rate=rate)
+        games_by_date = fetch_schedule(engine, since, until, base_url)
+        completed = [g for day in sorted(games_by_date) for g in games_by_date[day] if g.get("gameState") in COMPLETED_STATES]
+        logger.info("Found %d completed playoff games", len(completed))
+
+        players_by_api_id = {p.api_id: p for p in Player.query.all()}
+        goalies_by_api_id = {g.api_id: g for g in Goalie.query.all()}
+        game_ids = [str(g["id"]) for g in completed]
+        games = GameCache(engine, base_url)
+        writer = GameLogWriter()
+
+        failed_ids = set()
+        urls = {str(g["id"]): f"{base_url}/gamecenter/{g['id']}/boxscore" for g in completed}
+        for game_id, boxscore, error in engine.fetch_all(game_ids, urls.get):
+            if error:
+                logger.error("Failed to fetch boxscore for game %s: %s", game_id, error)
+                failed_ids.add(game_id)
+                continue
+            games.remember(
+                game_id,
+                start_time_utc=parse_start_time(boxscore.get("startTimeUTC")),
+                home_team=boxscore.get("homeTeam", {}).get("abbrev"),
+                away_team=boxscore.get("awayTeam", {}).get("abbrev"),
+                game_state=boxscore.get("gameState"),
+            )
+            queued = store_boxscore(writer, boxscore, players_by_api_id, goalies_by_api_id)
+            logger.debug("Game %s: %d player game logs", game_id, queued)
+
+        # Advance the checkpoint over every leading day whose games are all final and stored
+        checkpoint = None
+        for day in sorted(games_by_date):
+            day_games = games_by_date[day]
+            if any(g.get("gameState") not in COMPLETED_STATES or str(g["id"]) in failed_ids for g in day_games):
+                break
+            checkpoint = day
+        if checkpoint:
+            set_checkpoint(checkpoint)
+
+        inserted, updated = writer.flush()
+        db.session.commit()
+        stats = engine.stats
+        stats.finish()
+        logger.info(
+            "%d game logs added, %d corrected from %d boxscores. Checkpoint: %s, %s",
+            inserted, updated, len(completed) - len(failed_ids), checkpoint or get_checkpoint(), stats.summary()
+        )
+        return stats
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Ingest playoff game logs from completed game boxscores")
+    parser.add_argument("--since", type=date.fromisoformat, help="First date to ingest (default: day after checkpoint)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last date to ingest (default: today)")
+    parser.add_argument("--workers", type=int, default=GAME_LOG_WORKERS, help="Number of concurrent fetch workers")
+    parser.add_argument("--rate", type=float, default=NHL_API_RATE, help="Global request rate limit (req/s, 0 = unlimited)")
+    parser.add_argument("--base-url", default=NHL_API_BASE, help="NHL API base URL, e.g. a local stub server")
+    args = parser.parse_args()
+    fetch_and_store_boxscore_logs(since=args.since, until=args.until, workers=args.workers, rate=args.rate, base_url=args.base_url)
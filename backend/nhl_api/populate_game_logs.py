@@ -2,147 +2,131 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
-import time
+import argparse
 from datetime import datetime
-from models import db, Player, Goalie, GameLog
+from models import db, Player, Goalie
 from flask import Flask
 from config import Config
+from nhl_api.fetch_engine import FetchEngine
+from nhl_api.game_cache import GameCache
+from nhl_api.game_log_writer import GameLogWriter
+from log_module import get_logger, setup_logging
 
-def fetch_and_store_game_logs():
+logger = get_logger(__name__)
+
+# Base URL can be pointed at a local stub server for testing
+NHL_API_BASE = os.environ.get("NHL_API_BASE", "https://api-web.nhle.com/v1")
+GAME_LOG_SEASON = "20242025"
+PLAYOFF_GAME_TYPE = 3
+
+GAME_LOG_WORKERS = int(os.environ.get("GAME_LOG_WORKERS", 8))
+NHL_API_RATE = float(os.environ.get("NHL_API_RATE", 10))
+
+
+def store_skater_games(writer, games, player, data):
+    api_id = player.api_id
+    for game in data.get("gameLog", []):
+        game_id = str(game.get("gameId"))
+        writer.add({
+            "player_id": player.id,
+            "api_id": api_id,
+            "is_goalie": False,
+            "game_id": game_id,
+            "game_date": datetime.strptime(game.get("gameDate"), "%Y-%m-%d"),
+            "team": game.get("teamAbbrev", ""),
+            "opponent": game.get("opponentAbbrev", ""),
+            "home": game.get("homeRoad", "R") == "H",
+            "player_name": f"{player.first_name} {player.last_name}",
+            "goals": game.get("goals", 0),
+            "assists": game.get("assists", 0),
+            "points": game.get("points", 0),
+            "plus_minus": game.get("plusMinus", 0),
+            # Logs with a stored start time keep it, new logs and logs stored without one resolve it
+            "start_time_utc": None if writer.has_start_time(api_id, game_id) else games.start_time(game_id),
+        })
+
+
+def store_goalie_games(writer, games, goalie, data):
+    api_id = goalie.api_id
+    for game in data.get("gameLog", []):
+        game_id = str(game.get("gameId"))
+        writer.add({
+            "player_id": goalie.id,
+            "api_id": api_id,
+            "is_goalie": True,
+            "game_id": game_id,
+            "game_date": datetime.strptime(game.get("gameDate"), "%Y-%m-%d"),
+            "team": game.get("teamAbbrev", ""),
+            "opponent": game.get("opponentAbbrev", ""),
+            "home": game.get("homeRoad", "R") == "H",
+            "player_name": f"{goalie.first_name} {goalie.last_name}",
+            "wins": 1 if game.get("decision", "") == "W" else 0,
+            "shutouts": game.get("shutouts", 0),
+            "saves": game.get("saves", 0),
+            "shots": game.get("shotsAgainst", 0),
+            "goals_against": game.get("goalsAgainst", 0),
+            "start_time_utc": None if writer.has_start_time(api_id, game_id) else games.start_time(game_id),
+        })
+
+
+def fetch_and_store_game_logs(workers=GAME_LOG_WORKERS, rate=NHL_API_RATE, base_url=NHL_API_BASE):
+    """
+    Fetch playoff game logs for every skater and goalie and upsert them into GameLog.
+
+    Game log requests are fanned out over `workers` threads and throttled to `rate`
+    requests per second in total. All database writes happen on the calling thread.
+
+    Returns:
+        FetchStats: Request counts and throughput of the run
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
     db.init_app(app)
     with app.app_context():
-        # Skaters
         players = Player.query.all()
-        total_players = len(players)
-        print(f"\n🏒 Processing {total_players} skaters...")
-        
-        for idx, player in enumerate(players, 1):
-            print(f"Processing player {idx}/{total_players}: {player.first_name} {player.last_name}")
-            api_id = player.api_id
-            url = f"https://api-web.nhle.com/v1/player/{api_id}/game-log/20242025/3"
-            try:
-                resp = requests.get(url)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    for game in data.get("gameLog", []):
-                        game_id = str(game.get("gameId"))
-                        game_date = datetime.strptime(game.get("gameDate"), "%Y-%m-%d")
-                        team = game.get("teamAbbrev", "")
-                        opponent = game.get("opponentAbbrev", "")
-                        home = game.get("homeRoad", "R") == "H"
-                        goals = game.get("goals", 0)
-                        assists = game.get("assists", 0)
-                        points = game.get("points", 0)
-                        plus_minus = game.get("plusMinus", 0)
-                        # Fetch start time from gamecenter endpoint
-                        start_time_utc = None
-                        try:
-                            landing_url = f"https://api-web.nhle.com/v1/gamecenter/{game_id}/landing"
-                            landing_resp = requests.get(landing_url)
-                            if landing_resp.status_code == 200:
-                                landing_data = landing_resp.json()
-                                start_time_str = landing_data.get("startTimeUTC")
-                                if start_time_str:
-                                    start_time_utc = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%SZ")
-                        except Exception as e:
-                            print(f"Error fetching start time for game {game_id}: {e}")
-                        # Check if already exists
-                        exists = GameLog.query.filter_by(api_id=api_id, game_id=game_id).first()
-                        if not exists:
-                            log = GameLog(
-                                player_id=player.id,
-                                api_id=api_id,
-                                is_goalie=False,
-                                game_id=game_id,
-                                game_date=game_date,
-                                team=team,
-                                opponent=opponent,
-                                home=home,
-                                player_name=f"{player.first_name} {player.last_name}",
-                                goals=goals,
-                                assists=assists,
-                                points=points,
-                                plus_minus=plus_minus,
-                                start_time_utc=start_time_utc
-                            )
-                            db.session.add(log)
-                            print(f"Added skater game log: {player.first_name} {player.last_name} {game_id}")
-                else:
-                    print(f"❌ Failed to fetch logs for {player.first_name} {player.last_name}")
-            except Exception as e:
-                print(f"❌ Error fetching logs for {player.first_name} {player.last_name}: {e}")
-            time.sleep(0.1)
-            
-        # Goalies
         goalies = Goalie.query.all()
+        total_players = len(players)
         total_goalies = len(goalies)
-        print(f"\n🥅 Processing {total_goalies} goalies...")
-        
-        for idx, goalie in enumerate(goalies, 1):
-            print(f"Processing goalie {idx}/{total_goalies}: {goalie.first_name} {goalie.last_name}")
-            api_id = goalie.api_id
-            url = f"https://api-web.nhle.com/v1/player/{api_id}/game-log/20242025/3"
+        logger.info("Processing %d skaters and %d goalies with %d workers at %g req/s", total_players, total_goalies, workers, rate)
+
+        # (entity, is_goalie, url) tuples, the URL is built here so worker threads never touch ORM objects
+        jobs = [(p, False, f"{base_url}/player/{p.api_id}/game-log/{GAME_LOG_SEASON}/{PLAYOFF_GAME_TYPE}") for p in players]
+        jobs += [(g, True, f"{base_url}/player/{g.api_id}/game-log/{GAME_LOG_SEASON}/{PLAYOFF_GAME_TYPE}") for g in goalies]
+
+        engine = FetchEngine(workers=workers, rate=rate)
+        games = GameCache(engine, base_url)
+        writer = GameLogWriter()
+        for idx, (job, data, error) in enumerate(engine.fetch_all(jobs, lambda job: job[2]), 1):
+            entity, is_goalie, _ = job
+            name = f"{entity.first_name} {entity.last_name}"
+            if error:
+                logger.error("Failed to fetch logs for %s: %s", name, error)
+                continue
+            logger.debug("Processing %s %d/%d: %s", 'goalie' if is_goalie else 'player', idx, len(jobs), name)
             try:
-                resp = requests.get(url)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    for game in data.get("gameLog", []):
-                        game_id = str(game.get("gameId"))
-                        game_date = datetime.strptime(game.get("gameDate"), "%Y-%m-%d")
-                        team = game.get("teamAbbrev", "")
-                        opponent = game.get("opponentAbbrev", "")
-                        home = game.get("homeRoad", "R") == "H"
-                        wins = game.get("decision", "") == "W"
-                        shutouts = game.get("shutouts", 0)
-                        saves = game.get("saves", 0)
-                        shots = game.get("shotsAgainst", 0)
-                        goals_against = game.get("goalsAgainst", 0)
-                        # Fetch start time from gamecenter endpoint
-                        start_time_utc = None
-                        try:
-                            landing_url = f"https://api-web.nhle.com/v1/gamecenter/{game_id}/landing"
-                            landing_resp = requests.get(landing_url)
-                            if landing_resp.status_code == 200:
-                                landing_data = landing_resp.json()
-                                start_time_str = landing_data.get("startTimeUTC")
-                                if start_time_str:
-                                    start_time_utc = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%SZ")
-                        except Exception as e:
-                            print(f"Error fetching start time for game {game_id}: {e}")
-                        # Check if already exists
-                        exists = GameLog.query.filter_by(api_id=api_id, game_id=game_id).first()
-                        if not exists:
-                            log = GameLog(
-                                player_id=goalie.id,
-                                api_id=api_id,
-                                is_goalie=True,
-                                game_id=game_id,
-                                game_date=game_date,
-                                team=team,
-                                opponent=opponent,
-                                home=home,
-                                player_name=f"{goalie.first_name} {goalie.last_name}",
-                                wins=1 if wins else 0,
-                                shutouts=shutouts,
-                                saves=saves,
-                                shots=shots,
-                                goals_against=goals_against,
-                                start_time_utc=start_time_utc
-                            )
-                            db.session.add(log)
-                            print(f"Added goalie game log: {goalie.first_name} {goalie.last_name} {game_id}")
+                if is_goalie:
+                    store_goalie_games(writer, games, entity, data)
                 else:
-                    print(f"❌ Failed to fetch logs for {goalie.first_name} {goalie.last_name}")
-            except Exception as e:
-                print(f"❌ Error fetching logs for {goalie.first_name} {goalie.last_name}: {e}")
-            time.sleep(0.1)
-            
+                    store_skater_games(writer, games, entity, data)
+            except Exception:
+                logger.exception("Error storing logs for %s", name)
+
+        inserted, updated = writer.flush()
         db.session.commit()
-        print(f"\n✅ Game logs updated successfully!")
-        print(f"   Processed {total_players} skaters and {total_goalies} goalies.")
+        stats = engine.stats
+        stats.finish()
+        logger.info(
+            "Game logs updated: %d added, %d corrected. Processed %d skaters and %d goalies. %s, %d new games resolved",
+            inserted, updated, total_players, total_goalies, stats.summary(), games.resolved
+        )
+        return stats
+
 
 if __name__ == "__main__":
-    fetch_and_store_game_logs()
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Fetch playoff game logs for all players and goalies")
+    parser.add_argument("--workers", type=int, default=GAME_LOG_WORKERS, help="Number of concurrent fetch workers")
+    parser.add_argument("--rate", type=float, default=NHL_API_RATE, help="Global request rate limit (req/s, 0 = unlimited)")
+    parser.add_argument("--base-url", default=NHL_API_BASE, help="NHL API base URL, e.g. a local stub server")
+    args = parser.parse_args()
+    fetch_and_store_game_logs(workers=args.workers, rate=args.rate, base_url=args.base_url)
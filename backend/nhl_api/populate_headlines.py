@@ -7,12 +7,16 @@ from datetime import datetime, timezone, timedelta
 from config import Config
 from db import db_engine as db
 from models import Headline
+import version_module  # noqa: F401 - bumps the cached data versions on writes
+from log_module import get_logger, setup_logging
+
+logger = get_logger(__name__)
 
 def populate_headlines():
     """
     Populate the headlines table with sample data
     """
-    print("Creating sample headlines...")
+    logger.info("Creating sample headlines")
     
     # Clear existing headlines for testing purposes
     Headline.query.delete()
@@ -58,7 +62,7 @@ def populate_headlines():
             is_active=True
         )
         db.session.add(headline)
-        print(f"Added global headline: {headline_text}")
+        logger.debug("Added global headline: %s", headline_text)
     
     # Add team-specific headlines
     for i, item in enumerate(team_headlines):
@@ -72,7 +76,7 @@ def populate_headlines():
             is_active=True
         )
         db.session.add(headline)
-        print(f"Added team headline for {item['team']}: {item['headline']}")
+        logger.debug("Added team headline for %s: %s", item['team'], item['headline'])
     
     # Add a couple of inactive headlines for testing admin functionality
     inactive_headlines = [
@@ -90,12 +94,13 @@ def populate_headlines():
             is_active=False  # Inactive
         )
         db.session.add(headline)
-        print(f"Added inactive headline: {headline_text}")
+        logger.debug("Added inactive headline: %s", headline_text)
     
     db.session.commit()
-    print(f"✅ Added {len(global_headlines) + len(team_headlines) + len(inactive_headlines)} headlines to the database")
+    logger.info("Added %d headlines to the database", len(global_headlines) + len(team_headlines) + len(inactive_headlines))
 
 if __name__ == '__main__':
+    setup_logging()
     # Create a Flask app context to run database operations
     app = Flask(__name__)
     app.config.from_object(Config)
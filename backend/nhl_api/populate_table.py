@@ -5,10 +5,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import requests
 import time
+import numpy as np
 from flask import Flask
 from config import Config
 from db import db_engine as db
 from models import Team, Player, Goalie
+from nhl_api import pricing_kernel
+from sqlalchemy import bindparam, select
+import version_module  # noqa: F401 - bumps the cached data versions on writes
+from listing_module import ensure_listing_indexes
+from score_module import ensure_user_points_columns
+from log_module import get_logger, setup_logging
+
+logger = get_logger(__name__)
 
 MIN_PRICE = 180000
 MAX_PRICE = 500000
@@ -17,7 +26,7 @@ def fetch_and_store_teams():
     teams_url = "https://api-web.nhle.com/v1/standings/now"
     response = requests.get(teams_url)
     if response.status_code != 200:
-        print("Failed to fetch teams data")
+        logger.error("Failed to fetch teams data")
         return
 
     data = response.json()
@@ -36,7 +45,7 @@ def fetch_and_store_teams():
         if not existing_team:
             new_team = Team(name=name, abbr=abbr, logo_url=logo_url)
             db.session.add(new_team)
-            print(f"Added team: {name} ({abbr})")
+            logger.info("Added team: %s (%s)", name, abbr)
     
     db.session.commit()
 
@@ -56,7 +65,7 @@ def fetch_and_store_players_for_team(abbr):
         # Get goalies separately
         goalies = roster_data.get("goalies", [])
         
-        print(f"\n📋 Processing {len(skaters)} skaters and {len(goalies)} goalies for {abbr}")
+        logger.info("Processing %d skaters and %d goalies for %s", len(skaters), len(goalies), abbr)
         
         # Process skaters
         for player in skaters:
@@ -69,7 +78,7 @@ def fetch_and_store_players_for_team(abbr):
             # Check if the player already exists in the DB using the API id
             existing_player = Player.query.filter_by(api_id=api_id).first()
             if existing_player:
-                print(f"Player {first_name} {last_name} already exists, skipping.")
+                logger.debug("Player %s %s already exists, skipping.", first_name, last_name)
                 continue
             
             # Get player info from the API
@@ -143,7 +152,7 @@ def fetch_and_store_players_for_team(abbr):
                 playoff_penalty_minutes=playoff_penalty_minutes
             )
             db.session.add(new_player)
-            print(f"Added player: {first_name} {last_name} ({abbr})")
+            logger.debug("Added player: %s %s (%s)", first_name, last_name, abbr)
             time.sleep(0.1)  # Small delay to be kind to the API
         
         # Process goalies
@@ -157,7 +166,7 @@ def fetch_and_store_players_for_team(abbr):
             # Check if the goalie already exists in the DB using the API id
             existing_goalie = Goalie.query.filter_by(api_id=api_id).first()
             if existing_goalie:
-                print(f"Goalie {first_name} {last_name} already exists, skipping.")
+                logger.debug("Goalie %s %s already exists, skipping.", first_name, last_name)
                 continue
             
             # Get goalie info from the API
@@ -220,13 +229,13 @@ def fetch_and_store_players_for_team(abbr):
                 playoff_wins=playoff_wins
             )
             db.session.add(new_goalie)
-            print(f"Added goalie: {first_name} {last_name} ({abbr})")
+            logger.debug("Added goalie: %s %s (%s)", first_name, last_name, abbr)
             time.sleep(0.1)  # Small delay to be kind to the API
         
         db.session.commit()
         
-    except Exception as e:
-        print(f"❌ Error processing team {abbr}: {e}")
+    except Exception:
+        logger.exception("Error processing team %s", abbr)
         db.session.rollback()
 
 def test_player():
@@ -237,116 +246,84 @@ def test_player():
         player_response = requests.get(player_url)
         if player_response.status_code == 200:
             player_data = player_response.json()
-            print(player_data)
+            logger.debug("Player data: %s", player_data)
         else:
-            print(f"Failed to fetch data for player ID {player_id}")
-    except Exception as e:
-        print(f"Error fetching player data: {e}")
+            logger.error("Failed to fetch data for player ID %s", player_id)
+    except Exception:
+        logger.exception("Error fetching player data")
+
+def price_updates(ids, prices, set_initial):
+    """Rows for the bulk price UPDATE, initial_price only when the prices were actually scaled"""
+    if set_initial:
+        return [{"entity_id": entity_id, "price": int(price), "initial_price": int(price)} for entity_id, price in zip(ids, prices)]
+    return [{"entity_id": entity_id, "price": int(price)} for entity_id, price in zip(ids, prices)]
+
+def write_prices(model, rows):
+    if not rows:
+        return
+    table = model.__table__
+    values = {"price": bindparam("price")}
+    if "initial_price" in rows[0]:
+        values["initial_price"] = bindparam("initial_price")
+    db.session.execute(table.update().where(table.c.id == bindparam("entity_id")).values(**values), rows)
 
 def calculate_prices():
     """
     Calculate player prices based on regular season performance.
     Scales prices between MIN_PRICE and MAX_PRICE based on performance.
     Formula: (2 * reg_goals + reg_assists + reg_plus_minus) / reg_gp
+
+    Stats are loaded as columns and priced with the vectorized pricing_kernel,
+    then written back with one bulk UPDATE per table.
     """
-    print("📊 Calculating player prices based on performance...")
-    
+    logger.info("Calculating player prices based on performance")
+
     # Calculate prices for skaters
-    players = Player.query.all()
-    player_scores = []
-    for player in players:
-        print(f"Calculating price for player {player.first_name} {player.last_name}")
-        # Skip players with no games played to avoid division by zero
-        if not player.reg_gp or player.reg_gp == 0:
-            performance = 0
-        elif player.reg_gp < 5:
-            performance = 0
-        else:
-            # Calculate performance using the formula
-            if player.position in "L, R, C":
-                performance = ((2 * player.reg_goals + player.reg_assists + player.reg_plus_minus) / player.reg_gp)
-            elif player.position == "D":
-                performance = ((3 * player.reg_goals + player.reg_assists + player.reg_plus_minus) / player.reg_gp)
-    
-        player_scores.append((player, performance))
-    
-    # Find min and max scores for skaters (excluding zeros)
-    non_zero_scores = [score for _, score in player_scores if score > 0]
-    if non_zero_scores:
-        min_score = min(non_zero_scores)
-        max_score = max(non_zero_scores)
-        score_range = max_score - min_score
-        price_range = MAX_PRICE - MIN_PRICE
-        
-        # Update prices for all skaters
-        for player, score in player_scores:
-            if score_range == 0:  # Avoid division by zero if all players have the same score
-                player.price = MIN_PRICE
-            else:
-                # Scale the price between MIN_PRICE and MAX_PRICE
-                normalized_score = (score - min_score) / score_range
-                player.price = int(MIN_PRICE + (normalized_score * price_range))
-                # ROUNDING THE PRICE TO THE NEAREST 1000
-                player.price = round(player.price, -3)
-                
-                # Handle special cases for players with fewer than 10 or 20 games played
-                if player.reg_gp < 5:
-                    player.price = 250000
-                elif player.reg_gp < 10:
-                    player.price = int(player.price * 0.8)
-                elif player.reg_gp < 20:
-                    player.price = int(player.price * 0.85)
-                
-                # Ensure price stays within bounds
-                player.price = max(MIN_PRICE, min(MAX_PRICE, player.price))
-                player.initial_price = player.price  # Store the initial price for reference
-                print(f"Updated price for {player.first_name} {player.last_name}: ${player.price/1000:.1f}K")
+    players = db.session.execute(
+        select(Player.id, Player.position, Player.reg_gp, Player.reg_goals, Player.reg_assists, Player.reg_plus_minus)
+    ).all()
+    ids = [player.id for player in players]
+    gp = np.array([player.reg_gp or 0 for player in players], dtype=np.int64)
+    goals = np.array([player.reg_goals or 0 for player in players], dtype=np.int64)
+    assists = np.array([player.reg_assists or 0 for player in players], dtype=np.int64)
+    plus_minus = np.array([player.reg_plus_minus or 0 for player in players], dtype=np.int64)
+    is_defense = np.array([player.position == "D" for player in players], dtype=bool)
+    is_forward = np.array([player.position is not None and player.position in "L, R, C" for player in players], dtype=bool)
+
+    scores = pricing_kernel.skater_scores(gp, goals, assists, plus_minus, is_defense, is_forward)
+    prices, scaled = pricing_kernel.scale_prices(scores, MIN_PRICE, MAX_PRICE)
+    if prices is not None:
+        if scaled:
+            # Handle special cases for players with fewer than 10 or 20 games played
+            prices = pricing_kernel.apply_games_played_penalty(prices, gp)
+            # Ensure price stays within bounds
+            prices = np.clip(prices, MIN_PRICE, MAX_PRICE)
+        write_prices(Player, price_updates(ids, prices, scaled))
+        logger.info("Updated prices for %d players", len(ids))
 
     # Now handle goalies separately
-    goalies = Goalie.query.all()
-    goalie_scores = []
     GOALIE_MAX_PRICE = 450000
     GOALIE_MIN_PRICE = 180000
-    goalie_price_range = GOALIE_MAX_PRICE - GOALIE_MIN_PRICE
-    
-    for goalie in goalies:
-        # Skip goalies with no games played
-        if not goalie.reg_gp or goalie.reg_gp == 0:
-            performance = 0
-        else:
-            # Custom formula for goalies: Wins are heavily weighted, plus bonus for good save% and GAA
-            performance = (goalie.reg_wins + goalie.reg_shutouts + goalie.reg_gp) * goalie.reg_save_pct
-        
-        goalie_scores.append((goalie, performance))
-    
-    # Find min and max scores for goalies (excluding zeros)
-    non_zero_goalie_scores = [score for _, score in goalie_scores if score > 0]
-    if non_zero_goalie_scores:
-        min_goalie_score = min(non_zero_goalie_scores)
-        max_goalie_score = max(non_zero_goalie_scores)
-        goalie_score_range = max_goalie_score - min_goalie_score
-        
-        # Update prices for all goalies
-        for goalie, score in goalie_scores:
-            if goalie_score_range == 0:  # Avoid division by zero
-                goalie.price = GOALIE_MIN_PRICE
-            else:
-                # Scale the price between MIN_PRICE and MAX_PRICE
-                normalized_score = (score - min_goalie_score) / goalie_score_range
-                goalie.price = int(GOALIE_MIN_PRICE + (normalized_score * goalie_price_range))
-                # ROUNDING THE PRICE TO THE NEAREST 1000
-                goalie.price = round(goalie.price, -3)
-                
-                # Handle special cases for goalies with fewer games played
+    goalies = db.session.execute(
+        select(Goalie.id, Goalie.reg_gp, Goalie.reg_wins, Goalie.reg_shutouts, Goalie.reg_save_pct)
+    ).all()
+    goalie_ids = [goalie.id for goalie in goalies]
+    # Custom formula for goalies: Wins are heavily weighted, plus bonus for good save%
+    goalie_scores = pricing_kernel.goalie_scores(
+        np.array([goalie.reg_gp or 0 for goalie in goalies], dtype=np.int64),
+        np.array([goalie.reg_wins or 0 for goalie in goalies], dtype=np.int64),
+        np.array([goalie.reg_shutouts or 0 for goalie in goalies], dtype=np.int64),
+        np.array([goalie.reg_save_pct or 0 for goalie in goalies], dtype=np.float64),
+    )
+    goalie_prices, goalies_scaled = pricing_kernel.scale_prices(goalie_scores, GOALIE_MIN_PRICE, GOALIE_MAX_PRICE)
+    if goalie_prices is not None:
+        if goalies_scaled:
+            goalie_prices = np.clip(goalie_prices, GOALIE_MIN_PRICE, GOALIE_MAX_PRICE)
+        write_prices(Goalie, price_updates(goalie_ids, goalie_prices, goalies_scaled))
 
-                
-                # Ensure price stays within bounds
-                goalie.price = max(GOALIE_MIN_PRICE, min(GOALIE_MAX_PRICE, goalie.price))
-                goalie.initial_price = goalie.price  # Store the initial price for reference
-    
     # Commit all changes to the database
     db.session.commit()
-    print(f"✅ Player and goalie prices calculated and updated. Price range: ${MIN_PRICE/1000:.1f}K - ${MAX_PRICE/1000:.1f}K")
+    logger.info("Player and goalie prices calculated and updated. Price range: $%.1fK - $%.1fK", MIN_PRICE / 1000, MAX_PRICE / 1000)
 
 def populate_db():
     app = Flask(__name__)
@@ -355,24 +332,28 @@ def populate_db():
     
     with app.app_context():
         db.create_all()  # Create tables if they don't exist
+        ensure_listing_indexes()  # create_all skips indexes of existing tables
+        ensure_user_points_columns()  # and columns added to existing tables
+        db.session.commit()
         teams = Team.query.all()
         if teams:
-            print("Teams already populated, skipping team population.")
+            logger.info("Teams already populated, skipping team population.")
         else:
-            print("No teams found, populating teams...")
+            logger.info("No teams found, populating teams")
             fetch_and_store_teams()
-            print("Teams populated.")
+            logger.info("Teams populated.")
 
         # Now fetch players for each team in our teams table.
         teams = Team.query.all()
         for team in teams:
-            print(f"Fetching players for team: {team.abbr}")
+            logger.info("Fetching players for team: %s", team.abbr)
             fetch_and_store_players_for_team(team.abbr)
         
         # Calculate prices for all players
         calculate_prices()
 
 if __name__ == '__main__':
+    setup_logging()
     # Create a Flask app context to run any database operations
     app = Flask(__name__)
     app.config.from_object(Config)
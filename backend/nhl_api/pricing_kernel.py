@@ -0,0 +1,139 @@
+"""
+Vectorized pricing math shared by calculate_prices and update_prices_after_games.
+
+Every function works on NumPy arrays with one element per player and reproduces
+the per-player Python rules exactly: int() truncation, round(price, -3) with
+ties to even, and the same min/max clamps.
+"""
+import numpy as np
+
+PRICE_ROUNDING = 1000
+
+
+def round_half_even(values, multiple=PRICE_ROUNDING):
+    """Round integers to a multiple with ties to even, like Python's round(int, -3)"""
+    quotient, remainder = np.divmod(values, multiple)
+    half = multiple // 2
+    round_up = (remainder > half) | ((remainder == half) & (quotient % 2 == 1))
+    return (quotient + round_up) * multiple
+
+
+def truncate(values):
+    """int() of every float, i.e. rounding towards zero"""
+    return np.trunc(values).astype(np.int64)
+
+
+def skater_scores(gp, goals, assists, plus_minus, is_defense, is_forward):
+    """
+    Regular season performance per game: (2*goals + assists + plus_minus) / gp for forwards,
+    3*goals for defensemen. Players with fewer than 5 games (or another position) score 0.
+    """
+    scores = np.zeros(len(gp), dtype=np.float64)
+    played = gp >= 5
+    safe_gp = np.where(played, gp, 1)
+    forwards = played & is_forward
+    defense = played & is_defense
+    scores[forwards] = (2 * goals + assists + plus_minus)[forwards] / safe_gp[forwards]
+    scores[defense] = (3 * goals + assists + plus_minus)[defense] / safe_gp[defense]
+    return scores
+
+
+def goalie_scores(gp, wins, shutouts, save_pct):
+    """(wins + shutouts + gp) * save_pct, 0 for goalies without games"""
+    return np.where(gp > 0, (wins + shutouts + gp) * save_pct, 0.0)
+
+
+def scale_prices(scores, min_price, max_price):
+    """
+    Scale scores linearly between min_price and max_price using the min and max positive score,
+    truncated and rounded to the nearest 1000.
+
+    Returns:
+        tuple: (prices, scaled) where prices is None if no score is positive, and scaled is
+               False if all positive scores are equal (everyone gets min_price then)
+    """
+    positive = scores[scores > 0]
+    if positive.size == 0:
+        return None, False
+    min_score = positive.min()
+    score_range = positive.max() - min_score
+    if score_range == 0:
+        return np.full(len(scores), min_price, dtype=np.int64), False
+    normalized = (scores - min_score) / score_range
+    prices = truncate(min_price + normalized * (max_price - min_price))
+    return round_half_even(prices), True
+
+
+def apply_games_played_penalty(prices, gp):
+    """Small samples: under 5 games a flat 250K, under 10 games 80%, under 20 games 85%"""
+    return np.select(
+        [gp < 5, gp < 10, gp < 20],
+        [np.int64(250000), truncate(prices * 0.8), truncate(prices * 0.85)],
+        default=prices,
+    )
+
+
+def skater_game_perf(goals, assists, plus_minus, is_defense):
+    """Performance of one game: 2*goals + assists + plus_minus, 3*goals for defensemen"""
+    return np.where(is_defense, 3, 2) * goals + assists + plus_minus
+
+
+def skater_price_pct(perf):
+    # Map perf to price change: -3 or less = -5%, 0 = 0%, +4 or more = +6%, stepped in between
+    return np.select(
+        [perf <= -3, perf == -2, perf == -1, perf == 0, perf == 1, perf == 2, perf == 3],
+        [-0.05, -0.03, -0.01, 0.0, 0.012, 0.027, 0.035],
+        default=0.06,
+    )
+
+
+def goalie_game_perf(wins, shutouts, saves, shots):
+    """1 for game played, 1 for win, 1 for shutout, +1/-1 for save% > 92% / < 83%"""
+    perf = 1 + wins + shutouts
+    has_shots = shots > 0
+    save_pct = np.divide(saves, shots, out=np.zeros(len(shots), dtype=np.float64), where=has_shots)
+    perf = perf + (has_shots & (save_pct > 0.92)) - (has_shots & (save_pct < 0.83))
+    return perf
+
+
+def goalie_price_pct(perf):
+    # Map perf to price change: 0 = -5%, 1 = -2.5%, 2 = 0%, 3 = +2.5%, 4 = +5%
+    return np.select(
+        [perf <= 0, perf == 1, perf == 2, perf == 3],
+        [-0.05, -0.025, 0.0, 0.025],
+        default=0.05,
+    )
+
+
+def apply_price_change(prices, pct, min_price, max_price):
+    """int(price * (1 + pct)) clamped to [min_price, max_price]"""
+    return np.clip(truncate(prices * (1 + pct)), min_price, max_price)
+
+
+def replay_price_changes(start_prices, entity_index, step, pct, frozen, min_price, max_price):
+    """
+    Apply per-game price changes in order, one game step for all players at a time.
+
+    Args:
+        start_prices (ndarray): Current price per player
+        entity_index (ndarray): Player index of every game
+        step (ndarray): 0-based position of every game in its player's replay order
+        pct (ndarray): Price change of every game
+        frozen (ndarray): Games recorded as applied without changing the price
+        min_price, max_price (int): Price clamps
+
+    Returns:
+        tuple: (final prices, old price per game, new price per game)
+    """
+    prices = np.asarray(start_prices, dtype=np.int64).copy()
+    old_prices = np.zeros(len(entity_index), dtype=np.int64)
+    new_prices = np.zeros(len(entity_index), dtype=np.int64)
+    for current_step in range(int(step.max()) + 1 if len(step) else 0):
+        games = np.flatnonzero(step == current_step)
+        entities = entity_index[games]
+        old = prices[entities]
+        new = np.where(frozen[games], old, apply_price_change(old, pct[games], min_price, max_price))
+        old_prices[games] = old
+        new_prices[games] = new
+        prices[entities] = new
+    return prices, old_prices, new_prices
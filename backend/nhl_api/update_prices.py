@@ -2,87 +2,152 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import db, Player, Goalie, GameLog
-from sqlalchemy import desc
+from datetime import datetime, timezone
+
+import numpy as np
+from models import db, Player, Goalie, GameLog, PriceHistory
+from sqlalchemy import bindparam, func, insert, select
+from nhl_api import pricing_kernel
+import version_module  # noqa: F401 - bumps the cached data versions on writes
+from log_module import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+SKATER_PRICE_MIN, SKATER_PRICE_MAX = 100000, 700000
+GOALIE_PRICE_MIN, GOALIE_PRICE_MAX = 100000, 650000
+
+def load_logs_by_player():
+    """All game logs as (api_id, is_goalie) -> rows in chronological order, in one query"""
+    game_time = func.coalesce(GameLog.start_time_utc, GameLog.game_date)
+    rows = db.session.execute(
+        select(
+            GameLog.api_id, GameLog.is_goalie, GameLog.game_id, GameLog.goals, GameLog.assists,
+            GameLog.plus_minus, GameLog.wins, GameLog.shutouts, GameLog.saves, GameLog.shots
+        ).order_by(GameLog.api_id, GameLog.is_goalie, game_time, GameLog.game_id)
+    )
+    logs_by_player = {}
+    for row in rows:
+        logs_by_player.setdefault((row.api_id, bool(row.is_goalie)), []).append(row)
+    return logs_by_player
+
+def collect_unapplied_games(entities, is_goalie, logs_by_player, applied):
+    """
+    Flatten the games not in the ledger yet into one list, oldest first per entity.
+
+    Games up to the legacy last_price_update_game_id of an entity without ledger
+    rows were handled before the ledger existed. They are marked frozen: recorded
+    as applied without changing the price.
+
+    Returns:
+        list: (entity index, step, frozen, log row) per game
+    """
+    games = []
+    for entity_idx, entity in enumerate(entities):
+        logs = logs_by_player.get((entity.api_id, is_goalie), [])
+        legacy_until = None
+        if entity.last_price_update_game_id and not any((entity.id, is_goalie, log.game_id) in applied for log in logs):
+            legacy_until = next((idx for idx, log in enumerate(logs) if log.game_id == entity.last_price_update_game_id), None)
+        step = 0
+        for idx, log in enumerate(logs):
+            if (entity.id, is_goalie, log.game_id) in applied:
+                continue
+            games.append((entity_idx, step, legacy_until is not None and idx <= legacy_until, log))
+            step += 1
+    return games
+
+def game_column(games, name):
+    return np.array([getattr(log, name) or 0 for _, _, _, log in games], dtype=np.int64)
+
+def replay_prices(entities, is_goalie, games):
+    """
+    Replay `games` (from collect_unapplied_games) into entity prices with the vectorized kernel.
+
+    Returns:
+        tuple: (final price per entity, PriceHistory row dicts without created_at)
+    """
+    entity_index = np.array([game[0] for game in games], dtype=np.int64)
+    step = np.array([game[1] for game in games], dtype=np.int64)
+    frozen = np.array([game[2] for game in games], dtype=bool)
+    if is_goalie:
+        shots = np.array([(log.shots or 0) if log.saves is not None else 0 for _, _, _, log in games], dtype=np.int64)
+        perf = pricing_kernel.goalie_game_perf(game_column(games, "wins"), game_column(games, "shutouts"), game_column(games, "saves"), shots)
+        pct = pricing_kernel.goalie_price_pct(perf)
+        min_price, max_price = GOALIE_PRICE_MIN, GOALIE_PRICE_MAX
+    else:
+        is_defense = np.array([entity.position == 'D' for entity in entities], dtype=bool)[entity_index]
+        perf = pricing_kernel.skater_game_perf(game_column(games, "goals"), game_column(games, "assists"), game_column(games, "plus_minus"), is_defense)
+        pct = pricing_kernel.skater_price_pct(perf)
+        min_price, max_price = SKATER_PRICE_MIN, SKATER_PRICE_MAX
+
+    start_prices = np.array([entity.price for entity in entities], dtype=np.int64)
+    prices, old_prices, new_prices = pricing_kernel.replay_price_changes(
+        start_prices, entity_index, step, pct, frozen, min_price, max_price
+    )
+    ledger_rows = [
+        {
+            "player_id": entities[entity_idx].id, "is_goalie": is_goalie, "game_id": log.game_id,
+            "old_price": int(old_price), "new_price": int(new_price), "perf": int(game_perf),
+        }
+        for (entity_idx, _, _, log), old_price, new_price, game_perf in zip(games, old_prices, new_prices, perf)
+    ]
+    return prices, ledger_rows
 
 def update_prices_after_games():
-    # Update skater prices
-    players = Player.query.all()
-    for player in players:
-        print(f"Updating price for player {player.first_name} {player.last_name}")
-        latest_log = GameLog.query.filter_by(api_id=player.api_id, is_goalie=False).order_by(desc(GameLog.game_date)).first()
-        if not latest_log:
-            continue
-        if player.last_price_update_game_id == latest_log.game_id:
-            continue  # Already updated for this game
-        # Calculate performance (example: 2*goals + assists + plus_minus)
-        if player.position == 'D':
-            perf = 3 * (latest_log.goals or 0) + (latest_log.assists or 0) + (latest_log.plus_minus or 0)
-        else:
-            perf = 2 * (latest_log.goals or 0) + (latest_log.assists or 0) + (latest_log.plus_minus or 0)
-        # Map perf to price change: -3 or less = -5%, 0 = 0%, +4 or more = +5%, linear in between
-        if perf <= -3:
-            pct = -0.05
-        elif perf == -2:
-            pct = -0.03
-        elif perf == -1:
-            pct = -0.01
-        elif perf == 0:
-            pct = 0.0
-        elif perf == 1:
-            pct = 0.012
-        elif perf == 2:
-            pct = 0.027
-        elif perf == 3:
-            pct = 0.035
-        elif perf >= 4:
-            pct = 0.06
-        else:
-            pct = 0.0
-        new_price = int(player.price * (1 + pct))
-        new_price = max(100000, min(700000, new_price))
-        player.price = new_price
-        player.last_price_update_game_id = latest_log.game_id
-        
-    # Update goalie prices
-    goalies = Goalie.query.all()
-    for goalie in goalies:
-        latest_log = GameLog.query.filter_by(api_id=goalie.api_id, is_goalie=True).order_by(desc(GameLog.game_date)).first()
-        if not latest_log:
-            continue
-        if goalie.last_price_update_game_id == latest_log.game_id:
+    """
+    Move prices by every game not applied yet, in chronological order.
+
+    Game logs and the price_history ledger are loaded once. Each applied game
+    gets a ledger row, so re-running never applies a game twice and a missed
+    day is caught up on the next run. Price changes are computed for all players
+    at once, one game step at a time, and written in bulk.
+
+    Returns:
+        dict: Number of games applied and players whose price changed
+    """
+    logs_by_player = load_logs_by_player()
+    applied = {
+        (player_id, bool(is_goalie), game_id)
+        for player_id, is_goalie, game_id in db.session.execute(
+            select(PriceHistory.player_id, PriceHistory.is_goalie, PriceHistory.game_id)
+        )
+    }
+    now = datetime.now(timezone.utc)
+    ledger_rows = []
+    updates = {Player: [], Goalie: []}
+    for model, is_goalie in ((Player, False), (Goalie, True)):
+        entities = model.query.all()
+        games = collect_unapplied_games(entities, is_goalie, logs_by_player, applied)
+        if not games:
             continue
-        # Calculate goalie performance: 1 for game played, 1 for win, 1 for shutout, 1 for save% > 92%
-        perf = 1  # game played
-        perf += (latest_log.wins or 0)
-        perf += (latest_log.shutouts or 0)
-        save_pct = None
-        if latest_log.shots and latest_log.saves is not None and latest_log.shots > 0:
-            save_pct = latest_log.saves / latest_log.shots
-            if save_pct > 0.92:
-                perf += 1
-            elif save_pct < 0.83:
-                perf -= 1
-        # Map perf to price change: 0 = -5%, 1 = -2.5%, 2 = 0%, 3 = +2.5%, 4 = +5%
-        if perf <= 0:
-            pct = -0.05
-        elif perf == 1:
-            pct = -0.025
-        elif perf == 2:
-            pct = 0.0
-        elif perf == 3:
-            pct = 0.025
-        elif perf >= 4:
-            pct = 0.05
-        else:
-            pct = 0.0
-        new_price = int(goalie.price * (1 + pct))
-        new_price = max(100000, min(650000, new_price))
-        goalie.price = new_price
-        goalie.last_price_update_game_id = latest_log.game_id
+        prices, rows = replay_prices(entities, is_goalie, games)
+        for row in rows:
+            row["created_at"] = now
+        ledger_rows += rows
+        # Games are in order per entity, so the last one seen is the last applied
+        last_game_ids = {entity_idx: log.game_id for entity_idx, _, _, log in games}
+        updates[model] = [
+            {"entity_id": entities[entity_idx].id, "price": int(prices[entity_idx]), "last_game_id": last_game_id}
+            for entity_idx, last_game_id in last_game_ids.items()
+        ]
+
+    if ledger_rows:
+        db.session.execute(insert(PriceHistory), ledger_rows)
+    for model, rows in updates.items():
+        if rows:
+            table = model.__table__
+            db.session.execute(
+                table.update()
+                .where(table.c.id == bindparam("entity_id"))
+                .values(price=bindparam("price"), last_price_update_game_id=bindparam("last_game_id")),
+                rows
+            )
     db.session.commit()
+    changed = len(updates[Player]) + len(updates[Goalie])
+    logger.info("Applied %d games to prices of %d players and goalies", len(ledger_rows), changed)
+    return {"games": len(ledger_rows), "players": changed}
 
 if __name__ == "__main__":
+    setup_logging()
     from flask import Flask
     from config import Config
     from db import db_engine as db
@@ -90,13 +155,13 @@ if __name__ == "__main__":
     app.config.from_object(Config)
     db.init_app(app)
     with app.app_context():
-        print("--- Updating player and goalie prices ---")
+        logger.info("Updating player and goalie prices")
         update_prices_after_games()
-        print("--- Prices updated successfully! ---")
+        logger.info("Prices updated successfully")
         # Optionally, you can also run the following to see the updated prices
         players = Player.query.all()
         for player in players:
-            print(f"{player.first_name} {player.last_name}: {player.initial_price} -> ${player.price}")
+            logger.debug("%s %s: %s -> $%s", player.first_name, player.last_name, player.initial_price, player.price)
         goalies = Goalie.query.all()
         for goalie in goalies:
-            print(f"{goalie.first_name} {goalie.last_name}: {goalie.initial_price} - > ${goalie.price}")
+            logger.debug("%s %s: %s -> $%s", goalie.first_name, goalie.last_name, goalie.initial_price, goalie.price)
@@ -0,0 +1,139 @@
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from log_module import get_logger
+
+logger = get_logger(__name__)
+
+# Longest statement text kept in slow request logs and the per route stats
+STATEMENT_PREVIEW_LENGTH = 300
+
+
+class QueryProfiler:
+    """
+    Opt-in per request SQL instrumentation (PROFILER_ENABLED).
+
+    When enabled, cursor execute hooks count the queries and the time spent in the
+    database during each request. Responses get a Server-Timing header, requests slower
+    than PROFILER_SLOW_MS are logged with their most expensive statements and totals are
+    kept per route for the admin endpoint. When disabled no hooks are installed at all.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 500
+        self.top_statements = 5
+        self.local = threading.local()
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("PROFILER_ENABLED", False)
+        self.slow_ms = app.config.get("PROFILER_SLOW_MS", 500)
+        self.top_statements = app.config.get("PROFILER_TOP_STATEMENTS", 5)
+        app.extensions["query_profiler"] = self
+        if not self.enabled:
+            return
+        event.listen(Engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self.after_cursor_execute)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.clear_request)
+        logger.info("SQL profiler enabled, logging requests slower than %s ms", self.slow_ms)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self.local, "profile", None) is not None:
+            conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = getattr(self.local, "profile", None)
+        if profile is None or not conn.info.get("profiler_start"):
+            return
+        elapsed = time.perf_counter() - conn.info["profiler_start"].pop()
+        profile["queries"] += 1
+        profile["db_time"] += elapsed
+        counts = profile["statements"].setdefault(statement, [0, 0.0])
+        counts[0] += 1
+        counts[1] += elapsed
+
+    def start_request(self):
+        self.local.profile = {"started": time.perf_counter(), "queries": 0, "db_time": 0.0, "statements": {}}
+
+    def clear_request(self, exc=None):
+        self.local.profile = None
+
+    def finish_request(self, response):
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            return response
+        total_ms = (time.perf_counter() - profile["started"]) * 1000
+        db_ms = profile["db_time"] * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;desc="{profile["queries"]} queries";dur={db_ms:.1f}, app;dur={total_ms - db_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        top = self.top(profile["statements"])
+        self.record(route, total_ms, db_ms, profile["queries"], top)
+        if total_ms >= self.slow_ms:
+            logger.warning(
+                "Slow request %s: %.1f ms, %d queries, %.1f ms in the database", route, total_ms, profile["queries"], db_ms,
+                extra={"path": request.full_path, "durationMs": round(total_ms, 1), "queries": profile["queries"], "dbMs": round(db_ms, 1), "topStatements": top}
+            )
+        return response
+
+    def top(self, statements):
+        """The most expensive statements of a request, by total time"""
+        ranked = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:self.top_statements]
+        return [
+            {
+                "statement": " ".join(statement.split())[:STATEMENT_PREVIEW_LENGTH],
+                "count": count,
+                "totalMs": round(elapsed * 1000, 2),
+            }
+            for statement, (count, elapsed) in ranked
+        ]
+
+    def record(self, route, total_ms, db_ms, queries, top):
+        with self.lock:
+            stats = self.routes.setdefault(route, {
+                "requests": 0, "totalMs": 0.0, "maxMs": 0.0, "dbMs": 0.0, "queries": 0, "maxQueries": 0, "slowest": None,
+            })
+            stats["requests"] += 1
+            stats["totalMs"] += total_ms
+            stats["dbMs"] += db_ms
+            stats["queries"] += queries
+            stats["maxQueries"] = max(stats["maxQueries"], queries)
+            if total_ms > stats["maxMs"]:
+                stats["maxMs"] = total_ms
+                stats["slowest"] = top
+
+    def get_stats(self):
+        """Per route totals of this worker, the routes taking the most time in total first"""
+        with self.lock:
+            routes = {route: dict(stats) for route, stats in self.routes.items()}
+        result = []
+        for route, stats in sorted(routes.items(), key=lambda item: item[1]["totalMs"], reverse=True):
+            requests = stats["requests"]
+            result.append({
+                "route": route,
+                "requests": requests,
+                "avgMs": round(stats["totalMs"] / requests, 2),
+                "maxMs": round(stats["maxMs"], 2),
+                "avgDbMs": round(stats["dbMs"] / requests, 2),
+                "avgQueries": round(stats["queries"] / requests, 2),
+                "maxQueries": stats["maxQueries"],
+                "slowestTopStatements": stats["slowest"],
+            })
+        return {"enabled": self.enabled, "slowThresholdMs": self.slow_ms, "routes": result}
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+query_profiler = QueryProfiler()
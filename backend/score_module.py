@@ -1,157 +1,271 @@
-from models import Pick, MatchupResult, UserPoints, db
+from models import Pick, BracketPickItem, MatchupResult, UserPoints, LineupPick, LineupSlotHistory, Player, GameLog, Prediction, db
 import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from datetime import datetime, timezone
 from flask import Flask
+from sqlalchemy import and_, bindparam, case, delete, func, insert, inspect, or_, select, text
 from config import Config
+from version_module import POINTS_VERSION_KEY, bump_data_version
+from stats_module import get_current_standings, standings_cache
+from log_module import SAMPLED, debug_sampled, get_logger, setup_logging
 
-def calculate_bracket_points(user_id):
+logger = get_logger(__name__)
+
+ROUND1_CODES = ["W1", "W2", "W3", "W4", "E1", "E2", "E3", "E4"]
+ROUND2_CODES = ["w-semi", "w-semi2", "e-semi", "e-semi2"]
+ROUND3_CODES = ["west-final", "east-final"]
+FINAL_CODES = ["cup"]
+
+# Points per correct series winner, the same amount again for the correct number of games
+ROUND_POINTS = {"round1": 2, "round2": 4, "round3": 8, "final": 16}
+ROUND_BY_CODE = {
+    **{code: "round1" for code in ROUND1_CODES},
+    **{code: "round2" for code in ROUND2_CODES},
+    **{code: "round3" for code in ROUND3_CODES},
+    **{code: "final" for code in FINAL_CODES},
+}
+BRACKET_COLUMNS = [f"bracket_{round_key}_{kind}" for round_key in ROUND_POINTS for kind in ("correct", "points")]
+# matchup_code -> (correct column, points column, points per correct winner)
+CODE_COLUMNS = {
+    code: (f"bracket_{round_key}_correct", f"bracket_{round_key}_points", ROUND_POINTS[round_key])
+    for code, round_key in ROUND_BY_CODE.items()
+}
+
+def parse_bracket_picks(picks_data):
     """
-    Calculate points for a user's bracket predictions and update the UserPoints table.
-    
+    Flatten the picks JSON saved by the bracket page.
+
     Args:
-        user_id (int): The user ID to calculate points for
-        
+        picks_data (dict): Parsed Pick.picks_json
+
     Returns:
-        int: Total points earned from bracket predictions
+        dict: matchup_code -> {"winner": team, "games": games} for every matchup with a pick
     """
-    # Get the user's picks
-    user_picks = Pick.query.filter_by(user_id=user_id).first()
-    if not user_picks:
-        print(f"No picks found for user_id {user_id}")
-        return 0
-        
-    try:
-        # Parse the JSON data
-        picks_data = json.loads(user_picks.picks_json)
-    except json.JSONDecodeError:
-        print(f"Invalid JSON data for user_id {user_id}")
-        return 0
-    
-    # Get all actual results
-    all_results = MatchupResult.query.all()
-    results_by_code = {result.matchup_code: result for result in all_results}
-    
-    # Dictionary to store user predictions (winner and games) for each matchup
     user_predictions = {}
-    
-    # Process Round 1
+
+    def add(code, winner, games):
+        if winner:  # Only add if a prediction was made
+            user_predictions[code] = {"winner": winner, "games": games}
+
     round1 = picks_data.get("round1", {})
     round1_games = picks_data.get("round1Games", {})
-    for code in ["W1", "W2", "W3", "W4", "E1", "E2", "E3", "E4"]:
-        winner = round1.get(code)
-        games = round1_games.get(code)
-        if winner:  # Only add if a prediction was made
-            user_predictions[code] = {
-                "winner": winner,
-                "games": games
-            }
-    
-    # Process Round 2
+    for code in ROUND1_CODES:
+        add(code, round1.get(code), round1_games.get(code))
+
     round2 = picks_data.get("round2", {})
     round2_games = picks_data.get("round2Games", {})
-    for code in ["w-semi", "w-semi2", "e-semi", "e-semi2"]:
-        winner_key = f"{code}-winner"
-        winner = round2.get(winner_key)
-        games = round2_games.get(code)
-        if winner:  # Only add if a prediction was made
-            user_predictions[code] = {
-                "winner": winner,
-                "games": games
-            }
-    
-    # Process Round 3
+    for code in ROUND2_CODES:
+        add(code, round2.get(f"{code}-winner"), round2_games.get(code))
+
     round3 = picks_data.get("round3", {})
     round3_games = picks_data.get("round3Games", {})
-    for code in ["west-final", "east-final"]:
-        winner_key = f"{code}-winner"
-        winner = round3.get(winner_key)
-        games = round3_games.get(code)
-        if winner:  # Only add if a prediction was made
-            user_predictions[code] = {
-                "winner": winner,
-                "games": games
-            }
-    
-    # Process Final
-    final = picks_data.get("final", {})
-    final_games = picks_data.get("finalGames", {})
-    winner = final.get("cup-winner")
-    games = final_games.get("cup")
-    if winner:  # Only add if a prediction was made
-        user_predictions["cup"] = {
-            "winner": winner,
-            "games": games
-        }
-    
-    # Track points and correct picks by round
-    round1_correct = 0
-    round1_points = 0
-    round2_correct = 0
-    round2_points = 0
-    round3_correct = 0
-    round3_points = 0
-    final_correct = 0
-    final_points = 0
-    
-    # Calculate points
-    total_points = 0
-    print(f"Bracket scoring for user_id {user_id}:")
-    print("-" * 80)
-    print(f"{'Matchup':<10} {'Actual Winner':<15} {'Actual Games':<12} {'User Pick':<15} {'User Games':<10} {'Points'}")
-    print("-" * 80)
-    
+    for code in ROUND3_CODES:
+        add(code, round3.get(f"{code}-winner"), round3_games.get(code))
+
+    add("cup", picks_data.get("final", {}).get("cup-winner"), picks_data.get("finalGames", {}).get("cup"))
+    return user_predictions
+
+def parse_games(games):
+    """Series length as stored in bracket_pick_items, None if missing or not a number"""
+    try:
+        return int(games) if games is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def pick_item_rows(user_id, picks_data):
+    """BracketPickItem row dicts for a user's parsed picks JSON"""
+    return [
+        {"user_id": user_id, "matchup_code": code, "winner": prediction["winner"], "games": parse_games(prediction["games"])}
+        for code, prediction in parse_bracket_picks(picks_data).items()
+    ]
+
+def sync_pick_items(user_id, picks_data):
+    """
+    Replace a user's BracketPickItem rows with the picks in picks_data. Does not commit.
+
+    Returns:
+        int: Number of pick items written
+    """
+    db.session.execute(delete(BracketPickItem).where(BracketPickItem.user_id == user_id))
+    rows = pick_item_rows(user_id, picks_data)
+    if rows:
+        db.session.execute(insert(BracketPickItem), rows)
+    return len(rows)
+
+def backfill_pick_items():
+    """
+    Derive BracketPickItem rows for users whose picks were saved before the table existed.
+    Cheap when there is nothing to do, the scorers call it before reading pick items. Does not commit.
+
+    Returns:
+        int: Number of users backfilled
+    """
+    have_items = select(BracketPickItem.user_id).distinct()
+    rows = []
+    seen_users = set()
+    for user_id, picks_json in db.session.execute(
+        select(Pick.user_id, Pick.picks_json).where(Pick.user_id.not_in(have_items)).order_by(Pick.id)
+    ):
+        if user_id in seen_users:
+            continue  # Only the first pick row counts, like Pick.query.filter_by(user_id).first()
+        seen_users.add(user_id)
+        try:
+            rows.extend(pick_item_rows(user_id, json.loads(picks_json)))
+        except json.JSONDecodeError:
+            logger.warning("Invalid JSON data for user_id %s", user_id)
+    if rows:
+        db.session.execute(insert(BracketPickItem), rows)
+        logger.info("Backfilled %d bracket pick items for %d users", len(rows), len(seen_users))
+    return len(seen_users)
+
+def get_user_pick_items(user_id):
+    """
+    Load a user's picks from bracket_pick_items, falling back to Pick.picks_json if they are not there yet.
+
+    Returns:
+        dict: matchup_code -> {"winner": team, "games": games}, or None if the user has no valid picks
+    """
+    rows = db.session.execute(
+        select(BracketPickItem.matchup_code, BracketPickItem.winner, BracketPickItem.games)
+        .where(BracketPickItem.user_id == user_id)
+    ).all()
+    if rows:
+        return {code: {"winner": winner, "games": games} for code, winner, games in rows}
+
+    user_picks = Pick.query.filter_by(user_id=user_id).first()
+    if not user_picks:
+        return None
+    try:
+        picks_data = json.loads(user_picks.picks_json)
+    except json.JSONDecodeError:
+        logger.warning("Invalid JSON data for user_id %s", user_id)
+        return None
+    return {row["matchup_code"]: {"winner": row["winner"], "games": row["games"]} for row in pick_item_rows(user_id, picks_data)}
+
+def ensure_user_points_columns():
+    """
+    Add the bracket_scored column to user_points tables created before it was added to the model,
+    the same change as the migration for deployments that start without `flask db upgrade`.
+    Run once at startup, does not commit.
+    """
+    inspector = inspect(db.session.connection())
+    if not inspector.has_table(UserPoints.__tablename__):
+        return  # create_all builds the table with the column
+    columns = {column["name"] for column in inspector.get_columns(UserPoints.__tablename__)}
+    if "bracket_scored" not in columns:
+        # Existing rows stay unmarked, rescore_matchups recounts them in full the first time
+        db.session.execute(text("ALTER TABLE user_points ADD COLUMN bracket_scored BOOLEAN NOT NULL DEFAULT FALSE"))
+
+def bracket_score_query(user_ids=None):
+    """
+    One row per user with picks: user_id followed by every BRACKET_COLUMNS value and the total,
+    aggregated in SQL over bracket_pick_items joined to matchup_results.
+    """
+    item = BracketPickItem.__table__
+    result = MatchupResult.__table__
+    winner_correct = item.c.winner == result.c.winner
+    games_correct = and_(winner_correct, item.c.games == result.c.games)
+    columns = []
+    total = 0
+    for round_key, points_to_give in ROUND_POINTS.items():
+        in_round = item.c.matchup_code.in_([code for code, key in ROUND_BY_CODE.items() if key == round_key])
+        points = func.sum(case(
+            (and_(in_round, games_correct), 2 * points_to_give),
+            (and_(in_round, winner_correct), points_to_give),
+            else_=0,
+        ))
+        columns.append(func.sum(case((and_(in_round, winner_correct), 1), else_=0)).label(f"bracket_{round_key}_correct"))
+        columns.append(points.label(f"bracket_{round_key}_points"))
+        total = total + points
+    query = (
+        select(item.c.user_id, *columns, total.label("bracket_total_points"))
+        .select_from(item.outerjoin(result, result.c.matchup_code == item.c.matchup_code))
+        .group_by(item.c.user_id)
+    )
+    if user_ids is not None:
+        query = query.where(item.c.user_id.in_(list(user_ids)))
+    return query
+
+def score_pick(matchup_code, winner, games, result):
+    """
+    Score a single matchup pick against a (winner, games) result tuple.
+
+    Returns:
+        tuple: (correct, points) where correct is 0 or 1
+    """
+    if not result or result[0] != winner:
+        return 0, 0
+    points_to_give = CODE_COLUMNS[matchup_code][2]
+    if result[1] == games:
+        return 1, 2 * points_to_give
+    return 1, points_to_give
+
+def score_bracket(user_predictions, results_by_code):
+    """
+    Score flattened picks against results.
+
+    Args:
+        user_predictions (dict): Output of parse_bracket_picks
+        results_by_code (dict): matchup_code -> (winner, games)
+
+    Returns:
+        dict: UserPoints bracket column values, including bracket_total_points
+    """
+    values = dict.fromkeys(BRACKET_COLUMNS, 0)
+    total = 0
     for matchup_code, prediction in user_predictions.items():
-        actual_result = results_by_code.get(matchup_code)
-
-        if matchup_code == "cup":
-            points_to_give = 16
-        elif matchup_code in ["west-final", "east-final"]:
-            points_to_give = 8
-        elif matchup_code in ["w-semi", "w-semi2", "e-semi", "e-semi2"]:
-            points_to_give = 4
-        else:
-            points_to_give = 2
-        
-        points = 0
-        actual_winner = "N/A"
-        actual_games = "N/A"
+        result = results_by_code.get(matchup_code)
+        if not result or result[0] != prediction["winner"] or matchup_code not in CODE_COLUMNS:
+            continue
+        correct_column, points_column, points_to_give = CODE_COLUMNS[matchup_code]
+        points = 2 * points_to_give if result[1] == prediction["games"] else points_to_give
+        values[correct_column] += 1
+        values[points_column] += points
+        total += points
+    values["bracket_total_points"] = total
+    return values
+
+def load_results_by_code():
+    """Load all matchup results in one query as matchup_code -> (winner, games)"""
+    rows = db.session.query(MatchupResult.matchup_code, MatchupResult.winner, MatchupResult.games).all()
+    return {code: (winner, games) for code, winner, games in rows}
+
+def log_bracket_scoring(user_id, user_predictions, results_by_code):
+    """Debug trace of a user's bracket as a table, built only when DEBUG is enabled for this module and sampled"""
+    if not debug_sampled(logger):
+        return
+    lines = [f"{'Matchup':<10} {'Actual Winner':<15} {'Actual Games':<12} {'User Pick':<15} {'User Games':<10} {'Points'}"]
+    for matchup_code, prediction in user_predictions.items():
+        actual_winner, actual_games = results_by_code.get(matchup_code, ("N/A", "N/A"))
+        _, points = score_pick(matchup_code, prediction["winner"], prediction["games"], results_by_code.get(matchup_code))
+        lines.append(f"{matchup_code:<10} {actual_winner:<15} {actual_games:<12} {prediction['winner']:<15} {prediction['games']:<10} {points}")
+    logger.debug("Bracket scoring for user_id %s:\n%s", user_id, "\n".join(lines), extra=SAMPLED)
+
+def calculate_bracket_points(user_id):
+    """
+    Calculate points for a user's bracket predictions and update the UserPoints table.
+    
+    Args:
+        user_id (int): The user ID to calculate points for
         
-        if actual_result:
-            actual_winner = actual_result.winner
-            actual_games = actual_result.games
-            
-            # Check if winner is correct
-            if actual_result.winner == prediction["winner"]:
-                points += points_to_give
-                
-                # Track correct picks by round
-                if matchup_code == "cup":
-                    final_correct = 1
-                elif matchup_code in ["west-final", "east-final"]:
-                    round3_correct += 1
-                elif matchup_code in ["w-semi", "w-semi2", "e-semi", "e-semi2"]:
-                    round2_correct += 1
-                else:  # Round 1
-                    round1_correct += 1
-                
-                # Check if games is also correct
-                if actual_result.games == prediction["games"]:
-                    points += points_to_give
-                    
-            # Add points to the appropriate round total
-            if matchup_code == "cup":
-                final_points = points
-            elif matchup_code in ["west-final", "east-final"]:
-                round3_points += points
-            elif matchup_code in ["w-semi", "w-semi2", "e-semi", "e-semi2"]:
-                round2_points += points
-            else:  # Round 1
-                round1_points += points
-                    
-        print(f"{matchup_code:<10} {actual_winner:<15} {actual_games:<12} {prediction['winner']:<15} {prediction['games']:<10} {points}")
-        total_points += points
+    Returns:
+        int: Total points earned from bracket predictions
+    """
+    # Get the user's picks
+    user_predictions = get_user_pick_items(user_id)
+    if user_predictions is None:
+        logger.debug("No picks found for user_id %s", user_id)
+        return 0
+
+    # Get all actual results
+    results_by_code = load_results_by_code()
+    values = score_bracket(user_predictions, results_by_code)
     
-    print("-" * 80)
-    print(f"Total bracket points: {total_points}")
+    log_bracket_scoring(user_id, user_predictions, results_by_code)
+    total_points = values["bracket_total_points"]
     
     # Record points in the UserPoints table
     user_points = UserPoints.query.filter_by(user_id=user_id).first()
@@ -161,86 +275,569 @@ def calculate_bracket_points(user_id):
         db.session.add(user_points)
     
     # Update bracket points
-    user_points.bracket_round1_correct = round1_correct
-    user_points.bracket_round1_points = round1_points
-    
-    user_points.bracket_round2_correct = round2_correct
-    user_points.bracket_round2_points = round2_points
-    
-    user_points.bracket_round3_correct = round3_correct
-    user_points.bracket_round3_points = round3_points
-    
-    user_points.bracket_final_correct = final_correct
-    user_points.bracket_final_points = final_points
-    
-    # Save changes to the database
-    db.session.commit()
+    for column, value in values.items():
+        setattr(user_points, column, value)
+    user_points.bracket_scored = True
 
     # Update total points
     user_points.update_total_points()
+    bump_data_version(POINTS_VERSION_KEY)
 
-    # Save changes to the database again :D
+    # Save changes to the database
     db.session.commit()
 
-    print(f"Updated UserPoints record for user_id {user_id}")
-    print(f"Round 1: {round1_correct} correct, {round1_points} points")
-    print(f"Round 2: {round2_correct} correct, {round2_points} points")
-    print(f"Round 3: {round3_correct} correct, {round3_points} points")
-    print(f"Finals: {final_correct} correct, {final_points} points")
-    print(f"Total bracket points: {user_points.bracket_total_points}")
-    print(f"Total points across all games: {user_points.total_points}")
+    logger.debug(
+        "Updated UserPoints of user_id %s: bracket points by round %s/%s/%s/%s, bracket total %s, total %s",
+        user_id, user_points.bracket_round1_points, user_points.bracket_round2_points, user_points.bracket_round3_points,
+        user_points.bracket_final_points, user_points.bracket_total_points, user_points.total_points
+    )
     
     return total_points
 
-def calculate_lineup_points(user_id):
+def score_all_brackets():
+    """
+    Recalculate bracket points for every user with picks in one pass.
+
+    Points are aggregated in SQL over bracket_pick_items, and the UserPoints
+    rows that changed are written with one executemany UPDATE (plus one bulk
+    INSERT for users without a row) inside a single transaction. Every written
+    row is marked bracket_scored.
+
+    Returns:
+        dict: Counts of scored users and updated/created UserPoints rows
+    """
+    backfill_pick_items()
+    table = UserPoints.__table__
+    columns = BRACKET_COLUMNS + ["bracket_total_points"]
+    existing_points = {}
+    for row in db.session.execute(select(
+        table.c.id, table.c.user_id, table.c.lineup_total_points, table.c.predictions_total_points,
+        table.c.total_points, table.c.bracket_scored, *[table.c[column] for column in columns]
+    )):
+        existing_points[row[1]] = (row[0], (row[2] or 0) + (row[3] or 0), row[4], row[5], tuple(row[6:]))
+
+    scores = {row[0]: tuple(int(value or 0) for value in row[1:]) for row in db.session.execute(bracket_score_query())}
+    # Users who saved picks without a single winner still get a zero row
+    zero = (0,) * len(columns)
+    for (user_id,) in db.session.execute(select(Pick.user_id).distinct()):
+        scores.setdefault(user_id, zero)
+
+    now = datetime.now(timezone.utc)
+    updates, inserts = [], []
+    for user_id, score in scores.items():
+        values = dict(zip(columns, score))
+        existing = existing_points.get(user_id)
+        if existing is None:
+            values["total_points"] = values["bracket_total_points"]
+            values["user_id"] = user_id
+            values["bracket_scored"] = True
+            values["updated_at"] = now
+            inserts.append(values)
+            continue
+        points_id, other_points, total_points, scored, current = existing
+        values["total_points"] = values["bracket_total_points"] + other_points
+        if scored and current == score and total_points == values["total_points"]:
+            continue  # Nothing changed for this user
+        values["points_id"] = points_id
+        values["updated_at"] = now
+        updates.append(values)
+
+    if updates:
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("points_id"))
+            .values({**{column: bindparam(column) for column in columns + ["total_points", "updated_at"]}, "bracket_scored": True})
+        )
+        db.session.execute(stmt, updates)
+    if inserts:
+        db.session.execute(insert(UserPoints), inserts)
+    if updates or inserts:
+        bump_data_version(POINTS_VERSION_KEY)
+    db.session.commit()
+    logger.info("Scored %d brackets: %d updated, %d created", len(scores), len(updates), len(inserts))
+    return {"users": len(scores), "updated": len(updates), "created": len(inserts)}
+
+def result_tuple(winner, games):
+    """Normalise a matchup result to the (winner, games) tuple used by the scorers"""
+    return (winner, int(games) if games is not None else None)
+
+def rescore_matchups(changes):
+    """
+    Apply the point delta of changed matchup results to UserPoints without a full recount.
+
+    Only users whose pick on a changed matchup is affected get an UPDATE, which
+    adds the difference between the old and the new score for that matchup.
+    Users without a bracket scored UserPoints row (none at all, or one created by
+    lineup or prediction scoring) are scored from scratch instead. Does not commit.
+
+    Args:
+        changes (dict): matchup_code -> (old_result, new_result), each a (winner, games) tuple or None
+
+    Returns:
+        dict: Counts of updated and created UserPoints rows
+    """
+    changes = {code: change for code, change in changes.items() if code in CODE_COLUMNS and change[0] != change[1]}
+    if not changes:
+        return {"updated": 0, "created": 0}
+
+    backfill_pick_items()
+    deltas = {}
+    pickers = set()
+    item = BracketPickItem.__table__
+    picks = db.session.execute(
+        select(item.c.user_id, item.c.matchup_code, item.c.winner, item.c.games)
+        .where(item.c.matchup_code.in_(list(changes)))
+        .execution_options(yield_per=1000)
+    )
+    for user_id, code, winner, games in picks:
+        pickers.add(user_id)
+        old_result, new_result = changes[code]
+        old_correct, old_points = score_pick(code, winner, games, old_result)
+        new_correct, new_points = score_pick(code, winner, games, new_result)
+        if (old_correct, old_points) == (new_correct, new_points):
+            continue
+        correct_column, points_column, _ = CODE_COLUMNS[code]
+        delta = deltas.setdefault(user_id, dict.fromkeys(BRACKET_COLUMNS, 0))
+        delta[correct_column] += new_correct - old_correct
+        delta[points_column] += new_points - old_points
+
+    table = UserPoints.__table__
+    # Unscored rows of pickers without a delta still miss their earlier results
+    scored_by_user = dict(db.session.execute(
+        select(table.c.user_id, table.c.bracket_scored).where(table.c.user_id.in_(list(pickers)))
+    ).all())
+    unscored = [user_id for user_id, scored in scored_by_user.items() if not scored]
+    if not deltas and not unscored:
+        return {"updated": 0, "created": 0}
+
+    now = datetime.now(timezone.utc)
+    updates = []
+    missing = []
+    for user_id, delta in deltas.items():
+        if user_id not in scored_by_user:
+            missing.append(user_id)
+            continue
+        if not scored_by_user[user_id]:
+            continue
+        params = {f"d_{column}": value for column, value in delta.items()}
+        params["d_total"] = sum(delta[column] for column in BRACKET_COLUMNS if column.endswith("_points"))
+        params["uid"] = user_id
+        params["now"] = now
+        updates.append(params)
+
+    if updates:
+        increments = {column: func.coalesce(table.c[column], 0) + bindparam(f"d_{column}") for column in BRACKET_COLUMNS}
+        increments["bracket_total_points"] = func.coalesce(table.c.bracket_total_points, 0) + bindparam("d_total")
+        increments["total_points"] = func.coalesce(table.c.total_points, 0) + bindparam("d_total")
+        increments["updated_at"] = bindparam("now")
+        db.session.execute(table.update().where(table.c.user_id == bindparam("uid")).values(increments), updates)
+
+    # Never bracket scored before, a delta has nothing to apply to
+    columns = BRACKET_COLUMNS + ["bracket_total_points"]
+    if unscored:
+        recounts = []
+        for row in db.session.execute(bracket_score_query(unscored)):
+            values = dict(zip(columns, (int(value or 0) for value in row[1:])))
+            values.update(uid=row[0], now=now)
+            recounts.append(values)
+        full = {column: bindparam(column) for column in columns}
+        full["total_points"] = (
+            bindparam("bracket_total_points") + func.coalesce(table.c.lineup_total_points, 0)
+            + func.coalesce(table.c.predictions_total_points, 0)
+        )
+        full["bracket_scored"] = True
+        full["updated_at"] = bindparam("now")
+        db.session.execute(table.update().where(table.c.user_id == bindparam("uid")).values(full), recounts)
+        updates += recounts
+
+    if missing:
+        inserts = []
+        for row in db.session.execute(bracket_score_query(missing)):
+            values = dict(zip(columns, (int(value or 0) for value in row[1:])))
+            values.update(user_id=row[0], total_points=values["bracket_total_points"], bracket_scored=True, updated_at=now)
+            inserts.append(values)
+        db.session.execute(insert(UserPoints), inserts)
+        missing = inserts
+
+    bump_data_version(POINTS_VERSION_KEY)
+    logger.info("Rescored matchups %s: %d users updated, %d created", sorted(changes), len(updates), len(missing))
+    return {"updated": len(updates), "created": len(missing)}
+
+# Summed over the game logs of each owned player, after a leading games count
+LINEUP_STAT_COLUMNS = ("goals", "assists", "plus_minus", "wins", "shutouts", "saves", "shots")
+SAVE_PCT_BONUS_THRESHOLD = 0.92
+
+def as_utc_naive(value):
+    """GameLog times are naive UTC, lineup timestamps may come back timezone aware"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def parse_lineup_slots(lineup):
+    """Return {slot: id} with int ids for the filled slots of a lineup dict"""
+    slots = {}
+    for slot, player_id in lineup.items():
+        try:
+            if player_id:
+                slots[slot] = int(player_id)
+        except (TypeError, ValueError):
+            continue
+    return slots
+
+def lineup_history_rows(lineup_pick):
+    """Open LineupSlotHistory row dicts for a stored lineup, valid since it was last saved"""
+    try:
+        lineup = parse_lineup_slots(json.loads(lineup_pick.lineup_json))
+    except (json.JSONDecodeError, AttributeError):
+        logger.warning("Invalid lineup JSON for user_id %s", lineup_pick.user_id)
+        return []
+    valid_from = as_utc_naive(lineup_pick.updated_at or lineup_pick.created_at)
+    return [
+        {"user_id": lineup_pick.user_id, "slot": slot, "player_id": player_id,
+         "is_goalie": slot == 'G', "valid_from": valid_from, "valid_to": None}
+        for slot, player_id in lineup.items()
+    ]
+
+def record_lineup_history(user_id, lineup, changed_at=None):
+    """
+    Close the ownership interval of every slot whose player changed and open one for the new player.
+    Does not commit.
+
+    Args:
+        user_id (int): Lineup owner, call before the stored LineupPick is overwritten
+        lineup (dict): slot -> player/goalie id as saved by the lineup page
+        changed_at (datetime): When the change takes effect, defaults to now
+    """
+    changed_at = as_utc_naive(changed_at or datetime.now(timezone.utc))
+    if not LineupSlotHistory.query.filter_by(user_id=user_id).first():
+        # Lineup saved before the history existed, it has been owned since it was last saved
+        lineup_pick = LineupPick.query.filter_by(user_id=user_id).first()
+        if lineup_pick:
+            for row in lineup_history_rows(lineup_pick):
+                db.session.add(LineupSlotHistory(**row))
+            db.session.flush()
+    open_slots = {row.slot: row for row in LineupSlotHistory.query.filter_by(user_id=user_id, valid_to=None)}
+    new_slots = parse_lineup_slots(lineup)
+    for slot in set(open_slots) | set(new_slots):
+        current = open_slots.get(slot)
+        player_id = new_slots.get(slot)
+        if current and current.player_id == player_id:
+            continue
+        if current:
+            current.valid_to = changed_at
+        if player_id:
+            db.session.add(LineupSlotHistory(
+                user_id=user_id, slot=slot, player_id=player_id, is_goalie=slot == 'G', valid_from=changed_at
+            ))
+
+def backfill_lineup_history():
+    """
+    Open ownership intervals for lineups saved before lineup_slot_history existed, starting
+    when the lineup was last saved. Does not commit.
+
+    Returns:
+        int: Number of users backfilled
+    """
+    have_history = select(LineupSlotHistory.user_id).distinct()
+    rows = []
+    seen_users = set()
+    for lineup_pick in LineupPick.query.filter(LineupPick.user_id.not_in(have_history)).order_by(LineupPick.id):
+        if lineup_pick.user_id in seen_users:
+            continue  # Only the first lineup row counts, like LineupPick.query.filter_by(user_id).first()
+        seen_users.add(lineup_pick.user_id)
+        rows += lineup_history_rows(lineup_pick)
+    if rows:
+        db.session.execute(insert(LineupSlotHistory), rows)
+        logger.info("Backfilled %d lineup slot intervals for %d users", len(rows), len(seen_users))
+    return len(seen_users)
+
+def lineup_interval_query(user_ids=None):
+    """
+    Game log totals per (user, player, is_goalie) over the games that started while the
+    user owned the player, joined on the (player_id, is_goalie, start_time_utc) index.
+    Logs whose start time could not be resolved fall back to the game date.
     """
-    Calculate points for a user's lineup based on playoff stats and update UserPoints.
+    history = LineupSlotHistory.__table__
+    logs = GameLog.__table__
+    game_time = func.coalesce(logs.c.start_time_utc, logs.c.game_date)
+    owned = and_(
+        logs.c.player_id == history.c.player_id,
+        logs.c.is_goalie == history.c.is_goalie,
+        game_time > history.c.valid_from,
+        or_(history.c.valid_to.is_(None), game_time <= history.c.valid_to),
+    )
+    query = (
+        select(
+            history.c.user_id, history.c.player_id, history.c.is_goalie, func.count(logs.c.id),
+            *[func.sum(logs.c[column]) for column in LINEUP_STAT_COLUMNS]
+        )
+        .select_from(history.join(logs, owned))
+        .group_by(history.c.user_id, history.c.player_id, history.c.is_goalie)
+    )
+    if user_ids is not None:
+        query = query.where(history.c.user_id.in_(list(user_ids)))
+    return query
+
+def score_player_games(is_goalie, position, stats):
+    """
+    Score the summed games one lineup player was owned for.
     Forwards: 2*goals + assists + plus_minus
     Defenders: 3*goals + assists + plus_minus
     Goalies: 1/game played + 1/win + 1/shutout + 1 if save% > 92%
     """
-    from models import Player, Goalie, UserPoints, db
-    lineup_pick = None
-    try:
-        lineup_pick = db.session.query(db.classes.lineup_picks).filter_by(user_id=user_id).first()
-    except Exception:
-        # fallback for direct import
-        from models import LineupPick
-        lineup_pick = LineupPick.query.filter_by(user_id=user_id).first()
-    if not lineup_pick:
-        print(f"No lineup for user {user_id}")
+    games, goals, assists, plus_minus, wins, shutouts, saves, shots = (value or 0 for value in stats)
+    if is_goalie:
+        points = games + wins + shutouts
+        if shots and saves / shots > SAVE_PCT_BONUS_THRESHOLD:
+            points += 1
+        return points
+    if position in ("L", "C", "R"):
+        return 2 * goals + assists + plus_minus
+    if position == "D":
+        return 3 * goals + assists + plus_minus
+    return 0
+
+def load_player_positions(player_ids=None):
+    query = select(Player.id, Player.position)
+    if player_ids is not None:
+        query = query.where(Player.id.in_(list(player_ids)))
+    return {player_id: position for player_id, position in db.session.execute(query)}
+
+def score_lineup_intervals(user_ids=None):
+    """
+    Returns:
+        dict: user_id -> lineup points for every user with at least one owned game
+    """
+    rows = db.session.execute(lineup_interval_query(user_ids)).all()
+    positions = load_player_positions({row[1] for row in rows if not row[2]})
+    scores = {}
+    for user_id, player_id, is_goalie, *stats in rows:
+        scores[user_id] = scores.get(user_id, 0) + score_player_games(is_goalie, positions.get(player_id), stats)
+    return scores
+
+def calculate_lineup_points_from_gamelogs(user_id):
+    """
+    Calculate a user's lineup points from GameLog, counting each player's games only
+    while the player was in the user's lineup, and update UserPoints.
+
+    Returns:
+        int: Total lineup points
+    """
+    if not LineupPick.query.filter_by(user_id=user_id).first():
+        logger.debug("No lineup for user %s", user_id)
         return 0
-    lineup = json.loads(lineup_pick.lineup_json)
-    total_points = 0
-    for slot, player_id in lineup.items():
-        if not player_id:
-            continue
-        if slot == 'G':
-            goalie = Goalie.query.get(player_id)
-            if goalie:
-                total_points += (goalie.playoff_gp or 0)
-                total_points += (goalie.playoff_wins or 0)
-                total_points += (goalie.playoff_shutouts or 0)
-                if goalie.playoff_save_pct and goalie.playoff_save_pct > 0.92:
-                    total_points += 1
-        else:
-            player = Player.query.get(player_id)
-            if player:
-                if player.position in ("L", "C", "R"):
-                    total_points += 2 * (player.playoff_goals or 0) + (player.playoff_assists or 0) + (player.playoff_plus_minus or 0)
-                elif player.position == "D":
-                    total_points += 3 * (player.playoff_goals or 0) + (player.playoff_assists or 0) + (player.playoff_plus_minus or 0)
+    backfill_lineup_history()
+    total_points = score_lineup_intervals([user_id]).get(user_id, 0)
+
     user_points = UserPoints.query.filter_by(user_id=user_id).first()
     if not user_points:
         user_points = UserPoints(user_id=user_id)
         db.session.add(user_points)
     user_points.lineup_total_points = total_points
     user_points.update_total_points()
+    bump_data_version(POINTS_VERSION_KEY)
     db.session.commit()
-    print(f"Updated lineup points for user {user_id}: {total_points}")
     return total_points
 
+def score_all_lineups():
+    """
+    Recalculate lineup points for every user from GameLog in one pass.
+
+    One aggregate query joins the lineup ownership intervals against GameLog,
+    and the changed UserPoints rows are written in bulk.
+
+    Returns:
+        dict: Counts of scored lineups and updated/created UserPoints rows
+    """
+    backfill_lineup_history()
+    scores = score_lineup_intervals()
+    # Users whose players have not played while owned still get a zero row
+    for (user_id,) in db.session.execute(select(LineupPick.user_id).distinct()):
+        scores.setdefault(user_id, 0)
+
+    table = UserPoints.__table__
+    existing_points = {}
+    for row in db.session.execute(select(
+        table.c.id, table.c.user_id, table.c.lineup_total_points, table.c.bracket_total_points,
+        table.c.predictions_total_points, table.c.total_points
+    )):
+        existing_points[row[1]] = (row[0], row[2], (row[3] or 0) + (row[4] or 0), row[5])
+
+    now = datetime.now(timezone.utc)
+    updates, inserts = [], []
+    for user_id, lineup_points in scores.items():
+        existing = existing_points.get(user_id)
+        if existing is None:
+            inserts.append({
+                "user_id": user_id, "lineup_total_points": lineup_points,
+                "total_points": lineup_points, "updated_at": now,
+            })
+            continue
+        points_id, current, other_points, total_points = existing
+        if current == lineup_points and total_points == lineup_points + other_points:
+            continue  # Nothing changed for this user
+        updates.append({
+            "points_id": points_id, "lineup_total_points": lineup_points,
+            "total_points": lineup_points + other_points, "updated_at": now,
+        })
+
+    if updates:
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("points_id"))
+            .values({column: bindparam(column) for column in ("lineup_total_points", "total_points", "updated_at")})
+        )
+        db.session.execute(stmt, updates)
+    if inserts:
+        db.session.execute(insert(UserPoints), inserts)
+    if updates or inserts:
+        bump_data_version(POINTS_VERSION_KEY)
+    db.session.commit()
+    logger.info("Scored %d lineups: %d updated, %d created", len(scores), len(updates), len(inserts))
+    return {"users": len(scores), "updated": len(updates), "created": len(inserts)}
+
+PREDICTION_ROUND_COLUMNS = {
+    1: "predictions_r1_points",
+    2: "predictions_r2_points",
+    3: "predictions_r3_points",
+    4: "predictions_final_points",
+}
+
+# Worker processes for score_all_predictions, the pool is only worth starting for many users
+PREDICTION_SCORING_PROCESSES = int(os.environ.get("PREDICTION_SCORING_PROCESSES", 1))
+PREDICTION_POOL_MIN_USERS = 20000
+
+def score_prediction_chunk(predictions, category_ids):
+    """
+    Count each user's picks that are in the current top 3 of their category, compared by id.
+    A module level function so a process pool can run it.
+
+    Args:
+        predictions (list): (user_id, predictions_json) tuples
+        category_ids (dict): category -> set of leader ids
+
+    Returns:
+        list: (user_id, points) tuples
+    """
+    scored = []
+    for user_id, predictions_json in predictions:
+        predictions_data = json.loads(predictions_json)
+        points = 0
+        for category, leader_ids in category_ids.items():
+            for pick in predictions_data.get(category, []):
+                pick_id = pick.get('id') if isinstance(pick, dict) else None
+                if pick_id and pick_id in leader_ids:
+                    points += 1
+        scored.append((user_id, points))
+    return scored
+
+def score_predictions(predictions, category_ids, processes):
+    if processes <= 1 or len(predictions) < PREDICTION_POOL_MIN_USERS:
+        return score_prediction_chunk(predictions, category_ids)
+    chunk_size = -(-len(predictions) // processes)
+    chunks = [predictions[start:start + chunk_size] for start in range(0, len(predictions), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return [item for chunk in executor.map(score_prediction_chunk, chunks, repeat(category_ids)) for item in chunk]
+
+def score_all_predictions(round_num, processes=None):
+    """
+    Award the top 3 prediction points of one round to every user with predictions.
+
+    Predictions and UserPoints are preloaded with one query each, the leader id sets
+    are built once, and the changed rows are written in bulk.
+
+    Args:
+        round_num (int): 1-4, selects the predictions_*_points column
+        processes (int): Worker processes, defaults to PREDICTION_SCORING_PROCESSES
+
+    Returns:
+        dict: Row counts and timings in seconds
+    """
+    round_column = PREDICTION_ROUND_COLUMNS[round_num]
+    started = time.perf_counter()
+    # Score against the stored standings, not what this worker saw up to a version check ago
+    standings_cache.invalidate()
+    category_ids = {
+        category: {leader['id'] for leader in standing["leaders"]}
+        for category, standing in get_current_standings().items()
+    }
+    predictions = {}
+    for user_id, predictions_json in db.session.execute(
+        select(Prediction.user_id, Prediction.predictions_json).order_by(Prediction.id)
+    ):
+        predictions.setdefault(user_id, predictions_json)
+    table = UserPoints.__table__
+    bracket_columns = ("bracket_round1_points", "bracket_round2_points", "bracket_round3_points", "bracket_final_points")
+    existing_points = {
+        row.user_id: row
+        for row in db.session.execute(select(
+            table.c.id, table.c.user_id, table.c.lineup_total_points, table.c.bracket_total_points,
+            table.c.predictions_total_points, table.c.total_points,
+            *[table.c[column] for column in PREDICTION_ROUND_COLUMNS.values()],
+            *[table.c[column] for column in bracket_columns]
+        ))
+    }
+    loaded = time.perf_counter()
+
+    scored = score_predictions(list(predictions.items()), category_ids, processes or PREDICTION_SCORING_PROCESSES)
+    scored_at = time.perf_counter()
+
+    now = datetime.now(timezone.utc)
+    updates, inserts = [], []
+    for user_id, round_points in scored:
+        existing = existing_points.get(user_id)
+        if existing is None:
+            inserts.append({
+                "user_id": user_id, round_column: round_points, "predictions_total_points": round_points,
+                "total_points": round_points, "updated_at": now,
+            })
+            continue
+        predictions_total = sum(
+            round_points if column == round_column else (getattr(existing, column) or 0)
+            for column in PREDICTION_ROUND_COLUMNS.values()
+        )
+        # Same totals as UserPoints.update_total_points
+        bracket_total = sum(getattr(existing, column) or 0 for column in bracket_columns)
+        total_points = bracket_total + (existing.lineup_total_points or 0) + predictions_total
+        if (getattr(existing, round_column) == round_points and existing.predictions_total_points == predictions_total
+                and existing.bracket_total_points == bracket_total and existing.total_points == total_points):
+            continue  # Nothing changed for this user
+        updates.append({
+            "points_id": existing.id, "round_points": round_points, "predictions_total_points": predictions_total,
+            "bracket_total_points": bracket_total, "total_points": total_points, "updated_at": now,
+        })
+
+    if updates:
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("points_id"))
+            .values({
+                round_column: bindparam("round_points"),
+                **{column: bindparam(column) for column in ("predictions_total_points", "bracket_total_points", "total_points", "updated_at")},
+            })
+        )
+        db.session.execute(stmt, updates)
+    if inserts:
+        db.session.execute(insert(UserPoints), inserts)
+    if updates or inserts:
+        bump_data_version(POINTS_VERSION_KEY)
+    db.session.commit()
+    finished = time.perf_counter()
+    logger.info("Scored round %s predictions of %d users: %d updated, %d created in %.2fs", round_num, len(scored), len(updates), len(inserts), finished - started)
+    return {
+        "users": len(scored),
+        "updated": len(updates),
+        "created": len(inserts),
+        "timings": {
+            "load": round(loaded - started, 4),
+            "score": round(scored_at - loaded, 4),
+            "write": round(finished - scored_at, 4),
+            "total": round(finished - started, 4),
+        },
+    }
+
 if __name__ == "__main__":
+    setup_logging()
     # Create Flask app
     app = Flask(__name__)
     app.config.from_object(Config)
@@ -250,5 +847,5 @@ if __name__ == "__main__":
     with app.app_context():
         # Example usage
         user_id = 3  # Replace with actual user ID
-        points = calculate_lineup_points(user_id)
-        print(f"User {user_id} earned {points} points from their lineup.")
+        points = calculate_lineup_points_from_gamelogs(user_id)
+        logger.info("User %s earned %s points from their lineup.", user_id, points)
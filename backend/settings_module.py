@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from models import Setting
+from db import db_engine as db
+from log_module import get_logger
+from version_module import SETTINGS_VERSION_KEY, VersionedCache, bump_data_version
+
+logger = get_logger(__name__)
+
+PLAYOFF_DEADLINE_KEY = 'playoff_deadline'
+GRACE_PERIOD_END_KEY = 'grace_period_end'
+
+# Used only if the setting is not in the database
+DEFAULT_DEADLINE = datetime(2025, 4, 20, 0, 0, 0, tzinfo=timezone.utc)
+DEFAULT_GRACE_PERIOD_END = datetime(2025, 4, 24, 4, 0, 0, tzinfo=timezone.utc)  # 24.4.2025 07:00 UTC+3 == 04:00 UTC
+
+SETTING_DESCRIPTIONS = {
+    PLAYOFF_DEADLINE_KEY: 'Deadline for playoff bracket, lineup, and predictions submissions',
+    GRACE_PERIOD_END_KEY: 'End of the grace period after the deadline when lineup changes are disabled',
+}
+
+
+def load_settings():
+    """The whole settings table as {key: value}"""
+    return dict(db.session.execute(select(Setting.key, Setting.value)).all())
+
+
+# Other workers see a changed setting within VERSION_CHECK_INTERVAL, the writing worker right away
+settings_cache = VersionedCache(SETTINGS_VERSION_KEY, load_settings)
+
+
+def get_setting(key, default=None):
+    """Get a setting value from the in-memory copy of the settings table"""
+    return settings_cache.get()[1].get(key, default)
+
+
+def set_setting(key, value, description=None):
+    """
+    Insert or update a setting and bump the settings version so every worker reloads them.
+    Does not commit.
+    """
+    setting = Setting.query.filter_by(key=key).first()
+    if not setting:
+        setting = Setting(key=key, value=value, description=description or SETTING_DESCRIPTIONS.get(key))
+        db.session.add(setting)
+    else:
+        setting.value = value
+    bump_data_version(SETTINGS_VERSION_KEY)
+    return setting
+
+
+def add_setting_default(key, value):
+    """
+    Store a default for a setting the in-memory copy does not have, only if the row is really
+    missing from the database: the copy can be a version check behind, and a value another
+    worker stored since then must not be overwritten. Commits.
+
+    Returns:
+        str: The value in the database afterwards
+    """
+    stored = db.session.query(Setting.value).filter_by(key=key).scalar()
+    if stored is None:
+        try:
+            db.session.add(Setting(key=key, value=value, description=SETTING_DESCRIPTIONS.get(key)))
+            bump_data_version(SETTINGS_VERSION_KEY)
+            db.session.commit()
+            return value
+        except IntegrityError:
+            # Another worker inserted it first, theirs wins
+            db.session.rollback()
+            stored = db.session.query(Setting.value).filter_by(key=key).scalar()
+    settings_cache.invalidate()
+    return stored
+
+
+def get_datetime_setting(key, default):
+    """
+    Get a datetime setting stored in ISO format. A setting missing from the database is stored with the default value.
+
+    Returns:
+        datetime: The stored datetime, or default if it is invalid
+    """
+    value = get_setting(key)
+    if value is None:
+        value = add_setting_default(key, default.isoformat())
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        logger.warning("Invalid %s format in database: %s", key, value)
+        return default
+
+
+def get_deadline():
+    return get_datetime_setting(PLAYOFF_DEADLINE_KEY, DEFAULT_DEADLINE)
+
+
+def get_grace_period_end():
+    return get_datetime_setting(GRACE_PERIOD_END_KEY, DEFAULT_GRACE_PERIOD_END)
@@ -1,114 +1,265 @@
-from models import Player, Goalie, Prediction
+from datetime import datetime, timezone
+from models import Player, Goalie, Prediction, PredictionSummary
 from db import db_engine as db
+from sqlalchemy import bindparam, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from version_module import STATS_VERSION_KEY, VersionedCache
+from log_module import get_logger
+import heapq
 import json
 
-def get_penalty_leaders():
-    """Get the current playoff penalty minute leaders"""
-    print("Fetching penalty leaders...")
-    players = Player.query.order_by(Player.playoff_penalty_minutes.desc()).limit(3).all()
-    print(f"Found penalty leaders: {[f'{p.first_name} {p.last_name} ({p.playoff_penalty_minutes} PIM)' for p in players]}")
-    return players
-
-def get_goal_leaders():
-    """Get the current playoff goal leaders"""
-    print("Fetching goal leaders...")
-    players = Player.query.order_by(Player.playoff_goals.desc()).limit(3).all()
-    print(f"Found goal leaders: {[f'{p.first_name} {p.last_name} ({p.playoff_goals} goals)' for p in players]}")
-    return players
-
-def get_defense_point_leaders():
-    """Get the current playoff point leaders among defensemen"""
-    print("Fetching defense point leaders...")
-    defensemen = Player.query.filter_by(position='D').order_by(Player.playoff_points.desc()).limit(3).all()
-    print(f"Found defense leaders: {[f'{p.first_name} {p.last_name} ({p.playoff_points} points)' for p in defensemen]}")
-    return defensemen
-
-def get_u23_point_leaders():
-    """Get the current playoff point leaders among U23 players"""
-    print("Fetching U23 point leaders...")
-    young_players = Player.query.filter_by(is_U23=True).order_by(Player.playoff_points.desc()).limit(3).all()
-    print(f"Found U23 leaders: {[f'{p.first_name} {p.last_name} ({p.playoff_points} points)' for p in young_players]}")
-    return young_players
-
-def get_goalie_win_leaders():
-    """Get the current playoff win leaders among goalies"""
-    print("Fetching goalie win leaders...")
-    goalies = Goalie.query.order_by(Goalie.playoff_wins.desc()).limit(3).all()
-    print(f"Found goalie leaders: {[f'{g.first_name} {g.last_name} ({g.playoff_wins} wins)' for g in goalies]}")
-    return goalies
-
-def get_finnish_point_leaders():
-    """Get the current playoff point leaders among Finnish players"""
-    print("Fetching Finnish point leaders...")
-    finns = Player.query.filter_by(birth_country='FIN').order_by(Player.playoff_points.desc()).limit(3).all()
-    print(f"Found Finnish leaders: {[f'{p.first_name} {p.last_name} ({p.playoff_points} points)' for p in finns]}")
-    return finns
+logger = get_logger(__name__)
 
-def get_current_standings():
-    """Get current standings for all prediction categories"""
-    print("\nGetting current standings for all categories...")
-    standings = {
-        "penaltyMinutes": get_penalty_leaders(),
-        "goals": get_goal_leaders(),
-        "defensePoints": get_defense_point_leaders(),
-        "U23Points": get_u23_point_leaders(),
-        "goalieWins": get_goalie_win_leaders(),
-        "finnishPoints": get_finnish_point_leaders()
+TOP_N = 3
+
+# (category, model, stat column, filter) in the order the categories are shown
+STANDINGS_CATEGORIES = [
+    ("penaltyMinutes", Player, "playoff_penalty_minutes", None),
+    ("goals", Player, "playoff_goals", None),
+    ("defensePoints", Player, "playoff_points", lambda row: row.position == 'D'),
+    ("U23Points", Player, "playoff_points", lambda row: bool(row.is_U23)),
+    ("goalieWins", Goalie, "playoff_wins", None),
+    ("finnishPoints", Player, "playoff_points", lambda row: row.birth_country == 'FIN'),
+]
+
+PLAYER_COLUMNS = [
+    Player.id, Player.first_name, Player.last_name, Player.team_abbr, Player.position, Player.is_U23,
+    Player.birth_country, Player.price, Player.reg_gp, Player.reg_goals, Player.reg_assists, Player.reg_points,
+    Player.reg_plus_minus, Player.reg_penalty_minutes, Player.playoff_goals, Player.playoff_points,
+    Player.playoff_penalty_minutes,
+]
+GOALIE_COLUMNS = [
+    Goalie.id, Goalie.first_name, Goalie.last_name, Goalie.team_abbr, Goalie.position, Goalie.is_U23,
+    Goalie.price, Goalie.reg_gp, Goalie.reg_gaa, Goalie.reg_save_pct, Goalie.reg_shutouts, Goalie.reg_wins,
+    Goalie.playoff_wins,
+]
+
+def serialize_player(row, value):
+    return {
+        'id': row.id,
+        'firstName': row.first_name,
+        'lastName': row.last_name,
+        'team': row.team_abbr,
+        'position': row.position,
+        'isU23': row.is_U23,
+        'price': row.price,
+        'reg_gp': row.reg_gp,
+        'reg_goals': row.reg_goals,
+        'reg_assists': row.reg_assists,
+        'reg_points': row.reg_points,
+        'reg_plus_minus': row.reg_plus_minus,
+        'reg_penalty_minutes': row.reg_penalty_minutes,
+        'playoff_goals': 0,
+        'playoff_assists': 0,
+        'playoff_points': 0,
+        'playoff_plus_minus': 0,
+        'value': value,
     }
-    print("\nFinal standings dictionary keys:", standings.keys())
-    for category, leaders in standings.items():
-        print(f"\n{category} leaders: {[f'{p.first_name} {p.last_name}' for p in leaders]}")
+
+def serialize_goalie(row, value):
+    return {
+        'id': row.id,
+        'firstName': row.first_name,
+        'lastName': row.last_name,
+        'team': row.team_abbr,
+        'position': row.position,
+        'isU23': row.is_U23,
+        'price': row.price,
+        'reg_gp': row.reg_gp,
+        'reg_gaa': row.reg_gaa,
+        'reg_save_pct': row.reg_save_pct,
+        'reg_shutouts': row.reg_shutouts,
+        'reg_wins': row.reg_wins,
+        'value': value,
+    }
+
+def rank_key(value, entity_id):
+    """Highest value first, missing values last, ties broken by the lower id"""
+    return (value is None, -(value or 0), entity_id)
+
+def build_standings():
+    """
+    Compute the top 3 of every prediction category with one scan of the players and one of the goalies.
+
+    Returns:
+        dict: category -> {"leaders": [top 3 entries], "tiedAtThird": [entries outside the top 3
+              with the same value as the 3rd]}, entries are dicts in API format with a "value" key
+    """
+    rows_by_model = {
+        Player: db.session.execute(select(*PLAYER_COLUMNS)).all(),
+        Goalie: db.session.execute(select(*GOALIE_COLUMNS)).all(),
+    }
+    candidates = {category: [] for category, _, _, _ in STANDINGS_CATEGORIES}
+    for model, rows in rows_by_model.items():
+        categories = [(category, column, keep) for category, cat_model, column, keep in STANDINGS_CATEGORIES if cat_model is model]
+        for row in rows:
+            for category, column, keep in categories:
+                if keep is None or keep(row):
+                    value = getattr(row, column)
+                    candidates[category].append((rank_key(value, row.id), value, row))
+
+    standings = {}
+    for category, model, _, _ in STANDINGS_CATEGORIES:
+        serialize = serialize_goalie if model is Goalie else serialize_player
+        leaders = heapq.nsmallest(TOP_N, candidates[category], key=lambda candidate: candidate[0])
+        tied = []
+        if len(leaders) == TOP_N and leaders[-1][1] is not None:
+            third_value = leaders[-1][1]
+            leader_ids = {row.id for _, _, row in leaders}
+            tied = sorted(
+                (candidate for candidate in candidates[category]
+                 if candidate[1] == third_value and candidate[2].id not in leader_ids),
+                key=lambda candidate: candidate[0]
+            )
+        standings[category] = {
+            "leaders": [serialize(row, value) for _, value, row in leaders],
+            "tiedAtThird": [serialize(row, value) for _, value, row in tied],
+        }
     return standings
 
-def get_user_predictions_summary(user_id):
-    """Get a user's predictions and compare them with current standings"""
-    # Get the user's predictions
-    prediction = Prediction.query.filter_by(user_id=user_id).first()
-    if not prediction:
-        return None
+standings_cache = VersionedCache(STATS_VERSION_KEY, build_standings)
 
+def get_current_standings():
+    """
+    Get current standings for all prediction categories, rebuilt only when player or goalie stats changed.
+    The returned dict is shared between requests and must not be modified.
+
+    Returns:
+        dict: category -> {"leaders": [...], "tiedAtThird": [...]}, see build_standings
+    """
+    return standings_cache.get()[1]
+
+def count_correct_picks(user_picks, leaders):
+    """Picks found in the leaders: legacy string picks compare by name, dict picks by id"""
+    correct_picks = 0
+    for pick in user_picks:
+        if isinstance(pick, str):
+            correct_picks += sum(1 for p in leaders if f"{p['firstName']} {p['lastName']}" == pick)
+        else:
+            correct_picks += sum(1 for p in leaders if p['id'] == pick.get('id'))
+    return correct_picks
+
+def summarize_predictions(predictions_data, standings):
+    """
+    Compare one user's predictions with the standings.
+
+    Returns:
+        tuple: ([{"name", "userPicks", "correctPicks"}, ...], total correct, completed categories)
+    """
+    categories = []
+    total_correct = 0
+    completed = 0
+    for category, standing in standings.items():
+        if category not in predictions_data:
+            continue
+        user_picks = predictions_data[category]
+        if isinstance(user_picks, list):
+            user_picks = user_picks[:3]  # Get top 3 picks
+        correct_picks = count_correct_picks(user_picks, standing["leaders"])
+        categories.append({"name": category, "userPicks": user_picks, "correctPicks": correct_picks})
+        total_correct += correct_picks
+        # Update completed count if we have actual standings
+        if standing["leaders"]:
+            completed += 1
+    return categories, total_correct, completed
+
+def refresh_prediction_summaries(version, standings):
+    """
+    Recompute the PredictionSummary of every user whose row is missing or older than `version`,
+    with one query for the stale predictions and bulk writes. Predictions that cannot be parsed
+    get an empty summary, so the user's requests do not refresh again until the stats change. Commits.
+
+    Returns:
+        int: Number of refreshed users
+    """
+    stale = db.session.execute(
+        select(Prediction.user_id, Prediction.predictions_json, PredictionSummary.id.label("summary_id"))
+        .outerjoin(PredictionSummary, PredictionSummary.user_id == Prediction.user_id)
+        .where(or_(PredictionSummary.id.is_(None), PredictionSummary.stats_version < version))
+        .order_by(Prediction.id)
+    ).all()
+    now = datetime.now(timezone.utc)
+    updates = []
+    inserts = []
+    seen = set()
+    for row in stale:
+        if row.user_id in seen:
+            continue
+        seen.add(row.user_id)
+        try:
+            predictions_data = json.loads(row.predictions_json)
+        except ValueError:
+            predictions_data = None
+        if isinstance(predictions_data, dict):
+            categories, total_correct, completed = summarize_predictions(predictions_data, standings)
+        else:
+            logger.warning("Invalid predictions of user %s, storing an empty summary", row.user_id)
+            categories, total_correct, completed = [], 0, 0
+        values = {
+            "stats_version": version, "categories_json": json.dumps(categories),
+            "total_correct": total_correct, "completed": completed, "updated_at": now,
+        }
+        if row.summary_id is None:
+            inserts.append({"user_id": row.user_id, **values})
+        else:
+            updates.append({"summary_id": row.summary_id, **values})
+
+    if updates:
+        table = PredictionSummary.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == bindparam("summary_id"))
+            .values({column: bindparam(column) for column in ("stats_version", "categories_json", "total_correct", "completed", "updated_at")}),
+            updates
+        )
+    if inserts:
+        db.session.execute(insert(PredictionSummary), inserts)
     try:
-        predictions_data = json.loads(prediction.predictions_json)
-        current_standings = get_current_standings()
-        print(f"\nUser predictions: {predictions_data}")
-        print(f"\nCurrent standings: {current_standings}")
-        
-        # Initialize summary structure
-        summary = {
-            "completed": 0,
-            "totalToComplete": len(current_standings) * 3,  # 3 picks per category
-            "categories": [],
-            "totalCorrect": 0
+        db.session.commit()
+    except IntegrityError:
+        # Another worker inserted the same users' rows first, theirs are just as fresh
+        db.session.rollback()
+        return 0
+    return len(updates) + len(inserts)
+
+def summary_json(summary, standings):
+    """Join a PredictionSummary row with the standings into the response body"""
+    categories = [
+        {
+            "name": category["name"],
+            "userPicks": category["userPicks"],
+            "currentTop3": standings[category["name"]]["leaders"],
+            "tiedAtThird": standings[category["name"]]["tiedAtThird"],
+            "correctPicks": category["correctPicks"],
         }
-        
-        # Process each category
-        for category, curr_top3 in current_standings.items():
-            if category in predictions_data:
-                user_picks = predictions_data[category][:3]  # Get user's top 3 picks
-                
-                # Count correct picks by comparing names
-                correct_picks = sum(1 for pick in user_picks if any(
-                    pick == f"{p.first_name} {p.last_name}" 
-                    for p in curr_top3
-                ))
-                
-                category_summary = {
-                    "name": category,
-                    "userPicks": user_picks,
-                    "currentTop3": curr_top3,  # Keep the full player objects
-                    "correctPicks": correct_picks
-                }
-                
-                summary["categories"].append(category_summary)
-                summary["totalCorrect"] += correct_picks
-                
-                # Update completed count if we have actual standings
-                if curr_top3:
-                    summary["completed"] += 1
-        
-        print(summary)
-        return summary
-        
-    except Exception as e:
-        print(f"Error processing predictions: {str(e)}")
-        return None
\ No newline at end of file
+        for category in json.loads(summary.categories_json)
+    ]
+    return json.dumps({
+        "completed": summary.completed,
+        "totalToComplete": len(standings) * 3,  # 3 picks per category
+        "categories": categories,
+        "totalCorrect": summary.total_correct,
+    })
+
+def get_user_predictions_summary(user_id):
+    """
+    Get a user's predictions compared with the current standings.
+
+    Summaries older than the current standings are refreshed for all users at once,
+    after that a request is one PredictionSummary row joined with the cached standings.
+
+    Returns:
+        str: The summary as a JSON document, None if the user has no predictions
+    """
+    version, standings = standings_cache.get()
+    summary = PredictionSummary.query.filter_by(user_id=user_id).first()
+    if summary and summary.stats_version > version:
+        # Another worker already refreshed against newer standings, catch up with it
+        standings_cache.invalidate()
+        version, standings = standings_cache.get()
+    if not summary or summary.stats_version < version:
+        refresh_prediction_summaries(version, standings)
+        summary = PredictionSummary.query.filter_by(user_id=user_id).first()
+    if not summary:
+        return None
+    return summary_json(summary, standings)
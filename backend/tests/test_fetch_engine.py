@@ -0,0 +1,186 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import socket
+import threading
+import time
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nhl_api.fetch_engine import FetchEngine, TokenBucket
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the NHL API:
+
+    /slow/<n>       200 {"n": n} after DELAY seconds
+    /missing        404
+    /bad-json       200 with a body that is not JSON
+    /flaky/<n>      503 for the first n requests to that path, then 200
+    /down           always 503
+    """
+
+    DELAY = 0.1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            hits = server.hits[self.path]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            parts = self.path.strip("/").split("/")
+            if parts[0] == "slow":
+                time.sleep(self.DELAY)
+                self.reply(200, json.dumps({"n": int(parts[1])}))
+            elif parts[0] == "bad-json":
+                self.reply(200, "<html>not json</html>")
+            elif parts[0] == "flaky":
+                if hits <= int(parts[1]):
+                    self.reply(503, "{}")
+                else:
+                    self.reply(200, json.dumps({"attempts": hits}))
+            elif parts[0] == "down":
+                self.reply(503, "{}")
+            else:
+                self.reply(404, "{}")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, body):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.hits = Counter()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def test_fetch_all_runs_workers_concurrently(self):
+        engine = FetchEngine(workers=4, rate=0)
+        start = time.perf_counter()
+        results = list(engine.fetch_all(range(12), lambda n: self.url(f"/slow/{n}")))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sorted(item for item, _, _ in results), list(range(12)))
+        for item, data, error in results:
+            self.assertIsNone(error)
+            self.assertEqual(data, {"n": item})
+        self.assertEqual(self.server.max_in_flight, 4)
+        # 12 requests of 0.1s serially take 1.2s, 4 workers need three rounds
+        self.assertLess(elapsed, 12 * StubHandler.DELAY * 0.75)
+
+    def test_worker_count_bounds_concurrency(self):
+        engine = FetchEngine(workers=2, rate=0)
+        list(engine.fetch_all(range(8), lambda n: self.url(f"/slow/{n}")))
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    def test_rate_limit_spaces_requests(self):
+        engine = FetchEngine(workers=8, rate=20, burst=1)
+        start = time.perf_counter()
+        results = list(engine.fetch_all(range(10), lambda n: self.url(f"/missing?{n}")))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), 10)
+        # One token up front, the other nine refill at 20/s
+        self.assertGreaterEqual(elapsed, 9 / 20 * 0.9)
+        self.assertLessEqual(engine.stats.requests_per_second, 20 * 1.1)
+
+    def test_token_bucket_allows_burst_then_refills(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.05)
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_http_errors_are_returned_without_retry(self):
+        engine = FetchEngine(workers=1, rate=0, retries=2, backoff=0)
+        data, error = engine.get_json(self.url("/missing"))
+        self.assertIsNone(data)
+        self.assertEqual(error, "HTTP 404")
+        self.assertEqual(self.server.hits["/missing"], 1)
+
+        data, error = engine.get_json(self.url("/bad-json"))
+        self.assertIsNone(data)
+        self.assertTrue(error.startswith("Invalid JSON"))
+        self.assertEqual(self.server.hits["/bad-json"], 1)
+        self.assertEqual((engine.stats.requests, engine.stats.failures, engine.stats.retries), (2, 2, 0))
+
+    def test_server_errors_are_retried(self):
+        engine = FetchEngine(workers=1, rate=0, retries=2, backoff=0)
+        data, error = engine.get_json(self.url("/flaky/2"))
+        self.assertIsNone(error)
+        self.assertEqual(data, {"attempts": 3})
+        self.assertEqual((engine.stats.requests, engine.stats.failures, engine.stats.retries), (3, 2, 2))
+
+    def test_retries_give_up_with_the_last_error(self):
+        engine = FetchEngine(workers=1, rate=0, retries=1, backoff=0.05)
+        start = time.perf_counter()
+        data, error = engine.get_json(self.url("/down"))
+        self.assertIsNone(data)
+        self.assertEqual(error, "HTTP 503")
+        self.assertEqual(self.server.hits["/down"], 2)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_connection_errors_are_retried(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        engine = FetchEngine(workers=1, rate=0, retries=2, backoff=0, timeout=2)
+        data, error = engine.get_json(f"http://127.0.0.1:{closed_port}/slow/1")
+        self.assertIsNone(data)
+        self.assertTrue(error)
+        self.assertEqual((engine.stats.requests, engine.stats.failures, engine.stats.retries), (3, 3, 2))
+
+    def test_stats_count_a_mixed_run(self):
+        engine = FetchEngine(workers=4, rate=0, retries=1, backoff=0)
+        paths = ["/slow/1", "/slow/2", "/missing", "/bad-json", "/flaky/1", "/down"]
+        results = {item: (data, error) for item, data, error in engine.fetch_all(paths, self.url)}
+        engine.stats.finish()
+
+        self.assertEqual([path for path in paths if results[path][1] is None], ["/slow/1", "/slow/2", "/flaky/1"])
+        # /flaky/1 and /down take two attempts each
+        self.assertEqual(engine.stats.requests, 8)
+        self.assertEqual(engine.stats.failures, 5)
+        self.assertEqual(engine.stats.retries, 2)
+        self.assertGreater(engine.stats.requests_per_second, 0)
+        self.assertIn("8 requests (5 failed, 2 retried)", engine.stats.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
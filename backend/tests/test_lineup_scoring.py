@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+
+from db import db_engine as db
+from models import User, Player, Goalie, GameLog, LineupPick, UserPoints
+from score_module import (
+    backfill_lineup_history, calculate_lineup_points_from_gamelogs, lineup_interval_query, load_player_positions,
+    record_lineup_history, score_all_lineups, score_player_games,
+)
+
+SAVED = datetime(2025, 4, 18, 12, 0)   # Lineups saved before the playoffs
+SWAPPED = datetime(2025, 4, 26, 12, 0)  # User 1 swaps the center mid-playoffs
+DAY = timedelta(days=1)
+
+# Player and goalie ids overlap on purpose, the two tables are separate
+CENTER, NEW_CENTER, DEFENDER = 1, 2, 3
+GOALIE = 1
+
+
+def game_log(player_id, game, start, is_goalie=False, game_date=None, **stats):
+    return {
+        "player_id": player_id, "api_id": 8470000 + player_id + (100 if is_goalie else 0), "is_goalie": is_goalie,
+        "game_id": f"2024030{game:03d}", "game_date": game_date or start.replace(hour=0), "start_time_utc": start,
+        "team": "EDM", "opponent": "LAK", "player_name": f"Player {player_id}", **stats,
+    }
+
+
+class LineupScoringTest(unittest.TestCase):
+    """
+    User 1 owns CENTER until SWAPPED and NEW_CENTER after it, user 2 keeps CENTER.
+    Expected points per owned player, by hand:
+
+    CENTER for user 1:   game 1 (1 G, 1 A, +1) = 2 + 1 + 1 = 4, game 3 is after the swap
+    CENTER for user 2:   games 1 and 3 (2 G) = 4 + 4 = 8
+    NEW_CENTER:          game 4 (1 G, 2 A, -1) = 2 + 2 - 1 = 3, game 2 is before the swap
+    DEFENDER:            game 5 without a start time, dated after SAVED (1 G, 1 A) = 3 + 1 = 4,
+                         game 6 without a start time is dated before SAVED
+    GOALIE:              2 games + 1 win + 1 shutout + save% 47/50 = 0.94 > 0.92 bonus = 5
+    """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        db.session.execute(insert(User), [
+            {"id": user_id, "username": f"user{user_id}", "team_name": f"Team {user_id}", "password_hash": "x", "registration_code": "TEST"}
+            for user_id in (1, 2)
+        ])
+        db.session.execute(insert(Player), [
+            {"id": player_id, "api_id": 8470000 + player_id, "first_name": "Player", "last_name": str(player_id), "team_abbr": "EDM", "position": position}
+            for player_id, position in ((CENTER, "C"), (NEW_CENTER, "C"), (DEFENDER, "D"))
+        ])
+        db.session.execute(insert(Goalie), [
+            {"id": GOALIE, "api_id": 8470101, "first_name": "Goalie", "last_name": "1", "team_abbr": "EDM", "position": "G"}
+        ])
+        lineup = {"C": CENTER, "LD": DEFENDER, "G": GOALIE}
+        db.session.execute(insert(LineupPick), [
+            {"user_id": user_id, "lineup_json": json.dumps(lineup), "created_at": SAVED} for user_id in (1, 2)
+        ])
+        db.session.execute(insert(GameLog), [
+            game_log(CENTER, 1, SAVED + 2 * DAY, goals=1, assists=1, plus_minus=1),
+            game_log(CENTER, 3, SWAPPED + DAY, goals=2),
+            game_log(NEW_CENTER, 2, SWAPPED - DAY, goals=1),
+            game_log(NEW_CENTER, 4, SWAPPED + 2 * DAY, goals=1, assists=2, plus_minus=-1),
+            game_log(DEFENDER, 5, None, game_date=SAVED + 3 * DAY, goals=1, assists=1),
+            game_log(DEFENDER, 6, None, game_date=SAVED - 2 * DAY, goals=3),
+            game_log(GOALIE, 1, SAVED + 2 * DAY, is_goalie=True, wins=1, shutouts=1, saves=30, shots=30),
+            game_log(GOALIE, 3, SWAPPED + DAY, is_goalie=True, saves=17, shots=20, goals_against=3),
+        ])
+        db.session.commit()
+
+        record_lineup_history(1, {**lineup, "C": NEW_CENTER}, changed_at=SWAPPED)
+        backfill_lineup_history()  # User 2 never saved again, the scorers open its intervals
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def player_points(self, user_id):
+        """(player_id, is_goalie) -> points over the owned games"""
+        rows = db.session.execute(lineup_interval_query([user_id])).all()
+        positions = load_player_positions()
+        return {
+            (player_id, is_goalie): score_player_games(is_goalie, positions.get(player_id), stats)
+            for _, player_id, is_goalie, *stats in rows
+        }
+
+    def test_points_per_owned_player(self):
+        self.assertEqual(self.player_points(1), {
+            (CENTER, False): 4,
+            (NEW_CENTER, False): 3,
+            (DEFENDER, False): 4,
+            (GOALIE, True): 5,
+        })
+        self.assertEqual(self.player_points(2), {
+            (CENTER, False): 8,
+            (DEFENDER, False): 4,
+            (GOALIE, True): 5,
+        })
+
+    def test_goalie_bonus_needs_save_pct_over_threshold(self):
+        stats = (2, 0, 0, 0, 1, 0, 46, 50)  # games, goals, assists, plus_minus, wins, shutouts, saves, shots
+        self.assertEqual(score_player_games(True, "G", stats), 3)
+        self.assertEqual(score_player_games(True, "G", stats[:6] + (47, 50)), 4)
+
+    def test_calculate_lineup_points_from_gamelogs(self):
+        self.assertEqual(calculate_lineup_points_from_gamelogs(1), 16)
+        points = UserPoints.query.filter_by(user_id=1).one()
+        self.assertEqual((points.lineup_total_points, points.total_points), (16, 16))
+        self.assertFalse(points.bracket_scored)
+
+    def test_score_all_lineups_matches_single_user_scoring(self):
+        self.assertEqual(score_all_lineups(), {"users": 2, "updated": 0, "created": 2})
+        totals = dict(db.session.query(UserPoints.user_id, UserPoints.lineup_total_points))
+        self.assertEqual(totals, {1: 16, 2: 17})
+        self.assertEqual(calculate_lineup_points_from_gamelogs(2), 17)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import unittest
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import insert
+
+from db import db_engine as db
+from models import User, Player, Prediction, PredictionSummary
+from stats_module import STANDINGS_CATEGORIES, get_user_predictions_summary, refresh_prediction_summaries, standings_cache
+
+SAVED = datetime(2025, 4, 18, 12, 0)
+
+
+class PredictionSummariesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        standings_cache.invalidate()  # Module level, may hold another test database's standings
+
+        db.session.execute(insert(User), [
+            {"id": user_id, "username": f"user{user_id}", "team_name": f"Team {user_id}", "password_hash": "x", "registration_code": "TEST"}
+            for user_id in (1, 2)
+        ])
+        db.session.execute(insert(Player), [
+            {"id": player_id, "api_id": 8470000 + player_id, "first_name": "Player", "last_name": str(player_id),
+             "team_abbr": "EDM", "position": "C", "playoff_goals": goals}
+            for player_id, goals in ((1, 7), (2, 5), (3, 4), (4, 1))
+        ])
+        db.session.execute(insert(Prediction), [
+            {"user_id": 1, "predictions_json": json.dumps({"goals": [{"id": 1}, {"id": 4}, "Player 3"]}), "created_at": SAVED},
+            {"user_id": 2, "predictions_json": "{not json", "created_at": SAVED},
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        standings_cache.invalidate()
+
+    def test_summary_body(self):
+        summary = json.loads(get_user_predictions_summary(1))
+        self.assertEqual(summary["totalToComplete"], 3 * len(STANDINGS_CATEGORIES))
+        self.assertEqual((summary["completed"], summary["totalCorrect"]), (1, 2))
+        category, = summary["categories"]
+        self.assertEqual(category["name"], "goals")
+        self.assertEqual(category["userPicks"], [{"id": 1}, {"id": 4}, "Player 3"])
+        self.assertEqual([entry["id"] for entry in category["currentTop3"]], [1, 2, 3])
+        self.assertEqual(category["tiedAtThird"], [])
+        self.assertEqual(category["correctPicks"], 2)
+
+    def test_invalid_predictions_get_an_empty_summary(self):
+        summary = json.loads(get_user_predictions_summary(2))
+        self.assertEqual(summary["categories"], [])
+        self.assertEqual((summary["completed"], summary["totalCorrect"]), (0, 0))
+
+        # The stored row is current, later requests do not refresh again
+        version = PredictionSummary.query.filter_by(user_id=2).one().stats_version
+        self.assertEqual(refresh_prediction_summaries(version, standings_cache.get()[1]), 0)
+
+    def test_no_predictions(self):
+        db.session.execute(insert(User), [{"id": 3, "username": "user3", "team_name": "Team 3", "password_hash": "x", "registration_code": "TEST"}])
+        db.session.commit()
+        self.assertIsNone(get_user_predictions_summary(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
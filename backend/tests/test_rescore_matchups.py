@@ -0,0 +1,153 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import random
+import unittest
+
+from flask import Flask
+from sqlalchemy import insert, select
+
+from db import db_engine as db
+from models import User, Pick, MatchupResult, UserPoints
+from score_module import BRACKET_COLUMNS, ROUND1_CODES, rescore_matchups, result_tuple, score_all_brackets, sync_pick_items
+from benchmarks.synthetic_data import EAST_TEAMS, WEST_TEAMS, play_bracket, picks_json
+
+USERS = 30
+# Users 1-10 are bracket scored before any result, 11-20 only have a row from lineup and
+# prediction scoring, 21-30 have no UserPoints row
+SCORED_USERS = range(1, 11)
+LINEUP_ONLY_USERS = range(11, 21)
+POINTS_COLUMNS = BRACKET_COLUMNS + ["bracket_total_points", "lineup_total_points", "predictions_total_points", "total_points", "bracket_scored"]
+
+
+class RescoreMatchupsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        rng = random.Random(7)
+        db.session.execute(insert(User), [
+            {"id": user_id, "username": f"user{user_id}", "team_name": f"Team {user_id}", "password_hash": "x", "registration_code": "TEST"}
+            for user_id in range(1, USERS + 1)
+        ])
+        for user_id in range(1, USERS + 1):
+            picks = picks_json(play_bracket(rng))
+            db.session.add(Pick(user_id=user_id, picks_json=picks))
+            sync_pick_items(user_id, json.loads(picks))
+        db.session.commit()
+        score_all_brackets()
+        db.session.execute(UserPoints.__table__.delete().where(UserPoints.user_id > SCORED_USERS[-1]))
+        self.add_lineup_only_rows()
+        db.session.commit()
+        self.results = play_bracket(rng)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_lineup_only_rows(self):
+        db.session.execute(insert(UserPoints), [
+            {"user_id": user_id, "lineup_total_points": 7, "predictions_total_points": 3, "total_points": 10}
+            for user_id in LINEUP_ONLY_USERS
+        ])
+
+    def save_results(self, results):
+        """What /api/bracket/save-results does with the results of one round"""
+        old_results = {
+            row.matchup_code: result_tuple(row.winner, row.games)
+            for row in MatchupResult.query.filter(MatchupResult.matchup_code.in_(list(results)))
+        }
+        changes = {}
+        for code, (winner, games) in results.items():
+            existing = MatchupResult.query.filter_by(matchup_code=code).first()
+            if existing:
+                existing.winner, existing.games = winner, games
+            else:
+                db.session.add(MatchupResult(matchup_code=code, winner=winner, games=games))
+            changes[code] = (old_results.get(code), result_tuple(winner, games))
+        rescore_matchups(changes)
+        db.session.commit()
+
+    def delete_result(self, code):
+        """What /api/bracket/delete-result does"""
+        result = MatchupResult.query.filter_by(matchup_code=code).first()
+        old_result = result_tuple(result.winner, result.games)
+        db.session.delete(result)
+        rescore_matchups({code: (old_result, None)})
+        db.session.commit()
+
+    def snapshot(self):
+        table = UserPoints.__table__
+        return {
+            row[0]: tuple(row[1:])
+            for row in db.session.execute(select(table.c.user_id, *[table.c[column] for column in POINTS_COLUMNS]))
+        }
+
+    def assert_matches_full_recount(self):
+        rescored = self.snapshot()
+        counts = score_all_brackets()
+        full = self.snapshot()
+        self.assertEqual(counts["updated"], 0)
+        self.assertEqual({user_id: full[user_id] for user_id in rescored}, rescored)
+        return rescored
+
+    def round1(self):
+        return {code: self.results[code] for code in ROUND1_CODES}
+
+    def edited(self, results):
+        """Give the first series to the other team and change the games of the second"""
+        results = dict(results)
+        first, second = ROUND1_CODES[:2]
+        winner, games = results[first]
+        teams = WEST_TEAMS + EAST_TEAMS
+        results[first] = (next(team for team in teams[:2] if team != winner), games)
+        winner, games = results[second]
+        results[second] = (winner, 4 if games != 4 else 7)
+        return results
+
+    def test_save_matches_full_recount(self):
+        self.save_results(self.round1())
+        rescored = self.assert_matches_full_recount()
+        for user_id in LINEUP_ONLY_USERS:
+            values = dict(zip(POINTS_COLUMNS, rescored[user_id]))
+            self.assertTrue(values["bracket_scored"])
+            self.assertEqual(values["total_points"], values["bracket_total_points"] + 10)
+
+    def test_edit_matches_full_recount(self):
+        self.save_results(self.round1())
+        self.save_results(self.edited(self.round1()))
+        self.assert_matches_full_recount()
+
+    def test_delete_matches_full_recount(self):
+        self.save_results(self.round1())
+        self.save_results(self.edited(self.round1()))
+        self.delete_result(ROUND1_CODES[2])
+        self.assert_matches_full_recount()
+
+    def test_later_rounds_match_full_recount(self):
+        self.save_results(self.round1())
+        self.save_results({code: result for code, result in self.results.items() if code not in ROUND1_CODES})
+        self.assert_matches_full_recount()
+
+    def test_rows_created_after_results_are_recounted(self):
+        # Lineup scoring creates rows for users whose bracket was never scored after results exist
+        self.save_results(self.round1())
+        db.session.execute(UserPoints.__table__.delete().where(UserPoints.user_id.in_(list(LINEUP_ONLY_USERS))))
+        self.add_lineup_only_rows()
+        db.session.commit()
+
+        self.save_results(self.edited(self.round1()))
+        rescored = self.assert_matches_full_recount()
+        self.assertTrue(all(rescored[user_id][POINTS_COLUMNS.index("bracket_scored")] for user_id in LINEUP_ONLY_USERS))
+
+
+if __name__ == "__main__":
+    unittest.main()
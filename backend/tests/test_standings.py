@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+
+from flask import Flask
+from sqlalchemy import insert
+
+from db import db_engine as db
+from models import Player, Goalie
+from stats_module import build_standings
+
+
+def player(player_id, position="C", **stats):
+    return {
+        "id": player_id, "api_id": 8470000 + player_id, "first_name": "Player", "last_name": str(player_id),
+        "team_abbr": "EDM", "position": position, "is_U23": False, "birth_country": "CAN", **stats,
+    }
+
+
+def goalie(goalie_id, wins):
+    return {
+        "id": goalie_id, "api_id": 8480000 + goalie_id, "first_name": "Goalie", "last_name": str(goalie_id),
+        "team_abbr": "EDM", "position": "G", "is_U23": False, "playoff_wins": wins,
+    }
+
+
+def ids(entries):
+    return [entry["id"] for entry in entries]
+
+
+class StandingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add(self, players=(), goalies=()):
+        # Core inserts, the ORM bulk insert would put the column default 0 in place of an explicit None
+        if players:
+            db.session.execute(insert(Player.__table__), list(players))
+        if goalies:
+            db.session.execute(insert(Goalie.__table__), list(goalies))
+        db.session.commit()
+
+    def test_ties_at_third_place(self):
+        self.add(players=[
+            player(1, playoff_goals=5),
+            player(2, playoff_goals=10),
+            player(3, playoff_goals=3),
+            player(4, playoff_goals=5),
+            player(5, playoff_goals=8),
+            player(6, playoff_goals=5),
+        ])
+        goals = build_standings()["goals"]
+        # 10, 8, then the lowest id of the three players with 5 goals
+        self.assertEqual(ids(goals["leaders"]), [2, 5, 1])
+        self.assertEqual([entry["value"] for entry in goals["leaders"]], [10, 8, 5])
+        self.assertEqual(ids(goals["tiedAtThird"]), [4, 6])
+
+    def test_tie_above_third_place_is_not_listed(self):
+        self.add(players=[player(1, playoff_goals=9), player(2, playoff_goals=9), player(3, playoff_goals=7), player(4, playoff_goals=6)])
+        goals = build_standings()["goals"]
+        self.assertEqual(ids(goals["leaders"]), [1, 2, 3])
+        self.assertEqual(goals["tiedAtThird"], [])
+
+    def test_missing_values_rank_last(self):
+        self.add(players=[
+            player(1, playoff_penalty_minutes=None),
+            player(2, playoff_penalty_minutes=4),
+            player(3, playoff_penalty_minutes=None),
+            player(4, playoff_penalty_minutes=0),
+            player(5, playoff_penalty_minutes=12),
+        ])
+        penalty_minutes = build_standings()["penaltyMinutes"]
+        self.assertEqual(ids(penalty_minutes["leaders"]), [5, 2, 4])
+        self.assertEqual(penalty_minutes["tiedAtThird"], [])
+
+    def test_missing_value_at_third_place_has_no_ties(self):
+        self.add(
+            players=[player(1, position="D", playoff_points=2), player(2, position="D", playoff_points=None),
+                     player(3, position="D", playoff_points=None), player(4, position="C", playoff_points=20)],
+            goalies=[goalie(1, None), goalie(2, 3)],
+        )
+        standings = build_standings()
+        # Only defenders count, the two without points fill the top 3 in id order
+        self.assertEqual(ids(standings["defensePoints"]["leaders"]), [1, 2, 3])
+        self.assertIsNone(standings["defensePoints"]["leaders"][2]["value"])
+        self.assertEqual(standings["defensePoints"]["tiedAtThird"], [])
+        self.assertEqual(ids(standings["goalieWins"]["leaders"]), [2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
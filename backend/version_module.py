@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Setting, Player, Goalie, Team, Headline, Matchup, MatchupResult, Vote
+from db import db_engine as db
+
+# Bumped whenever UserPoints change, everything derived from points is cached against it
+POINTS_VERSION_KEY = 'points_version'
+
+# Bumped whenever Player or Goalie rows change, the prediction standings are cached against it
+STATS_VERSION_KEY = 'stats_version'
+
+# Bumped when the rows behind the cached read endpoints change, see cache_module
+TEAMS_VERSION_KEY = 'teams_version'
+HEADLINES_VERSION_KEY = 'headlines_version'
+MATCHUPS_VERSION_KEY = 'matchups_version'
+VOTES_VERSION_KEY = 'votes_version'
+
+# Bumped by settings_module.set_setting, the in-memory copy of the settings table is cached against it
+SETTINGS_VERSION_KEY = 'settings_version'
+
+# How often (seconds) a worker re-reads a version from the database. Other workers
+# pick up a bump within this interval, the worker that bumped it immediately.
+VERSION_CHECK_INTERVAL = float(os.environ.get("VERSION_CHECK_INTERVAL", 2))
+
+_caches = []
+
+
+def get_data_version(key):
+    """Return the stored version counter for key, 0 if it was never bumped"""
+    value = db.session.query(Setting.value).filter_by(key=key).scalar()
+    try:
+        return int(value) if value is not None else 0
+    except ValueError:
+        return 0
+
+
+def bump_data_version(key, description=None):
+    """
+    Increment the version counter for key in the current transaction. Does not commit.
+
+    The settings row is locked until commit on databases that support it,
+    so concurrent bumps stay monotonic.
+
+    Returns:
+        int: The new version
+    """
+    setting = Setting.query.filter_by(key=key).with_for_update().first()
+    if not setting:
+        setting = Setting(key=key, value='1', description=description or f'Version counter for {key}')
+        db.session.add(setting)
+        version = 1
+    else:
+        try:
+            version = int(setting.value) + 1
+        except ValueError:
+            version = 1
+        setting.value = str(version)
+    for cache in _caches:
+        if cache.key == key:
+            cache.invalidate()
+    return version
+
+
+class VersionedCache:
+    """
+    A value built from the database and kept in memory until its version counter changes.
+
+    get() checks the stored version at most every `check_interval` seconds and
+    calls `build()` again only when it differs from the version the value was built for.
+    """
+
+    def __init__(self, key, build, check_interval=VERSION_CHECK_INTERVAL):
+        self.key = key
+        self.build = build
+        self.check_interval = check_interval
+        self.version = None
+        self.value = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        _caches.append(self)
+
+    def invalidate(self):
+        """Force the next get() to re-read the version"""
+        self.checked_at = 0.0
+
+    def get(self):
+        """
+        Returns:
+            tuple: (version, value)
+        """
+        now = time.monotonic()
+        if self.value is not None and now - self.checked_at < self.check_interval:
+            return self.version, self.value
+        with self.lock:
+            version = get_data_version(self.key)
+            if self.value is None or version != self.version:
+                self.value = self.build()
+                self.version = version
+            self.checked_at = time.monotonic()
+            return self.version, self.value
+
+
+def bump_version_on_change(key, models):
+    """
+    Bump key in the writing transaction whenever rows of one of `models` change: on ORM
+    flushes that insert, delete or modify an instance, and on INSERT/UPDATE/DELETE
+    statements run through the session (bulk writes, Query.delete()).
+    """
+    table_names = {model.__table__.name for model in models}
+
+    def before_flush(session, flush_context, instances):
+        changed = any(isinstance(obj, models) for obj in chain(session.new, session.deleted)) or any(
+            isinstance(obj, models) and session.is_modified(obj) for obj in session.dirty
+        )
+        if changed:
+            bump_data_version(key)
+
+    def do_orm_execute(execute_state):
+        if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+            if getattr(execute_state.statement.table, "name", None) in table_names:
+                bump_data_version(key)
+
+    event.listen(Session, "before_flush", before_flush)
+    event.listen(Session, "do_orm_execute", do_orm_execute)
+
+
+bump_version_on_change(STATS_VERSION_KEY, (Player, Goalie))
+bump_version_on_change(TEAMS_VERSION_KEY, (Team,))
+bump_version_on_change(HEADLINES_VERSION_KEY, (Headline,))
+bump_version_on_change(MATCHUPS_VERSION_KEY, (Matchup, MatchupResult))
+bump_version_on_change(VOTES_VERSION_KEY, (Vote,))
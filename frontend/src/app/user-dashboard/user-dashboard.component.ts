@@ -101,6 +101,8 @@ interface PredictionCategory {
   name: string;
   userPicks: Player[];
   currentTop3: Player[];
+  // Players outside the top 3 level with 3rd place, they do not count as correct picks
+  tiedAtThird?: Player[];
   correctPicks: number;
 }
 